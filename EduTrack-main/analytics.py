@@ -0,0 +1,284 @@
+import os
+from operator import itemgetter
+import numpy as np
+import repository
+import store
+
+# Columnar attendance analytics.
+#
+# The attendance master is loaded once into dense students x subjects arrays
+# (working days, present days, and an "enrolled" mask for cells the student
+# actually has). Every aggregate below is a handful of NumPy reductions over
+# those arrays instead of a walk over the record dicts, and the matrix itself
+# is cached until the master (or its journal) changes.
+
+ATTENDANCE_MASTER_FILE = "attendance_master.json"
+THRESHOLD = 75.0                    # minimum attendance %
+PERCENTILES = (10, 25, 50, 75, 90)
+
+_WORKING = itemgetter("total_working_days")
+_PRESENT = itemgetter("total_present_days")
+
+
+def _default_master():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), ATTENDANCE_MASTER_FILE)
+
+def _pct(present, working):
+    """present / working as a percentage, NaN where nothing was held"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(working > 0, np.round(present * 100.0 / working, 2), np.nan)
+
+
+class AttendanceMatrix:
+    """Dense students x subjects view of the attendance master"""
+
+    def __init__(self, rolls, section_of, section_names, subjects, subject_names, working, present, enrolled):
+        self.rolls = rolls                      # row -> roll number
+        self.row_of = dict(zip(rolls, range(len(rolls))))
+        self.section_of = section_of            # row -> index into section_names
+        self.section_names = section_names
+        self.subjects = subjects                # column -> subject key (code)
+        self.subject_names = subject_names
+        self.working = working                  # int32 (students, subjects)
+        self.present = present
+        self.enrolled = enrolled                # bool: student has this subject
+
+    @property
+    def shape(self):
+        return self.working.shape
+
+    def rows_for_sections(self, sections):
+        """Row indices of students in any of the given sections"""
+        wanted = {str(s).strip().upper() for s in sections}
+        ids = [i for i, name in enumerate(self.section_names) if str(name).strip().upper() in wanted]
+        return np.flatnonzero(np.isin(self.section_of, ids))
+
+    def percentages(self, rows=None):
+        """Per-cell attendance % (NaN where no classes were held)"""
+        w, p = self._slice(rows)
+        return _pct(p, w)
+
+    def student_summary(self, rows=None):
+        """Overall working / present days and % per student"""
+        w, p = self._slice(rows)
+        w, p = w.sum(axis=1), p.sum(axis=1)
+        return {"working": w, "present": p, "percentage": _pct(p, w)}
+
+    def subject_summary(self, rows=None):
+        """Totals and % per subject, plus the mean of the students' own %"""
+        w, p = self._slice(rows)
+        held = w > 0
+        own = np.where(held, p * 100.0 / np.maximum(w, 1), 0.0).sum(axis=0)
+        counted = held.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(counted > 0, own / counted, np.nan)
+        tw, tp = w.sum(axis=0), p.sum(axis=0)
+        return {"working": tw, "present": tp, "percentage": _pct(tp, tw), "mean_student": mean}
+
+    def section_summary(self):
+        """Per section x subject totals and %, and an overall % per section"""
+        k, m = len(self.section_names), self.working.shape[1]
+        w = np.zeros((k, m), dtype=np.int64)
+        p = np.zeros((k, m), dtype=np.int64)
+        for j in range(m):
+            w[:, j] = np.bincount(self.section_of, weights=self.working[:, j], minlength=k)
+            p[:, j] = np.bincount(self.section_of, weights=self.present[:, j], minlength=k)
+        students = np.bincount(self.section_of, minlength=k)
+        return {"working": w, "present": p, "percentage": _pct(p, w),
+                "overall": _pct(p.sum(axis=1), w.sum(axis=1)), "students": students}
+
+    def percentiles(self, q=PERCENTILES, rows=None):
+        """Percentiles of the students' overall attendance %"""
+        pct = self.student_summary(rows)["percentage"]
+        pct = pct[~np.isnan(pct)]
+        if not pct.size:
+            return {x: float("nan") for x in q}
+        return dict(zip(q, np.percentile(pct, q).tolist()))
+
+    def shortfall(self, threshold=THRESHOLD, rows=None):
+        """Enrolled (student, subject) cells below threshold, worst first.
+
+        "needed" is the number of consecutive classes the student must attend
+        to get back to the threshold.
+        """
+        idx = np.arange(self.working.shape[0]) if rows is None else np.asarray(rows)
+        w, p = self.working[idx], self.present[idx]
+        pct = _pct(p, w)
+        mask = self.enrolled[idx] & (w > 0) & (pct < threshold)
+        r, c = np.nonzero(mask)
+        vals = pct[r, c]
+        order = np.argsort(vals, kind="stable")
+        r, c, vals = r[order], c[order], vals[order]
+        t = threshold / 100.0
+        needed = np.ceil((t * w[r, c] - p[r, c]) / (1.0 - t)).astype(np.int64) if t < 1 else np.zeros_like(r)
+        out = []
+        for i, j, v, n in zip(idx[r].tolist(), c.tolist(), vals.tolist(), needed.tolist()):
+            out.append({
+                "roll": self.rolls[i],
+                "section": self.section_names[self.section_of[i]],
+                "subject": self.subjects[j],
+                "subject_name": self.subject_names[j],
+                "working": int(self.working[i, j]),
+                "present": int(self.present[i, j]),
+                "percentage": v,
+                "needed": max(int(n), 0),
+            })
+        return out
+
+    def cells(self, rows=None):
+        """(roll, subject column, %) for every enrolled cell in rows"""
+        idx = np.arange(self.working.shape[0]) if rows is None else np.asarray(rows)
+        pct = np.nan_to_num(_pct(self.present[idx], self.working[idx]), nan=0.0)
+        r, c = np.nonzero(self.enrolled[idx])
+        return [(self.rolls[i], j, v) for i, j, v in zip(idx[r].tolist(), c.tolist(), pct[r, c].tolist())]
+
+    def _slice(self, rows):
+        if rows is None:
+            return self.working, self.present
+        return self.working[rows], self.present[rows]
+
+
+def from_records(records):
+    """Build a matrix from the attendance_records dict of the master.
+
+    Students of a section usually share the same subject keys, so the column
+    layout is looked up once per distinct key tuple and only the counters are
+    copied per student.
+    """
+    col_of, sec_of, layouts = {}, {}, {}
+    section_idx, section_names, subjects, subject_names = [], [], [], []
+    counts, ci, wv, pv = [], [], [], []
+    for rec in records.values():
+        section = rec.get("section", "")
+        s = sec_of.get(section)
+        if s is None:
+            s = sec_of[section] = len(section_names)
+            section_names.append(section)
+        section_idx.append(s)
+        subs = rec.get("subjects") or {}
+        keys = tuple(subs)
+        cols = layouts.get(keys)
+        if cols is None:
+            cols = []
+            for code, det in subs.items():
+                j = col_of.get(code)
+                if j is None:
+                    j = col_of[code] = len(subjects)
+                    subjects.append(code)
+                    subject_names.append(det.get("subject_name") or code)
+                cols.append(j)
+            layouts[keys] = cols
+        counts.append(len(cols))
+        ci.extend(cols)
+        dets = subs.values()
+        n = len(wv)
+        try:
+            wv.extend(map(_WORKING, dets))
+            pv.extend(map(_PRESENT, dets))
+        except KeyError:
+            # hand-edited entry without counters
+            del wv[n:], pv[n:]
+            wv.extend([d.get("total_working_days", 0) for d in dets])
+            pv.extend([d.get("total_present_days", 0) for d in dets])
+    r = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+    return _assemble(list(records), section_idx, section_names, subjects, subject_names, r, ci, wv, pv)
+
+def from_table(students, cells, subject_names=None):
+    """Build a matrix from [(roll, section)] and [(roll, subject, working, present)]
+    (the shape SqliteBackend.attendance_table returns)"""
+    subject_names = subject_names or {}
+    rolls = list(map(itemgetter(0), students))
+    sections = list(map(itemgetter(1), students))
+    roll_col, code_col, w_col, p_col = (list(map(itemgetter(k), cells)) for k in range(4))
+    # dict.fromkeys / map keep the per-cell work in C: first-seen order, no Python loop
+    row_of = dict(zip(rolls, range(len(rolls))))
+    for roll in dict.fromkeys(roll_col):
+        if roll not in row_of:
+            row_of[roll] = len(rolls)
+            rolls.append(roll)
+            sections.append("")
+    section_names = list(dict.fromkeys(sections))
+    sec_of = dict(zip(section_names, range(len(section_names))))
+    subjects = list(dict.fromkeys(code_col))
+    col_of = dict(zip(subjects, range(len(subjects))))
+    r = np.fromiter(map(row_of.__getitem__, roll_col), dtype=np.int64, count=len(cells))
+    c = np.fromiter(map(col_of.__getitem__, code_col), dtype=np.int64, count=len(cells))
+    return _assemble(rolls, list(map(sec_of.__getitem__, sections)), section_names,
+                     subjects, [subject_names.get(s) or s for s in subjects], r, c,
+                     np.fromiter(w_col, dtype=np.int32, count=len(cells)),
+                     np.fromiter(p_col, dtype=np.int32, count=len(cells)))
+
+def _assemble(rolls, section_idx, section_names, subjects, subject_names, r, c, wv, pv):
+    shape = (len(rolls), len(subjects))
+    working = np.zeros(shape, dtype=np.int32)
+    present = np.zeros(shape, dtype=np.int32)
+    enrolled = np.zeros(shape, dtype=bool)
+    if len(c):
+        r, c = np.asarray(r, dtype=np.int64), np.asarray(c, dtype=np.int64)
+        working[r, c] = np.asarray(wv, dtype=np.int32)
+        present[r, c] = np.asarray(pv, dtype=np.int32)
+        enrolled[r, c] = True
+    return AttendanceMatrix(rolls, np.asarray(section_idx, dtype=np.int32), section_names,
+                            subjects, subject_names, working, present, enrolled)
+
+def matrix(master_path=None, sections=None):
+    """Attendance matrix for the master file, cached until attendance changes.
+
+    With sections, only those sections' shards are read (JSON backend).
+    """
+    import attendance_log
+    master_path = os.path.abspath(master_path or _default_master())
+    db = repository.sqlite_backend()
+    if db:
+        return store.memo(("analytics", master_path, db.name), (master_path,),
+                          lambda: from_table(*db.attendance_table()))
+    wanted = None if sections is None else tuple(sorted({attendance_log.section_key(s) for s in sections}))
+    return store.memo(("analytics", master_path, "json", wanted), attendance_log.watch_paths(master_path, sections),
+                      lambda: from_records(attendance_log.view(master_path, sections=sections).get("attendance_records", {})))
+
+# -----------------------------------------------------------
+# Reports
+# -----------------------------------------------------------
+
+def print_section_report(sections=None, master_path=None, threshold=THRESHOLD):
+    """Per-subject %, percentiles and the shortfall list for sections (all if None)"""
+    m = matrix(master_path, sections)
+    rows = None if sections is None else m.rows_for_sections(sections)
+    label = "all sections" if sections is None else ", ".join(sections)
+    if rows is not None and not len(rows):
+        print(f"No attendance data found for {label}.")
+        return
+    subj = m.subject_summary(rows)
+    print(f"\n--- Attendance analytics: {label} ---")
+    print(f"Students: {m.shape[0] if rows is None else len(rows)}")
+    for j, code in enumerate(m.subjects):
+        if subj["working"][j]:
+            print(f"  {m.subject_names[j]} ({code}): {subj['percentage'][j]:.1f}%")
+    pcts = m.percentiles(rows=rows)
+    print("Percentiles (overall %): " + ", ".join(f"p{q} {v:.1f}" for q, v in pcts.items()))
+    short = m.shortfall(threshold, rows)
+    print(f"\nBelow {threshold:g}%: {len(short)}")
+    for s in short:
+        print(f"  {s['roll']} [{s['section']}] {s['subject_name']}: {s['percentage']:.1f}% "
+              f"({s['present']}/{s['working']}, needs {s['needed']} more)")
+
+def print_campus_summary(master_path=None):
+    m = matrix(master_path)
+    sec = m.section_summary()
+    print("\n--- Campus attendance by section ---")
+    for k in np.argsort(m.section_names).tolist():
+        overall = sec["overall"][k]
+        print(f"  {m.section_names[k] or '(none)'}: {sec['students'][k]} students, "
+              + ("no classes held" if np.isnan(overall) else f"{overall:.1f}%"))
+    pcts = m.percentiles()
+    print("Percentiles (overall %): " + ", ".join(f"p{q} {v:.1f}" for q, v in pcts.items()))
+
+
+if __name__ == "__main__":
+    print("1. Campus summary by section")
+    print("2. Shortfall list (below 75%)")
+    ch = input("Enter choice: ").strip()
+    if ch == "1":
+        print_campus_summary()
+    elif ch == "2":
+        print_section_report()
@@ -1,25 +1,248 @@
 import os
 import shutil
-import fitz  
-import json
+import hashlib
+import tempfile
+from datetime import datetime
+import store
 
 SECTIONS_FILE = "sections.json"      
 TEACHER_SECTIONS_FILE = "teachersections.json"  # teacher_name → [sections]
 ASSIGNMENT_FOLDER = "assignments"     # root folder
+BLOB_FOLDER = "blobs"                 # <root>/blobs/<sha[:2]>/<sha>.pdf, one file per unique PDF
+MANIFEST_FILE = "manifest.json"       # <root>/<section>/manifest.json, roll → versions
+INDEX_FOLDER = "index"                # <root>/index/<section>.json, one row per submitted PDF
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+CHUNK_SIZE = 1 << 20                  # bytes read, hashed and written per step
+
+# Submissions are content-addressed. An upload is copied in chunks to a temp
+# file while it is hashed with SHA-256; the temp file then becomes
+# blobs/<sha[:2]>/<sha>.pdf, or is dropped when that blob already exists, so
+# disk use grows with unique content, not with resubmissions.
+# <section>/<roll>.pdf is a hard link to the newest version (a copy where the
+# filesystem has no links), and every version is kept in the section manifest
+# as {sha256, size, submitted_at, name}.
+#
+# Listings read a per-section index instead of the folder: roll → {file,
+# size, mtime, submitted_at, versions, sha256}. Submitting updates its row
+# directly. The index also remembers the folder's mtime; when that changes
+# (a file copied in or deleted by hand) the folder is re-read with scandir
+# and only PDFs whose size or mtime moved are looked up again.
+
+
+def blob_path(sha256, folder=None):
+    return os.path.join(folder or ASSIGNMENT_FOLDER, BLOB_FOLDER, sha256[:2], f"{sha256}.pdf")
+
+def manifest_path(section, folder=None):
+    return os.path.join(folder or ASSIGNMENT_FOLDER, section, MANIFEST_FILE)
+
+def index_path(section, folder=None):
+    return os.path.join(folder or ASSIGNMENT_FOLDER, INDEX_FOLDER, f"{section}.json")
+
+def store_blob(source_path, folder=None, progress=None):
+    """Copy a file into the blob store; returns (sha256, size, stored), stored is False for known content
+
+    progress(done_bytes, total_bytes) is called after every chunk.
+    """
+    blobs = os.path.join(folder or ASSIGNMENT_FOLDER, BLOB_FOLDER)
+    os.makedirs(blobs, exist_ok=True)
+    total = os.path.getsize(source_path)
+    digest, done = hashlib.sha256(), 0
+    fd, tmp = tempfile.mkstemp(dir=blobs, prefix=".", suffix=".tmp")
+    try:
+        with open(source_path, "rb") as src, os.fdopen(fd, "wb") as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+                done += len(chunk)
+                if progress:
+                    progress(done, total)
+            dst.flush()
+            os.fsync(dst.fileno())
+        sha = digest.hexdigest()
+        dest = blob_path(sha, folder)
+        if os.path.exists(dest):
+            os.remove(tmp)
+            return sha, done, False
+        os.chmod(tmp, 0o644)    # mkstemp creates 0600
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(tmp, dest)
+        return sha, done, True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def file_sha256(path):
+    """SHA-256 of a file, read in CHUNK_SIZE pieces"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _link(blob, dest):
+    """Atomically point dest at a blob: a hard link, or a copy where links are unsupported"""
+    if os.path.exists(dest) and os.path.samefile(blob, dest):
+        return      # rename() between two links to one file is a no-op
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dest), prefix=".", suffix=".tmp")
+    os.close(fd)
+    os.remove(tmp)
+    try:
+        os.link(blob, tmp)
+    except OSError:
+        shutil.copyfile(blob, tmp)
+    os.replace(tmp, dest)
+
+def _version(sha, size, when, name):
+    return {
+        "sha256": sha,
+        "size": size,
+        "submitted_at": datetime.fromtimestamp(when).strftime(TIME_FORMAT),
+        "name": name,
+    }
+
+def store_submission(roll, section, source_path, folder=None, progress=None):
+    """Store a PDF as the newest version of roll's submission; returns its manifest entry
+
+    The entry also carries "version" (1 for the first upload) and "new_content"
+    (False when the same PDF was already stored by anyone).
+    """
+    folder = folder or ASSIGNMENT_FOLDER
+    sec_dir = os.path.join(folder, section)
+    os.makedirs(sec_dir, exist_ok=True)
+    seen_mtime = _dir_mtime(sec_dir)
+    latest = os.path.join(sec_dir, f"{roll}.pdf")
+    sha, size, stored = store_blob(source_path, folder, progress)
+    version = _version(sha, size, datetime.now().timestamp(), os.path.basename(source_path))
+
+    def record(data):
+        versions = data.setdefault("submissions", {}).setdefault(roll, [])
+        if not versions and os.path.exists(latest):
+            # copied in before the blob store existed; keep it as version 1
+            old_sha, old_size, _ = store_blob(latest, folder)
+            versions.append(_version(old_sha, old_size, os.path.getmtime(latest), os.path.basename(latest)))
+        versions.append(version)
+
+    data = store.update(manifest_path(section, folder), {}, record)
+    _link(blob_path(sha, folder), latest)
+    count = len(data["submissions"][roll])
+    row = _row(roll, os.path.basename(latest), os.stat(latest), version, count)
+
+    def index(cur):
+        cur.setdefault("rows", {})[roll] = row
+        if cur.get("dir_mtime") == seen_mtime:
+            # the index was current before our writes, so it still is
+            cur["dir_mtime"] = _dir_mtime(sec_dir)
+    os.makedirs(os.path.join(folder, INDEX_FOLDER), exist_ok=True)
+    store.update(index_path(section, folder), {}, index)
+    return dict(version, version=count, new_content=stored)
+
+def submission_history(section, roll, folder=None):
+    """Every stored version of one student's submission, oldest first"""
+    return list(store.view(manifest_path(section, folder), {}).get("submissions", {}).get(roll, []))
+
+def _dir_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _row(roll, name, st, version=None, versions=0):
+    return {
+        "roll": roll,
+        "file": name,
+        "size": st.st_size,
+        "mtime": st.st_mtime_ns,
+        "submitted_at": version["submitted_at"] if version else
+                        datetime.fromtimestamp(st.st_mtime).strftime(TIME_FORMAT),
+        "versions": versions or 1,
+        "sha256": version["sha256"] if version else None,
+    }
+
+def _rescan(sec_dir, section, folder, index):
+    """Bring the index in line with the section folder, looking up only changed PDFs"""
+    old, rows, history = index.get("rows", {}), {}, None
+    index["dir_mtime"] = _dir_mtime(sec_dir)     # before scanning: later changes rescan again
+    with os.scandir(sec_dir) as entries:
+        for entry in entries:
+            if not entry.name.lower().endswith(".pdf") or not entry.is_file():
+                continue
+            roll, st = entry.name[:-4], entry.stat()
+            row = old.get(roll)
+            if row and row["mtime"] == st.st_mtime_ns and row["size"] == st.st_size:
+                rows[roll] = row
+                continue
+            if history is None:
+                history = store.view(manifest_path(section, folder), {}).get("submissions", {})
+            versions = history.get(roll, [])
+            latest = versions[-1] if versions and versions[-1]["size"] == st.st_size else None
+            rows[roll] = _row(roll, entry.name, st, latest, len(versions))
+    index["rows"] = rows
+
+def section_index(section, folder=None):
+    """roll → submission row for one section; the folder is re-read only after it changed"""
+    folder = folder or ASSIGNMENT_FOLDER
+    sec_dir = os.path.join(folder, section)
+    mtime = _dir_mtime(sec_dir)
+    if mtime is None:
+        return {}
+    path = index_path(section, folder)
+    index = store.view(path, {})
+    if index.get("dir_mtime") != mtime:
+        def refresh(cur):
+            if cur.get("dir_mtime") != _dir_mtime(sec_dir):
+                _rescan(sec_dir, section, folder, cur)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        index = store.update(path, {}, refresh)
+    return index.get("rows", {})
+
+SORT_KEYS = {
+    "roll": lambda r: (r["section"], r["roll"]),
+    "time": lambda r: r["submitted_at"],
+    "size": lambda r: r["size"],
+}
+
+def list_submissions(sections, folder=None, sort="roll", reverse=False, roll=None, since=None, min_size=0):
+    """Submission rows (with "section") for some sections, filtered and sorted from the index alone
+
+    roll matches a substring of the roll number, since is a "YYYY-MM-DD" lower
+    bound on the submission time and min_size is in bytes.
+    """
+    rows = []
+    for section in sections:
+        for row in section_index(section, folder).values():
+            if roll and roll.upper() not in row["roll"].upper():
+                continue
+            if since and row["submitted_at"] < since:
+                continue
+            if row["size"] < min_size:
+                continue
+            rows.append(dict(row, section=section))
+    rows.sort(key=SORT_KEYS[sort], reverse=reverse)
+    return rows
+
+def size_text(size):
+    return f"{size / 2**20:.1f} MB" if size >= 2**20 else f"{(size + 1023) // 1024} KB"
+
+def _progress_line(done, total):
+    print(f"\r  Copying... {done * 100 // max(total, 1)}%", end="", flush=True)
 
 
 def submit_assignment(student_id, source_path):
     """
     Student submits an assignment PDF.
-    The file is saved under assignments/<section>/<student_id>.pdf
+    The newest version is at assignments/<section>/<student_id>.pdf;
+    earlier versions stay in the section manifest.
     """
     # Load student section
     if not os.path.exists(SECTIONS_FILE):
         print("sections.json not found.")
         return
 
-    with open(SECTIONS_FILE, "r") as f:
-        sections = json.load(f)
+    sections = store.view(SECTIONS_FILE, {})
 
     student_section = sections.get(student_id)
     if not student_section:
@@ -36,80 +259,71 @@ def submit_assignment(student_id, source_path):
         print("Only PDF files are allowed!")
         return
 
-    # Prepare folder
-    dest_folder = os.path.join(ASSIGNMENT_FOLDER, student_section)
-    os.makedirs(dest_folder, exist_ok=True)
+    # Copy into the blob store and record the new version
+    version = store_submission(student_id, student_section, source_path, progress=_progress_line)
+    print()
+    dest_path = os.path.join(ASSIGNMENT_FOLDER, student_section, f"{student_id}.pdf")
+    print("Assignment submitted successfully!")
+    print(f"  Saved as: {dest_path} (version {version['version']})")
+    if not version["new_content"]:
+        print("  Identical to an earlier upload; stored only once.")
 
-    # Destination path
-    dest_path = os.path.join(dest_folder, f"{student_id}.pdf")
 
-    # Copy file
-    shutil.copy2(source_path, dest_path)
-    print(f"Assignment submitted successfully!")
-    print(f"  Saved as: {dest_path}")
-
-
-def view_assignments(teacher_name):
+def view_assignments(teacher_name, sort="roll", roll=None):
     """
-    Teacher can view all student PDFs in their assigned sections.
+    Teacher can view all student PDFs in their assigned sections,
+    sorted by "roll", "time" or "size" (newest/largest first).
     """
     # Load teacher sections
     if not os.path.exists(TEACHER_SECTIONS_FILE):
         print("teachersections.json not found.")
         return
 
-    with open(TEACHER_SECTIONS_FILE, "r") as f:
-        teacher_data = json.load(f)
+    teacher_data = store.view(TEACHER_SECTIONS_FILE, {})
 
     teacher_sections = teacher_data.get(teacher_name)
     if not teacher_sections:
         print("No sections assigned to this teacher.")
         return
 
-    # Show PDFs from each section
+    # Show PDFs from the section indexes
     print(f"\nAssignments for {teacher_name}:")
-    found = False
-    for section in teacher_sections:
-        section_path = os.path.join(ASSIGNMENT_FOLDER, section)
-        if not os.path.exists(section_path):
-            continue
-
-        files = [f for f in os.listdir(section_path) if f.endswith(".pdf")]
-        if files:
-            print(f"\nSection: {section}")
-            for f in files:
-                print(f"   - {f}")
-            found = True
-
-    if not found:
+    rows = list_submissions(teacher_sections, sort=sort, reverse=sort != "roll", roll=roll)
+    for row in rows:
+        versions = f", {row['versions']} versions" if row["versions"] > 1 else ""
+        print(f"   - [{row['section']}] {row['file']}  {row['submitted_at']}  {size_text(row['size'])}{versions}")
+
+    if not rows:
         print("No assignment PDFs found yet.")
 
 
 def view_pdf_content(pdf_path, page_number=None):
     """
     View PDF text content in terminal.
+    Text comes from the page cache in pdftext.py; a PDF is only parsed
+    the first time anyone views it.
     """
     try:
         if not os.path.exists(pdf_path):
             print("File not found.")
             return
 
-        doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        import pdftext
+        sha = pdftext.cache_file(pdf_path)
+        total_pages = pdftext.page_count(sha)
         print(f"\nViewing '{os.path.basename(pdf_path)}' ({total_pages} pages)\n")
 
         if page_number:
             if 1 <= page_number <= total_pages:
-                text = doc[page_number - 1].get_text() # type: ignore
+                text = pdftext.read_pages(sha, page_number, page_number)[0][1]
                 print(text if text.strip() else "[No text content]")
             else:
                 print("Invalid page number.")
         else:
-            for i in range(total_pages):
-                print(f"\n--- Page {i + 1} ---\n")
-                print(doc[i].get_text() or "[No text content]") # type: ignore
-
-        doc.close()
+            for first in range(1, total_pages + 1, pdftext.PAGE_BLOCK):
+                for n, text in pdftext.read_pages(sha, first, first + pdftext.PAGE_BLOCK - 1):
+                    print(f"\n--- Page {n} ---\n")
+                    print(text or "[No text content]")
     except Exception as e:
         print(f"Error reading PDF: {e}")
 
@@ -127,7 +341,9 @@ if __name__ == "__main__":
 
     elif ch == "2":
         tname = input("Enter your Teacher Name: ").strip()
-        view_assignments(tname)
+        order = input("Sort by roll/time/size (Enter for roll): ").strip().lower() or "roll"
+        rfilter = input("Only rolls containing (Enter for all): ").strip() or None
+        view_assignments(tname, order if order in SORT_KEYS else "roll", rfilter)
 
     elif ch == "3":
         pdfp = input("Enter path to PDF: ").strip()
@@ -1,48 +1,59 @@
-import json
-import matplotlib.pyplot as plt
-import numpy as np
 import os
 from datetime import datetime
+import attendance_log
+import repository
+import store
 
 ATTENDANCE_MASTER_FILE = "attendance_master.json"
 TEACHER_SECTIONS_FILE = "teachersections.json"
 SECTIONS_FILE = "sections.json"
 STUDENT_SUBJECTS_FILE = "studentsubjects.json"
 SUBJECTS_FILE = "subjects.json"
+SECTION_SUBJECTS_FILE = "sectionsubjects.json"
 
-def _resolve_path(filename):
+def _resolve_path(filename, data_dir=None):
+    if data_dir:
+        return os.path.join(data_dir, filename)
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     return os.path.join(base_dir, filename)
 
-def load_json_file(filename):
+def load_json_file(filename, data_dir=None):
     """Load JSON data from file (resolved to project root)"""
-    filepath = _resolve_path(filename)
-    if not os.path.exists(filepath):
-        return {}
-    try:
-        with open(filepath, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print("Error loading JSON", e)
-        return {}
+    return store.load(_resolve_path(filename, data_dir), {})
 
 def save_json_file(filename, data):
     """Save JSON data to file (resolved to project root)"""
     filepath = _resolve_path(filename)
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
+    store.save(filepath, data)
 
 
-def load_attendance_master():
-    """Load attendance data from master file"""
-    return load_json_file(ATTENDANCE_MASTER_FILE)
+def load_attendance_master(sections=None):
+    """Load attendance data (only the given sections' records, if any) plus the journal of marks since"""
+    return attendance_log.load(_resolve_path(ATTENDANCE_MASTER_FILE), sections=sections)
 
 def save_attendance_master(data):
-    """Save attendance data to master file"""
-    data["metadata"]["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-    data["metadata"]["total_students"] = len(data["attendance_records"])
-    save_json_file(ATTENDANCE_MASTER_FILE, data)
+    """Save attendance data (as returned by load_attendance_master) to master file"""
+    filepath = _resolve_path(ATTENDANCE_MASTER_FILE)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    attendance_log.save_snapshot(filepath, data)
+
+def update_attendance_master(fn, sections=None):
+    """Locked read-modify-write of the master: fn(data) edits fresh data in place.
+
+    With sections, only those sections' shards are locked and rewritten.
+    """
+    filepath = _resolve_path(ATTENDANCE_MASTER_FILE)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    return attendance_log.update(filepath, fn, {}, sections)
+
+def append_attendance_events(events):
+    """Journal attendance marks without rewriting the master file"""
+    return attendance_log.append(_resolve_path(ATTENDANCE_MASTER_FILE), events)
+
+def get_attendance_history(student_roll=None, subject_code=None, date_from=None, date_to=None):
+    """Per-day attendance events (YYYY-MM-DD dates), oldest first"""
+    return attendance_log.history(_resolve_path(ATTENDANCE_MASTER_FILE), student_roll, subject_code, date_from, date_to)
 
 def can_teacher_access_section(teachername, section):
     """Check if teacher is authorized to access this section"""
@@ -57,7 +68,8 @@ def get_student_section(roll_number):
 
 def initialize_student_attendance(roll_number, section, subject_names):
     """Initialize attendance record for a new student"""
-    attendance_data = load_attendance_master()
+    if roll_number in attendance_log.view(_resolve_path(ATTENDANCE_MASTER_FILE)).get("attendance_records", {}):
+        return
     subjects_data = load_json_file(SUBJECTS_FILE)
     
     # Create subject name to code mapping
@@ -65,7 +77,9 @@ def initialize_student_attendance(roll_number, section, subject_names):
     for subject in subjects_data.get("subjects", []):
         subject_name_to_code[subject["name"]] = subject["code"]
     
-    if roll_number not in attendance_data.get("attendance_records", {}):
+    def initialize(attendance_data):
+        if roll_number in attendance_data.get("attendance_records", {}):
+            return
         attendance_data.setdefault("attendance_records", {})[roll_number] = {
             "name": roll_number,
             "section": section,
@@ -92,18 +106,25 @@ def initialize_student_attendance(roll_number, section, subject_names):
                 "academic_year": "2024-2025",
                 "total_subjects": len(subjects_data.get("subjects", []))
             }
-        
-        save_attendance_master(attendance_data)
-        print(f"Attendance initialized for student {roll_number} in section {section}")
+    
+    update_attendance_master(initialize, [section])
+    print(f"Attendance initialized for student {roll_number} in section {section}")
 
-def view_attendance(teachername=None, student_roll=None):
-    """View attendance chart - can be used by teachers for their sections or students for their own"""
-    attendance_data = load_attendance_master()
+def view_attendance(teachername=None, student_roll=None, kind="subjects", section=None, subject=None):
+    """View attendance chart - can be used by teachers for their sections or students for their own
+
+    Teachers get an aggregated chart from charts.py: kind is "subjects",
+    "sections", or "students" for one section and subject code.
+    """
+    # matplotlib and numpy take most of a second to import; only load them for the chart
+    import matplotlib.pyplot as plt
+    import numpy as np
+    master_path = _resolve_path(ATTENDANCE_MASTER_FILE)
     
     if student_roll:
         # Student viewing their own attendance
-        if student_roll in attendance_data.get("attendance_records", {}):
-            student_data = attendance_data["attendance_records"][student_roll]
+        student_data = repository.backend().attendance_for_roll(master_path, student_roll)
+        if student_data:
             subjects = []
             attendance_percentages = []
             
@@ -145,39 +166,97 @@ def view_attendance(teachername=None, student_roll=None):
             print("No sections assigned to this teacher.")
             return
         
-        # Collect data for all students in teacher's sections
-        all_subjects = []
-        all_attendance = []
-        
-        for roll_number, student_data in attendance_data.get("attendance_records", {}).items():
-            if student_data["section"] in teacher_sections_list:
-                for subject_code, subject_data in student_data["subjects"].items():
-                    all_subjects.append(f"{roll_number} - {subject_data['subject_name']}")
-                    all_attendance.append(subject_data["attendance_percentage"])
-        
-        if not all_subjects:
+        # one bar per (student, subject) does not scale; show an aggregate, cached as a PNG
+        import charts
+        path = charts.chart(master_path, teacher_sections_list, kind, section, subject)
+        if path is None:
             print("No attendance data found for your sections.")
             return
-        
-        # Create chart
-        colors = plt.cm.viridis(np.linspace(0.2, 0.9, len(all_subjects))) # type: ignore
-        plt.figure(figsize=(14, 8))
-        bars = plt.bar(all_subjects, all_attendance, color=colors, edgecolor="gray", linewidth=0.8)
-        
-        plt.title(f"Attendance Percentage - Teacher {teachername}", fontsize=16, fontweight="bold", pad=20)
-        plt.xlabel("Students - Subjects", fontsize=12, labelpad=10)
-        plt.ylabel("Attendance (%)", fontsize=12, labelpad=10)
-        plt.xticks(rotation=45, ha="right", fontsize=8)
-        plt.yticks(fontsize=10)
-        plt.grid(axis="y", linestyle="--", alpha=0.4)
-        
-        for bar, value in zip(bars, all_attendance):
-            plt.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 1, 
-                    f"{value:.1f}%", ha="center", fontsize=7, fontweight="bold")
-        
-        plt.tight_layout()
+        print(f"Chart saved to {path}")
+        image = plt.imread(path)
+        plt.figure(figsize=(image.shape[1] / charts.DPI, image.shape[0] / charts.DPI))
+        plt.imshow(image)
+        plt.axis("off")
+        plt.tight_layout(pad=0)
         plt.show()
 
+def find_subject_key(subjects_dict, subject_code, subject_name_for_code=None):
+    """Find the key a student's subject is stored under (code, name, or a key
+    whose subject_name matches the code's name). Returns None if missing."""
+    # a) direct match by code (some records may already use codes as keys)
+    if subject_code in subjects_dict:
+        return subject_code
+    # b) if we can map code -> name, try name as key
+    if subject_name_for_code and subject_name_for_code in subjects_dict:
+        return subject_name_for_code
+    # c) try to find a key whose 'subject_name' equals the mapped name
+    if subject_name_for_code:
+        for k, v in subjects_dict.items():
+            if isinstance(v, dict) and v.get("subject_name", "").strip().lower() == subject_name_for_code.strip().lower():
+                return k
+    return None
+
+def get_section_roster(section, data_dir=None):
+    """Sorted roll numbers assigned to a section in sections.json"""
+    return repository.backend().roster(_resolve_path(SECTIONS_FILE, data_dir), section)
+
+def section_subject_codes(section, data_dir=None):
+    """Codes of the subjects a section takes (sectionsubjects.json), or of every subject if it has none listed"""
+    subj_file = load_json_file(SUBJECTS_FILE, data_dir)
+    subj_list = subj_file.get("subjects", []) if isinstance(subj_file, dict) else []
+    name_to_code = {s.get("name"): s.get("code") for s in subj_list if isinstance(s, dict) and s.get("code")}
+    names = load_json_file(SECTION_SUBJECTS_FILE, data_dir).get(str(section).strip().upper()) or []
+    if not names:
+        return {str(code).upper() for code in name_to_code.values()}
+    return {str(name_to_code.get(name) or name).upper() for name in names}
+
+def mark_section_attendance(teachername, section, subject_code, date=None, absentees=(), data_dir=None):
+    """Mark one subject for a whole section in a single transaction.
+
+    Everyone on the section roster (sections.json) is marked present except
+    the rolls in absentees. The master is read once and all marks go to the
+    journal in one append. Returns {"present": [...], "absent": [...],
+    "not_on_roster": [absentees not in the section]}, or None if the teacher
+    is not assigned to the section. Raises ValueError if the section does not
+    take the subject, so a mistyped code never adds a subject to its students.
+    """
+    section = str(section).strip().upper()
+    subject_code = str(subject_code).strip().upper()
+    date = date or datetime.now().strftime("%Y-%m-%d")
+
+    teacher_sections = load_json_file(TEACHER_SECTIONS_FILE, data_dir).get(teachername, [])
+    if section not in [s.upper() for s in teacher_sections]:
+        print(f"Unauthorized: You are not assigned to section {section}.")
+        return None
+
+    if subject_code not in section_subject_codes(section, data_dir):
+        raise ValueError(f"Section {section} does not take subject {subject_code}.")
+
+    roster = get_section_roster(section, data_dir)
+    absent_set = {str(r).strip() for r in absentees if str(r).strip()}
+
+    subj_file = load_json_file(SUBJECTS_FILE, data_dir)
+    subj_list = subj_file.get("subjects", []) if isinstance(subj_file, dict) else []
+    code_to_name = {s.get("code"): s.get("name") for s in subj_list if isinstance(s, dict) and s.get("code")}
+    subject_name = code_to_name.get(subject_code)
+
+    master_path = _resolve_path(ATTENDANCE_MASTER_FILE, data_dir)
+    records = attendance_log.view(master_path, sections=[section]).get("attendance_records", {})
+
+    events = []
+    result = {"present": [], "absent": [], "not_on_roster": sorted(absent_set.difference(roster))}
+    for roll in roster:
+        subjects_dict = records.get(roll, {}).get("subjects", {})
+        key = find_subject_key(subjects_dict, subject_code, subject_name) or subject_code
+        label = subjects_dict.get(key, {}).get("subject_name") or subject_name or subject_code
+        present = roll not in absent_set
+        events.append(attendance_log.make_event(roll, key, present, teachername, date=date,
+                                                subject_name=label, section=section))
+        result["present" if present else "absent"].append(roll)
+
+    attendance_log.append(master_path, events)
+    return result
+
 def mark_attendance(teachername, student_roll, subject_code, is_present=True):
     """Mark attendance for a student - only allowed for authorized teachers.
     Accepts subject_code (e.g. TEA501). Works with attendance_master.json entries
@@ -195,8 +274,8 @@ def mark_attendance(teachername, student_roll, subject_code, is_present=True):
             print(f"Unauthorized: You are not assigned to section {student_section}.")
             return False
 
-        # 3. Load attendance master
-        attendance_data = load_attendance_master()
+        # 3. Load attendance for the student's section
+        attendance_data = load_attendance_master([student_section])
         attendance_records = attendance_data.get("attendance_records", {})
 
         # If student record missing, create basic one
@@ -217,86 +296,43 @@ def mark_attendance(teachername, student_roll, subject_code, is_present=True):
 
         subject_name_for_code = code_to_name.get(subject_code)
 
-        # 5. Try to find the existing subject key in student's subjects:
-        found_key = None
+        # 5. Try to find the existing subject key in student's subjects
+        found_key = find_subject_key(subjects_dict, subject_code, subject_name_for_code)
 
-        # a) direct match by code (some records may already use codes as keys)
-        if subject_code in subjects_dict:
-            found_key = subject_code
-        else:
-            # b) if we can map code -> name, try name as key
-            if subject_name_for_code and subject_name_for_code in subjects_dict:
-                found_key = subject_name_for_code
-            else:
-                # c) try to find a key whose 'subject_name' equals the mapped name
-                if subject_name_for_code:
-                    for k, v in subjects_dict.items():
-                        if isinstance(v, dict) and v.get("subject_name", "").strip().lower() == subject_name_for_code.strip().lower():
-                            found_key = k
-                            break
-
-        # 6. If not found, create a new subject entry (key by code if code available, otherwise by name)
+        # 6. If not found, the journal event creates the entry (key by code if available, otherwise by name)
         if not found_key:
-            # Determine the key we will use for the new subject entry
-            new_key = subject_code if subject_code else (subject_name_for_code or subject_code or "UNKNOWN")
-            new_subject_name = subject_name_for_code if subject_name_for_code else subject_code
-            # ensure subjects_dict exists
-            if not isinstance(subjects_dict, dict):
-                subjects_dict = {}
-            subjects_dict[new_key] = {
-                "subject_name": new_subject_name,
+            found_key = subject_code if subject_code else (subject_name_for_code or "UNKNOWN")
+            subject_data = {
+                "subject_name": subject_name_for_code if subject_name_for_code else subject_code,
                 "total_working_days": 0,
                 "total_present_days": 0,
-                "attendance_percentage": 0.0,
-                "last_updated": ""
             }
-            found_key = new_key
-            # attach back
-            student_record["subjects"] = subjects_dict
-            attendance_records[student_roll] = student_record
-            # save immediately so subsequent read sees it
-            save_attendance_master(attendance_data)
-            print(f"⚠️ Subject entry for '{subject_code}' was missing for {student_roll}. Created new entry '{found_key}'.")
-
-        # 7. Now get the subject data to update
-        subject_data = subjects_dict.get(found_key)
-        if not subject_data:
-            print("Subject not found for this student after creation attempt.")
-            return False
+            print(f"⚠️ Subject entry for '{subject_code}' was missing for {student_roll}. Creating new entry '{found_key}'.")
+        else:
+            # 7. Now get the subject data to update
+            subject_data = subjects_dict.get(found_key)
+            if not subject_data:
+                print("Subject not found for this student after creation attempt.")
+                return False
 
         # 8. Confirm action
         status = "present" if is_present else "absent"
-        confirm = input(f"Mark {student_roll} as {status} for {subject_data.get('subject_name', found_key)}? (y/n): ").strip().lower()
+        subject_label = subject_data.get('subject_name', found_key)
+        confirm = input(f"Mark {student_roll} as {status} for {subject_label}? (y/n): ").strip().lower()
         if confirm not in ["y", "yes"]:
             print("Attendance marking cancelled.")
             return False
 
-        # 9. Update attendance counters
-        subject_data["total_working_days"] = int(subject_data.get("total_working_days", 0)) + 1
-        if is_present:
-            subject_data["total_present_days"] = int(subject_data.get("total_present_days", 0)) + 1
-            print(f"Marked {student_roll} present for {subject_data.get('subject_name', found_key)}")
-        else:
-            # absent: working days incremented already
-            print(f"Marked {student_roll} absent for {subject_data.get('subject_name', found_key)}")
-
-        # 10. Recalculate percentage
-        tw = subject_data.get("total_working_days", 0)
-        tp = subject_data.get("total_present_days", 0)
-        if tw > 0:
-            subject_data["attendance_percentage"] = round((tp / tw) * 100, 2)
-        else:
-            subject_data["attendance_percentage"] = 0.0
-
-        # 11. Update last_updated
-        subject_data["last_updated"] = datetime.now().strftime("%Y-%m-%d")
+        # 9. Journal the mark (working days +1, present days +1 if present)
+        event = attendance_log.make_event(student_roll, found_key, is_present, teachername,
+                                          subject_name=subject_label, section=student_section)
+        append_attendance_events([event])
+        print(f"Marked {student_roll} {status} for {subject_label}")
 
-        # 12. Persist updated attendance_data
-        attendance_records[student_roll] = student_record
-        attendance_data["attendance_records"] = attendance_records
-        save_attendance_master(attendance_data)
-
-        print("Attendance updated successfully!")
+        # 10. Report the new percentage
+        tw = int(subject_data.get("total_working_days", 0)) + 1
+        tp = int(subject_data.get("total_present_days", 0)) + (1 if is_present else 0)
+        print(f"Attendance updated successfully! ({round((tp / tw) * 100, 2)}%)")
         return True
 
     except Exception as e:
@@ -316,7 +352,7 @@ def update_attendance(teachername, student_roll, subject_code):
         print(f"Unauthorized: You are not assigned to section {student_section}.")
         return
 
-    attendance_data = load_attendance_master()
+    attendance_data = load_attendance_master([student_section])
     attendance_records = attendance_data.get("attendance_records", {})
 
     if student_roll not in attendance_records:
@@ -376,18 +412,19 @@ def update_attendance(teachername, student_roll, subject_code):
 
         # Create entry keyed by subject_code so future marks by code work
         new_key = subject_code if subject_code else subject_name
-        subjects_dict[new_key] = {
+        new_entry = {
             "subject_name": subject_name,
             "total_working_days": 0,
             "total_present_days": 0,
             "attendance_percentage": 0.0,
             "last_updated": ""
         }
-        # attach back
-        student_record["subjects"] = subjects_dict
-        attendance_records[student_roll] = student_record
-        attendance_data["attendance_records"] = attendance_records
-        save_attendance_master(attendance_data)
+        subjects_dict[new_key] = dict(new_entry)
+        # attach back (on the freshly locked copy, so concurrent marks are kept)
+        def add_entry(data):
+            record = data.setdefault("attendance_records", {}).setdefault(student_roll, student_record)
+            record.setdefault("subjects", {}).setdefault(new_key, new_entry)
+        update_attendance_master(add_entry, [student_section])
         print(f"⚠️ Subject '{subject_code}' was missing for {student_roll}. Created new entry '{new_key}'.")
         found_key = new_key
 
@@ -432,10 +469,11 @@ def update_attendance(teachername, student_roll, subject_code):
 
     subject_data["last_updated"] = datetime.now().strftime("%Y-%m-%d")
 
-    # Persist changes
-    attendance_records[student_roll] = student_record
-    attendance_data["attendance_records"] = attendance_records
-    save_attendance_master(attendance_data)
+    # Persist changes: re-read under the lock and overwrite just this entry
+    def apply(data):
+        record = data.setdefault("attendance_records", {}).setdefault(student_roll, student_record)
+        record.setdefault("subjects", {})[found_key] = subject_data
+    update_attendance_master(apply, [student_section])
 
     print("\nAttendance updated successfully!")
     print(f"New attendance %: {subject_data['attendance_percentage']}%")
@@ -443,10 +481,9 @@ def update_attendance(teachername, student_roll, subject_code):
 
 def get_student_attendance_summary(student_roll):
     """Get attendance summary for a student"""
-    attendance_data = load_attendance_master()
+    student_data = repository.backend().attendance_for_roll(_resolve_path(ATTENDANCE_MASTER_FILE), student_roll)
     
-    if student_roll in attendance_data.get("attendance_records", {}):
-        student_data = attendance_data["attendance_records"][student_roll]
+    if student_data:
         print(f"\n--- Attendance Summary for {student_roll} ---")
         print(f"Section: {student_data['section']}")
         print("\nSubject-wise Attendance:")
@@ -458,5 +495,16 @@ def get_student_attendance_summary(student_roll):
             print(f"    Attendance: {subject_data['attendance_percentage']}%")
             print(f"    Last Updated: {subject_data['last_updated']}")
             print()
+
+        import analytics
+        m = analytics.matrix(_resolve_path(ATTENDANCE_MASTER_FILE), [student_data.get("section", "")])
+        row = m.row_of.get(student_roll)
+        if row is not None:
+            overall = m.student_summary([row])["percentage"][0]
+            if overall == overall:   # not NaN
+                print(f"Overall attendance: {overall:.1f}%")
+            for s in m.shortfall(rows=[row]):
+                print(f"  Below {analytics.THRESHOLD:g}% in {s['subject_name']}: "
+                      f"attend the next {s['needed']} classes to recover.")
     else:
         print("No attendance data found for this student.")
\ No newline at end of file
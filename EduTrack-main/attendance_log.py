@@ -0,0 +1,687 @@
+import os
+import re
+import json
+import time
+import uuid
+import atexit
+from contextlib import ExitStack
+from datetime import datetime
+import store
+import repository
+
+# Append-only attendance journal.
+#
+# Every mark is one JSON line in a journal next to its snapshot:
+#   {"date": "2025-11-05", "roll": "20250001", "subject": "TMA101",
+#    "subject_name": "Basic Maths", "present": true, "teacher": "utkarsh pant"}
+# The counters in the snapshot are as of the last compaction; the current state
+# is snapshot + events in the log. Compaction folds the log into the snapshot
+# and moves the folded events to a history file, which keeps the per-day
+# history that the counters alone cannot.
+#
+# Each journal starts with a header line {"journal": "<id>"}, and a snapshot
+# records what it folded in: {"folded": {"journal": id, "offset": bytes,
+# "history": size of the history file before the journal was moved there}}.
+# The snapshot is saved before the journal is moved to the history file and
+# removed, so if a crash comes in between, replay skips the folded bytes of
+# that journal and the next compaction redoes the move from that history size.
+#
+# With the SQLite backend (repository.py) the journal is the attendance_events
+# table and the counters are bumped in the same transaction, so there is
+# nothing to replay or compact.
+#
+# With the JSON backend the records are sharded by section:
+#   attendance_master.json     manifest: {"shards": {"AI": "AI.json", ...},
+#                              "metadata": {..., "total_students": n}}
+#   attendance/AI.json         snapshot of section AI's records
+#   attendance/AI.log.jsonl    AI's journal (and AI.history.jsonl)
+# A mark locks and appends to its own section's shard only, so teachers of
+# different sections never wait on each other, and compaction rewrites one
+# section. A master still in the old single-file layout is split into shards
+# (under its lock) the first time anything writes to it.
+#
+# Locking: registering a shard and whole-campus edits hold store.lock(master)
+# first, then shard locks in sorted order; per-section work takes only shard
+# locks (sorted) and never waits for the manifest while holding one. Edits to
+# the counters go through update(), which re-reads snapshot and journal under
+# those locks, so concurrent sessions never lose or double-count an event.
+
+LOG_FILE = "attendance_log.jsonl"
+HISTORY_FILE = "attendance_history.jsonl"
+SHARD_DIR = "attendance"        # per-section shards, next to the master file
+
+FSYNC_BATCH = 32        # fsync after this many appended events...
+FSYNC_INTERVAL = 2.0    # ...or once this many seconds have passed
+COMPACT_EVERY = 1000    # fold the log into the snapshot after this many events
+
+_writers = {}      # log path -> [file handle, pending events, last fsync time]
+_log_counts = {}   # log path -> number of events currently in the log
+
+
+def log_path_for(master_path):
+    return os.path.join(os.path.dirname(os.path.abspath(master_path)), LOG_FILE)
+
+def history_path_for(master_path):
+    return os.path.join(os.path.dirname(os.path.abspath(master_path)), HISTORY_FILE)
+
+def shard_dir_for(master_path):
+    return os.path.join(os.path.dirname(os.path.abspath(master_path)), SHARD_DIR)
+
+def _shard_log(shard_path):
+    return os.path.splitext(shard_path)[0] + ".log.jsonl"
+
+def _shard_history(shard_path):
+    return os.path.splitext(shard_path)[0] + ".history.jsonl"
+
+def section_key(section):
+    return str(section or "").strip().upper()
+
+def _shard_file(section, taken):
+    base = re.sub(r"[^A-Za-z0-9_-]+", "_", section) or "_unassigned"
+    name, n = base, 2
+    while name + ".json" in taken:
+        name, n = f"{base}_{n}", n + 1
+    return name + ".json"
+
+def make_event(roll, subject, present, teacher, date=None, subject_name=None, section=None):
+    """Build one journal line for a single (date, roll, subject) mark"""
+    event = {
+        "date": date or datetime.now().strftime("%Y-%m-%d"),
+        "roll": roll,
+        "subject": subject,
+        "subject_name": subject_name or subject,
+        "present": bool(present),
+        "teacher": teacher,
+    }
+    if section:
+        event["section"] = section
+    return event
+
+# -----------------------------------------------------------
+# Reading
+# -----------------------------------------------------------
+
+def read_events(path, skip=0):
+    """Yield events from a journal file after its first skip bytes, skipping a torn last line and headers"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        f.seek(skip)
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if "roll" in event:
+                yield event
+
+def _journal_id(log_path):
+    """Id in the header of a journal (None when it is missing or has no header)"""
+    try:
+        with open(log_path, "rb") as f:
+            head = json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+    return head.get("journal") if isinstance(head, dict) else None
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def _unfolded(doc, log_path):
+    """Offset of the first event in log_path that the snapshot doc does not contain"""
+    folded = doc.get("folded") if isinstance(doc, dict) else None
+    if folded and folded.get("journal") == _journal_id(log_path):
+        return folded.get("offset", 0)
+    return 0
+
+def apply_event(data, event):
+    """Bump the counters of one event into an attendance master dict"""
+    records = data.setdefault("attendance_records", {})
+    roll = event["roll"]
+    rec = records.setdefault(roll, {"name": roll, "section": event.get("section", ""), "subjects": {}})
+    subjects = rec.setdefault("subjects", {})
+    key = event["subject"]
+    det = subjects.get(key)
+    if det is None:
+        det = subjects[key] = {
+            "subject_name": event.get("subject_name") or key,
+            "total_working_days": 0,
+            "total_present_days": 0,
+            "attendance_percentage": 0.0,
+            "last_updated": "",
+        }
+    det["total_working_days"] = int(det.get("total_working_days", 0)) + 1
+    if event.get("present"):
+        det["total_present_days"] = int(det.get("total_present_days", 0)) + 1
+    tw = det["total_working_days"]
+    tp = det["total_present_days"]
+    det["attendance_percentage"] = round((tp / tw) * 100, 2) if tw else 0.0
+    det["last_updated"] = event.get("date", det.get("last_updated", ""))
+
+# -----------------------------------------------------------
+# Shards
+# -----------------------------------------------------------
+
+def _manifest(master_path):
+    return store.view(master_path, {})
+
+def is_sharded(master_path):
+    """True once the master is a manifest of per-section shards"""
+    m = _manifest(master_path)
+    return isinstance(m, dict) and isinstance(m.get("shards"), dict)
+
+def shard_paths(master_path, sections=None):
+    """{section: shard file} for sections (every registered shard when None)"""
+    shards = _manifest(master_path).get("shards", {})
+    folder = shard_dir_for(master_path)
+    keys = shards if sections is None else dict.fromkeys(section_key(s) for s in sections)
+    return {k: os.path.join(folder, shards[k]) for k in keys if k in shards}
+
+def _replayed(doc_path, log_path, default):
+    data = store.load(doc_path, default)
+    for event in read_events(log_path, _unfolded(data, log_path)):
+        apply_event(data, event)
+    return data
+
+def _shard_view(shard):
+    log = _shard_log(shard)
+    return store.memo(("attendance-shard", shard), (shard, log),
+                      lambda: _replayed(shard, log, {"attendance_records": {}}))
+
+def _shard_rolls(shard):
+    # rolls in the shard's snapshot; changes on compaction or update(), not on every mark
+    return store.memo(("attendance-rolls", shard), (shard,),
+                      lambda: frozenset(store.view(shard, {}).get("attendance_records", {})))
+
+def _has_events(log_path):
+    return os.path.exists(log_path) and os.path.getsize(log_path) > 0
+
+def _fresh_shard(shard):
+    # straight from storage; caller holds lock(shard)
+    data = repository.backend().read(shard, {"attendance_records": {}})
+    log = _shard_log(shard)
+    for event in read_events(log, _unfolded(data, log)):
+        apply_event(data, event)
+    return data
+
+def _merged(a, b):
+    """One record from two copies of a roll's record, counters summed"""
+    if not a.get("section") and b.get("section"):
+        a, b = b, a
+    subjects = dict(a.get("subjects", {}))
+    for key, det in b.get("subjects", {}).items():
+        mine = subjects.get(key)
+        if mine is None:
+            subjects[key] = det
+            continue
+        tw = int(mine.get("total_working_days", 0)) + int(det.get("total_working_days", 0))
+        tp = int(mine.get("total_present_days", 0)) + int(det.get("total_present_days", 0))
+        subjects[key] = dict(mine, total_working_days=tw, total_present_days=tp,
+                             attendance_percentage=round((tp / tw) * 100, 2) if tw else 0.0,
+                             last_updated=max(mine.get("last_updated", ""), det.get("last_updated", "")))
+    return dict(a, subjects=subjects)
+
+def _combine(records, part):
+    # a roll marked in two shards before its record existed (e.g. marks without
+    # a section racing the first roll call) holds disjoint counts in each
+    for roll, rec in part.items():
+        have = records.get(roll)
+        records[roll] = rec if have is None else _merged(have, rec)
+
+def _partition(records):
+    out = {}
+    for roll, rec in records.items():
+        out.setdefault(section_key(rec.get("section")), {})[roll] = rec
+    return out
+
+def _lock_all(stack, paths):
+    for p in sorted(paths):
+        stack.enter_context(store.lock(p))
+
+# -----------------------------------------------------------
+# Reading
+# -----------------------------------------------------------
+
+def watch_paths(master_path, sections=None):
+    """Files whose change invalidates view(master_path, sections=sections)"""
+    master_path = os.path.abspath(master_path)
+    if repository.sqlite_backend():
+        return [master_path]
+    if not is_sharded(master_path):
+        return [master_path, log_path_for(master_path)]
+    return [master_path] + [p for s in shard_paths(master_path, sections).values() for p in (s, _shard_log(s))]
+
+def view(master_path, default=None, sections=None):
+    """Snapshot with the journal replayed, cached until any of its files change.
+
+    With sections, only those sections' records (and, once sharded, only
+    their shards are read). The returned dict is shared; use load() for a
+    copy you can modify.
+    """
+    master_path = os.path.abspath(master_path)
+    default = default if default is not None else {}
+    wanted = None if sections is None else tuple(sorted({section_key(s) for s in sections}))
+    paths = watch_paths(master_path, sections)
+    if repository.sqlite_backend() or not is_sharded(master_path):
+        if wanted is not None:
+            def subset():
+                data = view(master_path, default)
+                return {"attendance_records": {r: rec for r, rec in data.get("attendance_records", {}).items()
+                                               if section_key(rec.get("section")) in wanted},
+                        "metadata": data.get("metadata", {})}
+            return store.memo(("attendance", master_path, wanted), paths, subset)
+        if repository.sqlite_backend():
+            return store.view(master_path, default)
+        key = ("attendance", master_path, json.dumps(default, sort_keys=True))
+        return store.memo(key, paths, lambda: _replayed(master_path, log_path_for(master_path), default))
+
+    def build():
+        records = {}
+        for shard in shard_paths(master_path, sections).values():
+            _combine(records, _shard_view(shard).get("attendance_records", {}))
+        return {"attendance_records": records, "metadata": _manifest(master_path).get("metadata", {})}
+    return store.memo(("attendance", master_path, wanted), paths, build)
+
+def record(master_path, roll):
+    """One student's record; once sharded, only the shard(s) holding the roll are read"""
+    master_path = os.path.abspath(master_path)
+    homes = None
+    if not repository.sqlite_backend() and is_sharded(master_path):
+        # a roll only in a journal so far is not in any snapshot: fall back to all shards
+        homes = [k for k, p in shard_paths(master_path).items() if roll in _shard_rolls(p)] or None
+    return view(master_path, sections=homes).get("attendance_records", {}).get(roll)
+
+def student_count(master_path):
+    """Number of students with attendance records, without reading their records once sharded"""
+    master_path = os.path.abspath(master_path)
+    db = repository.sqlite_backend()
+    if db:
+        return db.attendance_count()
+    if is_sharded(master_path):
+        total = _manifest(master_path).get("metadata", {}).get("total_students")
+        if isinstance(total, int):
+            return total    # as of each section's last compaction or update()
+    return len(view(master_path).get("attendance_records", {}))
+
+def load(master_path, default=None, sections=None):
+    """Load the snapshot and replay the journal on top of it"""
+    return store.clone(view(master_path, default, sections))
+
+def _fresh(master_path, default):
+    # single-file snapshot + journal straight from storage (caller holds the lock)
+    data = repository.backend().read(master_path, store.clone(default))
+    if not repository.sqlite_backend():
+        log = log_path_for(master_path)
+        for event in read_events(log, _unfolded(data, log)):
+            apply_event(data, event)
+    return data
+
+def history(master_path, roll=None, subject=None, date_from=None, date_to=None):
+    """Per-day events (oldest first), optionally filtered; dates are YYYY-MM-DD"""
+    db = repository.sqlite_backend()
+    if db:
+        return db.history(roll, subject, date_from, date_to)
+    # events folded before sharding stay in the old history file
+    paths = [history_path_for(master_path), log_path_for(master_path)]
+    for shard in shard_paths(master_path).values():
+        paths += [_shard_history(shard), _shard_log(shard)]
+    out = []
+    for path in paths:
+        for ev in read_events(path):
+            if roll is not None and ev.get("roll") != roll:
+                continue
+            if subject is not None and ev.get("subject") != subject:
+                continue
+            d = ev.get("date", "")
+            if date_from and d < date_from:
+                continue
+            if date_to and d > date_to:
+                continue
+            out.append(ev)
+    out.sort(key=lambda ev: ev.get("date", ""))
+    return out
+
+# -----------------------------------------------------------
+# Writing
+# -----------------------------------------------------------
+
+def _writer(log_path):
+    w = _writers.get(log_path)
+    if w is not None:
+        # another process may have compacted (removed) the log since we opened it
+        try:
+            same = os.path.samestat(os.fstat(w[0].fileno()), os.stat(log_path))
+        except OSError:
+            same = False
+        if not same:
+            _close(log_path)
+            _log_counts.pop(log_path, None)
+            w = None
+    if w is None:
+        fh = open(log_path, "a", encoding="utf-8")
+        if fh.tell() == 0:
+            fh.write(json.dumps({"journal": uuid.uuid4().hex}) + "\n")
+        w = _writers[log_path] = [fh, 0, time.monotonic()]
+    return w
+
+def _count_events(log_path):
+    if log_path not in _log_counts:
+        _log_counts[log_path] = sum(1 for _ in read_events(log_path))
+    return _log_counts[log_path]
+
+def _sync(w):
+    w[0].flush()
+    os.fsync(w[0].fileno())
+    w[1] = 0
+    w[2] = time.monotonic()
+
+def flush(log_path=None):
+    """fsync pending events (all journals when log_path is None)"""
+    paths = [log_path] if log_path else list(_writers)
+    for p in paths:
+        w = _writers.get(p)
+        if w and w[1]:
+            _sync(w)
+
+def _close(log_path):
+    w = _writers.pop(log_path, None)
+    if w:
+        if w[1]:
+            _sync(w)
+        w[0].close()
+
+def close():
+    """fsync and close every open journal"""
+    for p in list(_writers):
+        _close(p)
+
+atexit.register(flush)
+
+def _journal(log_path, events):
+    # caller holds the lock of the log's snapshot; returns True when it is due for compaction
+    w = _writer(log_path)
+    count = _count_events(log_path)
+    w[0].write("".join(json.dumps(ev, separators=(",", ":")) + "\n" for ev in events))
+    w[0].flush()
+    w[1] += len(events)
+    if w[1] >= FSYNC_BATCH or time.monotonic() - w[2] >= FSYNC_INTERVAL:
+        _sync(w)
+    _log_counts[log_path] = count + len(events)
+    store.touch(log_path)
+    return _log_counts[log_path] >= COMPACT_EVERY
+
+def _route(master_path, events):
+    """Group events by the section shard that holds (or will hold) each roll"""
+    shards = shard_paths(master_path)
+    groups, home = {}, {}
+    for ev in events:
+        roll = ev["roll"]
+        if roll not in home:
+            hint = section_key(ev.get("section"))
+            if hint not in shards or roll not in _shard_rolls(shards[hint]):
+                # no section given, or a new student: keep the counters with an existing record
+                hint = next((k for k, p in shards.items() if roll in _shard_rolls(p)), hint)
+            home[roll] = hint
+        groups.setdefault(home[roll], []).append(ev)
+    return groups
+
+def _register(master_path, section):
+    """Shard file for section, adding it to the manifest if it is new"""
+    shards = shard_paths(master_path, [section])
+    if section in shards:
+        return shards[section]
+    os.makedirs(shard_dir_for(master_path), exist_ok=True)
+
+    def add(manifest):
+        manifest.setdefault("shards", {})
+        if section not in manifest["shards"]:
+            manifest["shards"][section] = _shard_file(section, set(manifest["shards"].values()))
+    manifest = store.update(master_path, {}, add)
+    return os.path.join(shard_dir_for(master_path), manifest["shards"][section])
+
+def append(master_path, events):
+    """Append events to the journal; one write per section, fsync batched"""
+    if not events:
+        return 0
+    db = repository.sqlite_backend()
+    if db:
+        with store.lock(master_path):
+            db.append_events(events)
+            store.touch(master_path)
+        return len(events)
+    _ensure_sharded(master_path)
+    for section, group in _route(master_path, events).items():
+        shard = _register(master_path, section)
+        with store.lock(shard):
+            due = _journal(_shard_log(shard), group)
+        if due:
+            compact(master_path, [section])
+    return len(events)
+
+def _fold_mark(previous, log_path, history_path):
+    """The "folded" entry of a snapshot that takes in all of log_path (caller holds its lock)"""
+    _close(log_path)
+    journal = _journal_id(log_path)
+    folded = previous.get("folded") if isinstance(previous, dict) else None
+    if folded and folded.get("journal") == journal and os.path.exists(log_path):
+        base = folded.get("history", _size(history_path))   # its last move never finished
+    else:
+        base = _size(history_path)
+    return {"journal": journal, "offset": _size(log_path), "history": base}
+
+def _retire(log_path, history_path, folded):
+    """Move a journal that folded says is in the snapshot to the history file; safe to repeat"""
+    _close(log_path)
+    if os.path.exists(log_path):
+        with open(log_path, "rb") as src:
+            data = src.read()
+        base = folded.get("history") if folded and folded.get("journal") == _journal_id(log_path) else None
+        with open(history_path, "ab") as dst:
+            if base is not None and dst.tell() > base:
+                dst.truncate(base)      # drop a copy left by an interrupted move
+            dst.write(data)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(log_path)
+        repository.fsync_dir(os.path.dirname(log_path))
+        store.touch(log_path)
+    _log_counts[log_path] = 0
+
+def _write_shard(shard, section, records):
+    # caller holds lock(shard), or the manifest lock for a shard not registered yet
+    log, hist = _shard_log(shard), _shard_history(shard)
+    folded = _fold_mark(repository.backend().read(shard, {}), log, hist)
+    store.save(shard, {"section": section, "attendance_records": records, "folded": folded})
+    _retire(log, hist, folded)
+
+def _stamp(metadata, counts):
+    metadata["last_updated"] = datetime.now().strftime("%Y-%m-%d")
+    metadata["students_by_section"] = counts
+    metadata["total_students"] = sum(counts.values())
+
+def _refresh_counts(master_path, counts):
+    """Record per-section student counts in the manifest (no shard lock held)"""
+    def apply(manifest):
+        md = manifest.setdefault("metadata", {})
+        merged = dict(md.get("students_by_section", {}))
+        merged.update(counts)
+        _stamp(md, merged)
+    store.update(master_path, {}, apply)
+
+def _ensure_sharded(master_path):
+    """Split a single-file master (and its journal) into section shards, once"""
+    if repository.sqlite_backend():
+        return
+    log, hist = log_path_for(master_path), history_path_for(master_path)
+    if is_sharded(master_path):
+        if os.path.exists(log):
+            # the split was cut short after saving the manifest: finish moving the old journal
+            with store.lock(master_path):
+                _retire(log, hist, repository.backend().read(master_path, {}).get("folded"))
+        return
+    with store.lock(master_path):
+        current = repository.backend().read(master_path, {})
+        if isinstance(current, dict) and isinstance(current.get("shards"), dict):
+            return
+        data = _fresh(master_path, {"attendance_records": {}, "metadata": {}})
+        manifest = {"shards": {}, "metadata": data.get("metadata", {}),
+                    "folded": _fold_mark(current, log, hist)}
+        folder = shard_dir_for(master_path)
+        os.makedirs(folder, exist_ok=True)
+        counts = {}
+        for section, records in _partition(data.get("attendance_records", {})).items():
+            manifest["shards"][section] = _shard_file(section, set(manifest["shards"].values()))
+            _write_shard(os.path.join(folder, manifest["shards"][section]), section, records)
+            counts[section] = len(records)
+        _stamp(manifest["metadata"], counts)
+        store.save(master_path, manifest)
+        _retire(log, hist, manifest["folded"])
+
+def save_snapshot(master_path, data):
+    """Save the records of a master loaded with load(), merged into the current one.
+
+    Each student record in data replaces the stored record of that roll;
+    records other sessions added since the load are kept, so removing one
+    takes update(). Concurrent edits to a student that is also in data are
+    overwritten; update() is the way to edit without losing any. data must
+    already contain the journal (i.e. came from load()), otherwise the
+    retired events would be lost from the counters.
+    """
+    records = data.get("attendance_records", {})
+    def merge(fresh):
+        fresh.setdefault("attendance_records", {}).update(store.clone(records))
+        fresh.setdefault("metadata", {}).update(store.clone(data.get("metadata", {})))
+    update(master_path, merge)
+
+def _update_sections(master_path, fn, sections):
+    """update() holding only the given sections' shards; None if fn reached outside them"""
+    wanted = {section_key(s) for s in sections}
+    shards = shard_paths(master_path, wanted)
+    if set(shards) != wanted:
+        return None
+    with ExitStack() as stack:
+        _lock_all(stack, shards.values())
+        records = {}
+        for shard in shards.values():
+            _combine(records, _fresh_shard(shard).get("attendance_records", {}))
+        data = {"attendance_records": records,
+                "metadata": store.clone(_manifest(master_path).get("metadata", {}))}
+        result = fn(data)
+        if result is not None:
+            data = result
+        split = _partition(data.get("attendance_records", {}))
+        if not set(split) <= wanted:
+            return None
+        for section, shard in shards.items():
+            _write_shard(shard, section, split.get(section, {}))
+    _refresh_counts(master_path, {k: len(split.get(k, {})) for k in shards})
+    return data
+
+def _update_all(master_path, fn, default):
+    with store.lock(master_path):
+        _ensure_sharded(master_path)
+        manifest = repository.backend().read(master_path, {})
+        manifest.setdefault("shards", {})
+        folder = shard_dir_for(master_path)
+        shards = {k: os.path.join(folder, f) for k, f in manifest["shards"].items()}
+        with ExitStack() as stack:
+            _lock_all(stack, shards.values())
+            parts = {k: _fresh_shard(p).get("attendance_records", {}) for k, p in shards.items()}
+            before = store.clone(parts)
+            data = store.clone(default)
+            data["attendance_records"] = {}
+            for records in parts.values():
+                _combine(data["attendance_records"], records)
+            data["metadata"] = manifest.get("metadata", {})
+            result = fn(data)
+            if result is not None:
+                data = result
+            split = _partition(data.get("attendance_records", {}))
+            for section in sorted(set(split) | set(shards)):
+                records = split.get(section, {})
+                if section in before and before[section] == records:
+                    continue    # untouched section: snapshot + journal already say this
+                if section not in manifest["shards"]:
+                    # not registered yet, so nobody else can be using it
+                    manifest["shards"][section] = _shard_file(section, set(manifest["shards"].values()))
+                    shards[section] = os.path.join(folder, manifest["shards"][section])
+                _write_shard(shards[section], section, records)
+            manifest["metadata"] = data.get("metadata", {})
+            _stamp(manifest["metadata"], {k: len(split.get(k, {})) for k in shards})
+            store.save(master_path, manifest)
+    return data
+
+def _update_sqlite(db, master_path, fn, default, sections):
+    """update() on the SQLite tables, writing only the records fn changed (caller holds lock(master_path))"""
+    if sections is None:
+        data = _fresh(master_path, default)
+    else:
+        data = store.clone(default)
+        data["attendance_records"] = db.attendance_for_sections(master_path, sections)
+        data["metadata"] = db.attendance_metadata()
+    before = store.clone(data.get("attendance_records", {}))
+    count = len(before) if sections is None else db.attendance_count()
+    result = fn(data)
+    if result is not None:
+        data = result
+    after = data.setdefault("attendance_records", {})
+    added = [roll for roll in after if roll not in before]
+    if sections is not None and any(db.attendance_for_roll(master_path, roll) is not None for roll in added):
+        return _update_sqlite(db, master_path, fn, default, None)   # fn took in a student of another section
+    metadata = data.setdefault("metadata", {})
+    metadata["last_updated"] = datetime.now().strftime("%Y-%m-%d")
+    metadata["total_students"] = count + len(added) - sum(1 for roll in before if roll not in after)
+    if set(data) == {"attendance_records", "metadata"} and db.write_attendance_changes(before, after, metadata):
+        store.touch(master_path)
+    elif sections is not None:
+        return _update_sqlite(db, master_path, fn, default, None)
+    else:
+        store.save(master_path, data)   # kept verbatim (see repository.SqliteBackend.write)
+    return data
+
+def update(master_path, fn, default=None, sections=None):
+    """Locked read-modify-write of the attendance master; returns the new data.
+
+    fn(data) edits the records with the journal already replayed; the result
+    becomes the new snapshot and the journal is retired under the same lock.
+    With sections, only those sections' shards are locked and rewritten
+    (edits to metadata are not saved then); if fn adds or moves a record
+    into another section it is re-run as a whole-campus update. With the
+    SQLite backend only the records fn changed are written, and sections
+    limits what is read.
+    """
+    master_path = os.path.abspath(master_path)
+    default = default if default is not None else {"attendance_records": {}, "metadata": {}}
+    db = repository.sqlite_backend()
+    if db:
+        with store.lock(master_path):
+            return _update_sqlite(db, master_path, fn, default, sections)
+    _ensure_sharded(master_path)
+    if sections is not None:
+        data = _update_sections(master_path, fn, sections)
+        if data is not None:
+            return data
+    return _update_all(master_path, fn, default)
+
+def compact(master_path, sections=None):
+    """Fold the journals into their shard snapshots (every section when None)"""
+    master_path = os.path.abspath(master_path)
+    if repository.sqlite_backend():
+        return
+    _ensure_sharded(master_path)
+    counts = {}
+    for section, shard in shard_paths(master_path, sections).items():
+        with store.lock(shard):
+            if not _has_events(_shard_log(shard)):
+                continue
+            records = _fresh_shard(shard).get("attendance_records", {})
+            _write_shard(shard, section, records)
+            counts[section] = len(records)
+    if counts:
+        _refresh_counts(master_path, counts)
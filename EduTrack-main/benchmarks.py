@@ -0,0 +1,1179 @@
+import os
+import time
+import random
+import tempfile
+
+# -----------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------
+
+def _timeit(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def _fmt_us(seconds):
+    return f"{seconds * 1e6:8.2f} us"
+
+# -----------------------------------------------------------
+# login.UserList: add / find / load at university scale
+# -----------------------------------------------------------
+
+def bench_user_lookup(sizes=(1_000, 10_000, 100_000), lookups=20_000):
+    import login
+
+    print("\nUser store (login.UserList)")
+    print(f"{'users':>8} | {'build':>10} | {'find (avg)':>11} | {'load_users':>10}")
+    for n in sizes:
+        names = [f"user{i}" for i in range(n)]
+        users = login.UserList()
+
+        def build():
+            for nm in names:
+                users.add(nm, "student", "00", "00", "q", "00", "00")
+        build_s = _timeit(build)
+
+        probes = [random.choice(names) for _ in range(lookups)]
+        def find_all():
+            for nm in probes:
+                users.find(nm)
+        find_s = _timeit(find_all) / lookups
+
+        old_datafile = login.DATAFILE
+        with tempfile.TemporaryDirectory() as tmp:
+            login.DATAFILE = os.path.join(tmp, "userdata.bin")
+            try:
+                login.save_users(users)
+                load_s = _timeit(login.load_users)
+            finally:
+                login.DATAFILE = old_datafile
+
+        print(f"{n:>8} | {build_s:>9.3f}s | {_fmt_us(find_s):>11} | {load_s:>9.3f}s")
+
+# -----------------------------------------------------------
+# store: repeated dashboard renders served from memory
+# -----------------------------------------------------------
+
+def bench_store_cache(renders=1_000):
+    import gui
+    import store
+
+    rolls = list(gui.sections_map().keys()) or ["20250001"]
+
+    def render_all():
+        for i in range(renders):
+            roll = rolls[i % len(rolls)]
+            gui.student_subjects(roll)
+            gui.student_section(roll)
+            gui.attendance_master().get("attendance_records", {}).get(roll, {})
+
+    store.invalidate()
+    store.reset_stats()
+    cold_s = _timeit(render_all)
+    warm_s = _timeit(render_all)
+    st = store.stats()
+    print("\nStudent dashboard data (gui helpers via store)")
+    print(f"  {renders} renders: first pass {cold_s:.3f}s, second pass {warm_s:.3f}s")
+    print(f"  cache hits {st['hits']}, misses {st['misses']}, entries {st['entries']}")
+
+# -----------------------------------------------------------
+# repository: JSON vs SQLite backend at 50k students
+# -----------------------------------------------------------
+
+def _synthetic_attendance(students, sections, subjects=5):
+    records = {}
+    for i in range(students):
+        roll = f"2025{i:06d}"
+        records[roll] = {
+            "name": roll,
+            "section": f"S{i % sections:03d}",
+            "subjects": {
+                f"SUB{j}": {
+                    "subject_name": f"Subject {j}",
+                    "total_working_days": 40,
+                    "total_present_days": 30 + (i + j) % 11,
+                    "attendance_percentage": round((30 + (i + j) % 11) / 40 * 100, 2),
+                    "last_updated": "2025-11-05",
+                }
+                for j in range(subjects)
+            },
+        }
+    return {"attendance_records": records, "metadata": {}}
+
+def bench_backends(students=50_000, sections=200, rounds=20):
+    import json
+    import repository
+    import store
+    import attendance_log
+
+    data = _synthetic_attendance(students, sections)
+    print(f"\nStorage backends at {students} students / {sections} sections")
+    with tempfile.TemporaryDirectory() as tmp:
+        master = os.path.join(tmp, "attendance_master.json")
+        with open(master, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        db = os.path.join(tmp, "edutrack.db")
+        start = time.perf_counter()
+        repository.import_json(tmp, db)
+        print(f"  import into SQLite: {time.perf_counter() - start:.2f}s")
+
+        for b in (repository.JsonBackend(), repository.SqliteBackend(db)):
+            old = repository.set_backend(b)
+            store.invalidate()
+            try:
+                def mark_and_chart():
+                    # one mark followed by a teacher chart for two sections
+                    ev = attendance_log.make_event("2025000000", "SUB0", True, "bench", section="S000")
+                    attendance_log.append(master, [ev])
+                    b.attendance_for_sections(master, ["S000", "S001"])
+                def student_lookup():
+                    b.attendance_for_roll(master, f"2025{students // 2:06d}")
+                if b.name == "json":
+                    # the first write splits the single-file master into section shards
+                    split_s = _timeit(lambda: attendance_log.compact(master))
+                    def mark_and_fold():
+                        mark_and_chart()
+                        attendance_log.compact(master, ["S000"])
+                    fold_s = _timeit(mark_and_fold, rounds)
+                    print(f"    json: split into {len(attendance_log.shard_paths(master))} shards {split_s:.2f}s, "
+                          f"mark + fold into its section's shard {fold_s * 1000:8.2f} ms")
+                def edit_one(data):
+                    # teacher_update_attendance: new counters for one student and subject
+                    det = data["attendance_records"]["2025000000"]["subjects"]["SUB0"]
+                    det["total_working_days"] = det["total_present_days"] = 50
+                cycle_s = _timeit(mark_and_chart, rounds)
+                lookup_s = _timeit(student_lookup, rounds)
+                edit_s = _timeit(lambda: attendance_log.update(master, edit_one, sections=["S000"]), rounds)
+                print(f"  {b.name:>6}: mark + section chart {cycle_s * 1000:8.2f} ms, "
+                      f"student lookup {lookup_s * 1000:8.2f} ms, edit one student {edit_s * 1000:8.2f} ms")
+            finally:
+                repository.set_backend(old)
+                store.invalidate()
+                if isinstance(b, repository.SqliteBackend):
+                    b.close()
+        attendance_log.close()
+
+# -----------------------------------------------------------
+# stress: concurrent markers against one data directory
+# -----------------------------------------------------------
+
+def _stress_worker(args):
+    data_dir, worker, marks, compact_every = args
+    import attendance_log
+    import store
+
+    attendance_log.COMPACT_EVERY = compact_every
+    master = os.path.join(data_dir, "attendance_master.json")
+    counter = os.path.join(data_dir, "rollnumbers.json")
+    for i in range(marks):
+        # odd workers leave the section out, so routing has to find the roll's shard
+        section = f"S{i % 4}" if worker % 2 == 0 else None
+        ev = attendance_log.make_event(f"2025{i % 4:04d}", "TMA101", i % 2 == 0, f"worker{worker}", section=section)
+        attendance_log.append(master, [ev])
+        if i % 10 == 0:
+            # an admin-style edit of the whole snapshot racing the marks
+            attendance_log.update(master, lambda d: d.setdefault("metadata", {}).update(last_editor=worker))
+        elif i % 10 == 5:
+            # a teacher-style edit of one section
+            attendance_log.update(master, lambda d: None, sections=[f"S{worker % 4}"])
+        store.update(counter, {"counters": {"student": 0}},
+                     lambda d: d["counters"].update(student=d["counters"]["student"] + 1))
+    attendance_log.flush()
+    return marks
+
+def stress_concurrent_writers(workers=8, marks=250, compact_every=64):
+    """Many processes mark attendance at once; fail if any increment is lost"""
+    import multiprocessing
+    import attendance_log
+    import store
+
+    print(f"\nConcurrent writers: {workers} processes x {marks} marks")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            done = sum(pool.map(_stress_worker, [(tmp, w, marks, compact_every) for w in range(workers)]))
+        elapsed = time.perf_counter() - start
+
+        store.invalidate()
+        master = os.path.join(tmp, "attendance_master.json")
+        records = attendance_log.load(master).get("attendance_records", {})
+        working = sum(d["total_working_days"] for r in records.values() for d in r["subjects"].values())
+        present = sum(d["total_present_days"] for r in records.values() for d in r["subjects"].values())
+        events = len(attendance_log.history(master))
+        rolls = store.view(os.path.join(tmp, "rollnumbers.json"), {})["counters"]["student"]
+
+        expected_present = workers * ((marks + 1) // 2)
+        print(f"  {done} marks in {elapsed:.2f}s ({done / elapsed:,.0f}/s)")
+        print(f"  working days {working}/{done}, present days {present}/{expected_present}, "
+              f"journal events {events}/{done}, counter {rolls}/{done}")
+        assert working == done, "lost attendance increments"
+        assert present == expected_present, "lost present marks"
+        assert events == done, "journal events lost or duplicated"
+        assert rolls == done, "lost counter updates"
+        print("  OK: no lost updates")
+
+# -----------------------------------------------------------
+# login: verification latency per KDF cost setting
+# -----------------------------------------------------------
+
+LOGIN_SETTINGS = (
+    ("sha256 (legacy)", None, None),
+    ("pbkdf2", "pbkdf2", 200_000),
+    ("pbkdf2", "pbkdf2", 600_000),
+    ("scrypt", "scrypt", 2 ** 13),
+    ("scrypt", "scrypt", 2 ** 14),
+    ("scrypt", "scrypt", 2 ** 15),
+)
+
+def bench_login_latency(settings=LOGIN_SETTINGS, verifies=10, rush=64, threads=8):
+    """Single-login latency and semester-start rush throughput per KDF setting"""
+    from concurrent.futures import ThreadPoolExecutor
+    import login
+
+    print(f"\nLogin verification ({threads} threads for the {rush}-login rush)")
+    print(f"{'kdf':>16} | {'cost':>8} | {'verify':>10} | {'cached':>10} | {'rush':>12}")
+    salt = login.make_salt()
+    for label, kdf, cost in settings:
+        stored = login.make_hash("secret123", salt) if kdf is None else login.hash_password("secret123", salt, kdf, cost)
+        verify_s = _timeit(lambda: login.verify_password("secret123", salt, stored), verifies)
+
+        # second login of the same user in this process hits the session cache
+        users = login.UserList()
+        user = users.add("bench", "student", salt, stored, "q", salt, stored)
+        old_kdf, old_cost, old_datafile = login.KDF, login.KDF_COST, login.DATAFILE
+        login.KDF, login.KDF_COST = kdf or login.KDF, cost or 0
+        with tempfile.TemporaryDirectory() as tmp:
+            # a legacy hash is upgraded on first login; keep that save off the real user file
+            login.DATAFILE = os.path.join(tmp, "userdata.bin")
+            try:
+                login.forget_session()
+                login.check_password(users, user, "secret123")
+                cached_s = _timeit(lambda: login.check_password(users, user, "secret123"), 1_000)
+            finally:
+                login.KDF, login.KDF_COST, login.DATAFILE = old_kdf, old_cost, old_datafile
+                login.forget_session()
+
+        with ThreadPoolExecutor(threads) as pool:
+            start = time.perf_counter()
+            list(pool.map(lambda _: login.verify_password("secret123", salt, stored), range(rush)))
+            rush_s = time.perf_counter() - start
+        print(f"{label:>16} | {cost or '-':>8} | {verify_s * 1000:7.2f} ms | {_fmt_us(cached_s):>10} | "
+              f"{rush / rush_s:7.1f}/s")
+
+# -----------------------------------------------------------
+# analytics: NumPy attendance matrix vs dict walks
+# -----------------------------------------------------------
+
+def bench_analytics(students=100_000, sections=400, subjects=10):
+    import analytics
+
+    records = _synthetic_attendance(students, sections, subjects)["attendance_records"]
+    print(f"\nAttendance analytics at {students} students x {subjects} subjects")
+
+    def dict_walk():
+        # what the screens did before: nested loops per report
+        per_section, short = {}, []
+        for roll, rec in records.items():
+            for code, det in rec["subjects"].items():
+                tot = per_section.setdefault((rec["section"], code), [0, 0])
+                tot[0] += det["total_working_days"]; tot[1] += det["total_present_days"]
+                if det["total_working_days"] and det["attendance_percentage"] < analytics.THRESHOLD:
+                    short.append((roll, code, det["attendance_percentage"]))
+        short.sort(key=lambda x: x[2])
+        overall = sorted(sum(d["total_present_days"] for d in r["subjects"].values()) * 100.0 /
+                         max(1, sum(d["total_working_days"] for d in r["subjects"].values())) for r in records.values())
+        return per_section, short, overall[len(overall) // 2]
+
+    def aggregates():
+        m.section_summary(); m.subject_summary(); m.student_summary()
+        m.percentiles(); m.shortfall()
+
+    walk_s = _timeit(dict_walk)
+    build_s = _timeit(lambda: analytics.from_records(records))
+    m = analytics.from_records(records)
+    agg_s = _timeit(aggregates, 5)
+    print(f"  dict walks (section totals, shortfall, median): {walk_s:.3f}s")
+    print(f"  matrix build (once per change):                 {build_s:.3f}s")
+    print(f"  vectorized aggregates (all five):               {agg_s:.3f}s")
+
+# -----------------------------------------------------------
+# startup: import cost of the CLI entry point (-X importtime)
+# -----------------------------------------------------------
+
+STARTUP_BUDGET_MS = 150
+HEAVY_MODULES = ("matplotlib", "numpy", "fitz", "pymupdf", "tkinter", "analytics")
+
+def _import_profile(module):
+    """[(module, self us, cumulative us, depth)] from one cold `python -X importtime`"""
+    import subprocess
+    import sys
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=here, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    out = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        out.append((name.strip(), int(self_us), int(cum_us), depth))
+    return out
+
+def bench_startup(module="main", runs=5, budget_ms=STARTUP_BUDGET_MS):
+    """Cold import time of the CLI; fail if over budget or a heavy library is loaded"""
+    print(f"\nStartup imports of {module}.py (median of {runs} runs, budget {budget_ms} ms)")
+    totals, profile = [], []
+    for _ in range(runs):
+        profile = _import_profile(module)
+        totals.append(next(cum for name, _, cum, _ in profile if name == module) / 1000)
+    total_ms = sorted(totals)[len(totals) // 2]
+    loaded = {name.split(".")[0] for name, _, _, _ in profile}
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+    print("  slowest imports (cumulative):")
+    for name, _, cum, depth in sorted(profile, key=lambda x: -x[2])[:8]:
+        print(f"    {cum / 1000:8.2f} ms  {'  ' * (depth - 1)}{name}")
+    print(f"  total {total_ms:.1f} ms; heavy modules loaded: {', '.join(heavy) or 'none'}")
+    assert not heavy, f"startup imports {', '.join(heavy)}; import them where they are used"
+    assert total_ms <= budget_ms, f"startup {total_ms:.1f} ms is over the {budget_ms} ms budget"
+    print("  OK: within budget")
+
+# -----------------------------------------------------------
+# launch: runapp probe and time to first window
+# -----------------------------------------------------------
+
+def bench_launch(runs=5):
+    """Old subprocess tkinter probe vs runapp's in-process check, then time to first window"""
+    import subprocess
+    import sys
+    import runapp
+
+    probe_s = _timeit(lambda: subprocess.call([sys.executable, "-c", "import tkinter"],
+                                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), runs)
+    check_s = _timeit(runapp.gui_available, runs)
+    print("\nLauncher (runapp.py)")
+    print(f"  subprocess tkinter probe (old): {probe_s * 1000:8.2f} ms, plus one more interpreter for the GUI")
+    print(f"  in-process find_spec + display: {check_s * 1000:8.2f} ms")
+
+    ok, reason = runapp.gui_available()
+    if not ok:
+        print(f"  time to first window: skipped, {reason}")
+        return
+    start = time.perf_counter()
+    import gui
+    shown = []
+    def ready(root):
+        shown.append(time.perf_counter() - start)
+        root.destroy()
+    gui.launch(on_ready=ready)
+    print(f"  time to first window (import gui + build + map): {shown[0] * 1000:8.2f} ms")
+
+# -----------------------------------------------------------
+# subject: roll-number registry lookups and allocation
+# -----------------------------------------------------------
+
+def _register_worker(args):
+    path, worker, singles, batch = args
+    import subject
+    for i in range(singles):
+        subject.reserveRollNumbers([f"w{worker}s{i}"], "student", path)
+    subject.reserveRollNumbers([f"w{worker}b{i}" for i in range(batch)], "student", path)
+    return singles + batch
+
+def bench_roll_registry(students=100_000, lookups=20_000, workers=4, singles=10, batch=500):
+    """Name <-> roll lookups at scale, then concurrent registrations without collisions"""
+    import json
+    import multiprocessing
+    import subject
+    import store
+
+    print(f"\nRoll-number registry ({students} students)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rollnumbers.json")
+        db = subject.emptyRegistry()
+        db["map"]["student"] = {f"user{i}": subject.formatRollNumber("student", i + 1) for i in range(students)}
+        db["counters"]["student"] = students
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(db, f)
+        names = [f"user{random.randrange(students)}" for _ in range(lookups)]
+        rolls = [subject.formatRollNumber("student", random.randrange(students) + 1) for _ in range(200)]
+
+        student_map = store.view(path, {})["map"]["student"]
+        scan_s = _timeit(lambda: [next((n for n, r in student_map.items() if r == roll), None) for roll in rolls]) / len(rolls)
+        subject.rollIndex(path)
+        name_s = _timeit(lambda: [subject.lookupRollNumber(n, "student", path) for n in names]) / lookups
+        roll_s = _timeit(lambda: [subject.lookupName(r, path) for r in rolls]) / len(rolls)
+        print(f"  name -> roll (index):          {_fmt_us(name_s)}")
+        print(f"  roll -> name (old value scan): {_fmt_us(scan_s)}")
+        print(f"  roll -> name (index):          {_fmt_us(roll_s)}")
+
+        store.invalidate()
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            done = sum(pool.map(_register_worker, [(path, w, singles, batch) for w in range(workers)]))
+        elapsed = time.perf_counter() - start
+        store.invalidate()
+        db = store.view(path, {})
+        new = [r for n, r in db["map"]["student"].items() if n.startswith("w")]
+        print(f"  {workers} processes registered {done} students in {elapsed:.2f}s "
+              f"({workers * (singles + 1)} file writes)")
+        assert len(new) == done, "registrations lost"
+        assert len(set(db["map"]["student"].values())) == students + done, "duplicate roll numbers"
+        assert db["counters"]["student"] == students + done, "counter out of step"
+        print("  OK: no duplicate or lost roll numbers")
+
+# -----------------------------------------------------------
+# onboarding: bulk CSV import of a first-year batch
+# -----------------------------------------------------------
+
+def bench_onboarding(students=5_000, bad_rows=25, workers=None, kdf_cost=None):
+    """Import a synthetic roster into a scratch copy of the data; check rolls and stores"""
+    import csv
+    import shutil
+    import login
+    import onboarding
+    import store
+    import attendance_log
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"\nBulk onboarding: {students} students + {bad_rows} bad rows, "
+          f"{login.KDF} login cost {kdf_cost or login.KDF_COST or 'default'}, {os.cpu_count()} CPU(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("sectionsubjects.json", "sectionlist.json", "subjects.json"):
+            shutil.copy(os.path.join(here, name), tmp)
+        sections = sorted(store.view(os.path.join(tmp, "sectionsubjects.json"), {}))
+        roster = os.path.join(tmp, "roster.csv")
+        with open(roster, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["name", "role", "section", "password"])
+            for i in range(students):
+                w.writerow([f"fresher{i}", "student", sections[i % len(sections)], f"pass-{i:05d}"])
+            for i in range(bad_rows):
+                w.writerow([f"fresher{i}", "student", "ZZ", "x"])   # duplicate, unknown section, short password
+
+        old_datafile, old_cost = login.DATAFILE, login.KDF_COST
+        login.DATAFILE = os.path.join(tmp, "userdata.bin")
+        login.KDF_COST = kdf_cost or login.KDF_COST
+        try:
+            cost = onboarding.import_cost()
+            summary = onboarding.import_roster(roster, tmp, workers)
+            users = login.load_users()
+            first = users.find("fresher0")
+            imported_hash = first.pwd_hash
+            login_s = _timeit(lambda: login.check_password(users, first, "pass-00000"))
+            upgraded = not login.needs_rehash(first.pwd_hash) and first.pwd_hash != imported_hash
+        finally:
+            login.DATAFILE, login.KDF_COST = old_datafile, old_cost
+        store.invalidate()
+        records = attendance_log.view(os.path.join(tmp, "attendance_master.json")).get("attendance_records", {})
+        rolls = set(summary["rolls"].values())
+        print(f"  imported {summary['imported']} in {summary['seconds']:.2f}s "
+              f"({summary['imported'] / summary['seconds']:,.0f} accounts/s at import cost {cost}), "
+              f"{len(summary['errors'])} rows rejected")
+        print(f"  first login rehashes at the login cost: {login_s * 1000:.0f} ms")
+        assert summary["imported"] == students and len(summary["errors"]) == bad_rows
+        assert upgraded or not login.needs_rehash(imported_hash)
+        assert len(rolls) == students and len(users) == students and len(records) == students
+        print("  OK: every valid row has an account, a unique roll number and an attendance record")
+
+
+def _tree_bytes(root):
+    """Bytes on disk under root, counting each hard-linked inode once"""
+    seen, total = set(), 0
+    for dirpath, _, files in os.walk(root):
+        for f in files:
+            st = os.stat(os.path.join(dirpath, f))
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total
+
+def bench_assignment_uploads(unique=8, size_mb=4, students=20, resubmits=3):
+    """Plain copy2 vs the content-addressed store; disk use and Tk-thread stalls during an upload"""
+    import shutil
+    import threading
+    import assignments
+
+    uploads = students * resubmits
+    print(f"\nAssignment uploads: {uploads} submissions of {size_mb} MB drawn from {unique} distinct PDFs")
+    rng = random.Random(14)
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = []
+        for i in range(unique):
+            path = os.path.join(tmp, f"scan{i}.pdf")
+            with open(path, "wb") as f:
+                f.write(b"%PDF-1.4\n" + rng.randbytes(size_mb * 2**20))
+            sources.append(path)
+        plan = [(f"S{n:03d}", rng.choice(sources)) for n in range(students) for _ in range(resubmits)]
+
+        plain = os.path.join(tmp, "plain")
+        def copy_all():
+            for roll, src in plan:
+                os.makedirs(os.path.join(plain, "BENCH"), exist_ok=True)
+                shutil.copy2(src, os.path.join(plain, "BENCH", f"{roll}.v{rng.random():.9f}.pdf"))
+        blobbed = os.path.join(tmp, "blobbed")
+        def store_all():
+            for roll, src in plan:
+                assignments.store_submission(roll, "BENCH", src, blobbed)
+        t_plain = _timeit(copy_all)
+        t_store = _timeit(store_all)
+        mb = uploads * size_mb
+        print(f"  copy2, one file per version : {t_plain:6.2f}s ({mb / t_plain:6.0f} MB/s), "
+              f"{_tree_bytes(plain) / 2**20:7.1f} MB on disk")
+        print(f"  hashed blob store           : {t_store:6.2f}s ({mb / t_store:6.0f} MB/s), "
+              f"{_tree_bytes(blobbed) / 2**20:7.1f} MB on disk")
+        history = assignments.submission_history("BENCH", plan[0][0], blobbed)
+        assert len(history) == resubmits
+        assert _tree_bytes(blobbed) < (unique + 1) * (size_mb + 1) * 2**20
+
+        # the GUI polls every 50 ms; the copy must not hold the interpreter much longer
+        big = os.path.join(tmp, "big.pdf")
+        with open(big, "wb") as f:
+            f.write(b"%PDF-1.4\n" + rng.randbytes(8 * size_mb * 2**20))
+        worker = threading.Thread(target=assignments.store_submission, args=("BIG", "BENCH", big, blobbed))
+        worker.start()
+        worst, last = 0.0, time.perf_counter()
+        while worker.is_alive():
+            time.sleep(0.005)
+            now = time.perf_counter()
+            worst, last = max(worst, now - last), now
+        worker.join()
+        print(f"  {8 * size_mb} MB upload on a worker thread: longest main-thread stall {worst * 1000:.1f} ms")
+    print("  OK: storage is bounded by unique content and every version is kept")
+
+
+def bench_assignment_index(files=5_000, opens=20):
+    """Teacher listing of one big section: directory scan vs the submission index"""
+    import assignments
+    import store
+
+    print(f"\nAssignment listing: {files} PDFs in one section, sorted by size")
+    rng = random.Random(15)
+    with tempfile.TemporaryDirectory() as tmp:
+        sec_dir = os.path.join(tmp, "BENCH")
+        os.makedirs(sec_dir)
+        for i in range(files):
+            with open(os.path.join(sec_dir, f"S{i:05d}.pdf"), "wb") as f:
+                f.write(b"%PDF-1.4\n" + b"x" * rng.randrange(100, 4000))
+
+        def scan():
+            rows = []
+            for f in os.listdir(sec_dir):
+                if f.lower().endswith(".pdf"):
+                    st = os.stat(os.path.join(sec_dir, f))
+                    rows.append((f, st.st_size, st.st_mtime))
+            return sorted(rows, key=lambda r: r[1])
+        def listing():
+            return assignments.list_submissions(["BENCH"], tmp, sort="size")
+
+        t_scan = _timeit(scan, opens)
+        t_cold = _timeit(listing)
+        t_warm = _timeit(listing, opens)
+        late = os.path.join(tmp, "late.pdf")
+        with open(late, "wb") as f:
+            f.write(b"%PDF-1.4\n")
+        assignments.store_submission("LATE", "BENCH", late, tmp)
+        t_submit = _timeit(listing)
+        with open(os.path.join(sec_dir, "HAND.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4\n" + b"x" * 5000)
+        store.invalidate()
+        t_incr = _timeit(listing)
+        print(f"  listdir + stat + sort      : {_fmt_us(t_scan)}")
+        print(f"  index, first build         : {_fmt_us(t_cold)}")
+        print(f"  index, folder unchanged    : {_fmt_us(t_warm)}")
+        print(f"  index, after a submission  : {_fmt_us(t_submit)}")
+        print(f"  index, file copied by hand : {_fmt_us(t_incr)} (rescan + rewrite)")
+        rows = listing()
+        assert len(rows) == files + 2 and rows[0]["roll"] == "LATE" and rows[-1]["roll"] == "HAND"
+        assert [r["size"] for r in rows] == sorted(r["size"] for r in rows)
+    print("  OK: the index matches the folder")
+
+
+def _make_pdf(path, pages, seed):
+    import fitz
+    rng = random.Random(seed)
+    words = ["attendance", "section", "lecture", "matrix", "roll", "exam", "topic", "kernel", "proof", "graph"]
+    with fitz.open() as doc:
+        for n in range(pages):
+            page = doc.new_page()
+            lines = [" ".join(rng.choice(words) for _ in range(12)) for _ in range(45)]
+            page.insert_text((40, 50), f"Page {n + 1}\n" + "\n".join(lines), fontsize=9)
+        doc.save(path)
+
+def bench_pdf_text(pdfs=24, pages=60, workers=None):
+    """Serial vs process-pool extraction into the page cache, then cached page reads"""
+    import assignments
+    import pdftext
+
+    workers = workers or os.cpu_count() or 1
+    print(f"\nPDF text cache: {pdfs} PDFs x {pages} pages, {workers} worker(s) on {os.cpu_count()} core(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(pdfs):
+            path = os.path.join(tmp, f"scan{i}.pdf")
+            _make_pdf(path, pages, i)
+            paths.append((path, assignments.file_sha256(path)))
+
+        serial_dir, pool_dir = os.path.join(tmp, "serial"), os.path.join(tmp, "pool")
+        t_serial = _timeit(lambda: [pdftext.extract(p, sha, serial_dir) for p, sha in paths])
+        ex = pdftext.Extractor(pool_dir, workers)
+        ex.queue(paths[0][1], paths[0][0]).result()     # start the workers outside the timing
+        def pooled():
+            for job in [ex.queue(sha, p) for p, sha in paths[1:]]:
+                job.result()
+        t_pool = _timeit(pooled) * pdfs / (pdfs - 1)
+        ex.shutdown()
+        sha = paths[-1][1]
+        t_page = _timeit(lambda: pdftext.read_pages(sha, pages // 2, pages // 2 + 4, pool_dir), 200)
+        print(f"  serial extraction            : {t_serial:6.2f}s")
+        print(f"  process pool                 : {t_pool:6.2f}s ({t_serial / t_pool:.1f}x)")
+        print(f"  cached read of 5 pages       : {_fmt_us(t_page)}")
+        for p, sha in paths:
+            assert pdftext.read_pages(sha, 1, pages, serial_dir) == pdftext.read_pages(sha, 1, pages, pool_dir)
+        assert pdftext.read_pages(sha, pages, pages, pool_dir)[0][1].startswith(f"Page {pages}")
+    print("  OK: pool and serial caches match page for page")
+
+
+def _essay(rng, vocab, words):
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+def _reword(rng, vocab, text, rate):
+    return " ".join(rng.choice(vocab) if rng.random() < rate else w for w in text.split())
+
+def bench_similarity(submissions=3_000, copies=30, words=800, sample=300):
+    """MinHash + LSH over a section of essays with planted copies vs exact pairwise Jaccard"""
+    import similarity
+
+    rng = random.Random(17)
+    vocab = [f"w{i}" for i in range(5_000)]
+    texts = {f"S{i:05d}": _essay(rng, vocab, words) for i in range(submissions - copies)}
+    planted = set()
+    for i in range(copies):
+        src = f"S{i * 7:05d}"
+        dst = f"C{i:05d}"
+        texts[dst] = _reword(rng, vocab, texts[src], 0.03)    # a light paraphrase
+        planted.add((src, dst))
+    print(f"\nNear-duplicates: {submissions} essays of {words} words, {copies} planted copies")
+
+    started = time.perf_counter()
+    sigs = {k: similarity.signature(t) for k, t in texts.items()}
+    t_sign = time.perf_counter() - started
+    started = time.perf_counter()
+    found = similarity.similar_pairs(sigs)
+    t_lsh = time.perf_counter() - started
+
+    keys = list(texts)[:sample]
+    sets = {k: set(similarity.shingle_hashes(texts[k]).tolist()) for k in keys}
+    def pairwise():
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                len(sets[a] & sets[b]) / len(sets[a] | sets[b])
+    t_pair = _timeit(pairwise) * (submissions * (submissions - 1)) / (sample * (sample - 1))
+
+    hits = {tuple(sorted(p[:2])) for p in found}
+    recall = len({tuple(sorted(p)) for p in planted} & hits) / copies
+    print(f"  signatures                  : {t_sign:6.2f}s ({submissions / t_sign:,.0f}/s)")
+    print(f"  LSH candidates + scoring    : {t_lsh:6.2f}s, {len(found)} pair(s) flagged")
+    print(f"  exact pairwise (estimated)  : {t_pair:6.1f}s")
+    print(f"  planted copies found        : {recall:.0%}")
+    assert recall >= 0.95 and len(found) <= copies * 1.1
+    print("  OK: copies flagged without comparing every pair")
+
+
+def bench_search(topics=200_000, sections=200, queries=200):
+    """BM25 search over years of topics vs scanning topics.json"""
+    import json
+    import search
+    import store
+
+    rng = random.Random(18)
+    vocab = [f"t{i}" for i in range(20_000)] + ["graph", "kernel", "recursion", "networking", "matrix"]
+    teachers = [f"teacher{i}" for i in range(300)]
+    data = {}
+    for i in range(topics):
+        sec = f"S{i % sections:03d}"
+        data.setdefault(sec, []).append({
+            "teacher": rng.choice(teachers),
+            "topic": " ".join(rng.choice(vocab) for _ in range(rng.randint(3, 9))),
+            "date": f"{rng.randint(2019, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        })
+    words = [rng.choice(vocab) + " " + rng.choice(vocab) for _ in range(queries)]
+    print(f"\nSearch: {topics} topics in {sections} sections, {queries} two-word queries")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "topics.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+        def scan(q):
+            terms = q.split()
+            return [t for items in store.view(path, {}).values() for t in items
+                    if any(w in t["topic"].split() for w in terms)]
+        t_scan = _timeit(lambda: [scan(q) for q in words[:10]]) / 10
+        t_build = _timeit(lambda: search.search("warm", path, kind="topic"))
+        t_query = _timeit(lambda: [search.search(q, path, kind="topic") for q in words]) / queries
+        t_facet = _timeit(lambda: [search.search(q, path, kind="topic", sections=["S007"], since="2024-01-01")
+                                   for q in words]) / queries
+
+        entry = {"teacher": "teacher1", "topic": "graph kernel recursion", "date": "2025-12-01"}
+        before = search.topics_signature(path)
+        saved = store.update(path, {}, lambda cur: cur.setdefault("S007", []).append(entry))
+        t_add = _timeit(lambda: search.topic_added(path, "S007", len(saved["S007"]) - 1, entry, before))
+        store.invalidate()
+        t_after = _timeit(lambda: search.search("graph kernel recursion", path, kind="topic"))
+        top = search.search("graph kernel recursion", path, kind="topic", limit=1)[0]
+
+        print(f"  scan topics.json per query  : {_fmt_us(t_scan)}")
+        print(f"  first index build           : {t_build:6.2f}s")
+        print(f"  BM25 query                  : {_fmt_us(t_query)}")
+        print(f"  BM25 query, section + date  : {_fmt_us(t_facet)}")
+        print(f"  index one added topic       : {_fmt_us(t_add)}")
+        print(f"  query after the add         : {_fmt_us(t_after)}")
+        assert top["section"] == "S007" and top["date"] == "2025-12-01"
+        for q in words[:10]:
+            hits = {r["key"] for r in search.search(q, path, kind="topic", limit=topics)}
+            assert len(hits) == len(scan(q))
+    print("  OK: BM25 results cover every matching topic; new topics are searchable at once")
+
+# -----------------------------------------------------------
+# gui.VirtualTable: list screens with tens of thousands of rows
+# -----------------------------------------------------------
+
+def bench_virtual_table(rows=50_000, keystrokes="r12"):
+    """Inserting every row into a Treeview vs materializing only the visible window"""
+    import runapp
+
+    ok, reason = runapp.gui_available()
+    print(f"\nList screens: {rows} rows")
+    if not ok:
+        print(f"  skipped, {reason}")
+        return
+    import tkinter as tk
+    from tkinter import ttk
+    import gui
+
+    rng = random.Random(19)
+    data = [(f"S{i % 200:03d}", f"R{i:06d}", f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+             f"{rng.randint(1, 9000)} KB", rng.randint(1, 4)) for i in range(rows)]
+    cols = ("Section", "Student Roll", "Submitted", "Size", "Versions")
+    root = tk.Tk()
+    root.withdraw()
+    try:
+        def full():
+            tree = ttk.Treeview(root, columns=cols, show="headings")
+            for r in data:
+                tree.insert("", "end", values=r)
+            root.update_idletasks()
+            tree.destroy()
+        t_full = _timeit(full)
+        tables = []
+        def virtual():
+            tables.append(gui.VirtualTable(gui.View(), root, cols, data).pack(fill="both", expand=True))
+            root.update_idletasks()
+        t_virtual = _timeit(virtual)
+        table = tables[0]
+        t_sort = _timeit(lambda: table.sort_by(1))
+        t_resort = _timeit(lambda: table.sort_by(1))
+        t_keys = [_timeit(lambda k=k: table.set_filter(keystrokes[:k])) for k in range(1, len(keystrokes) + 1)]
+        t_scroll = _timeit(lambda: table._scroll("moveto", "0.5"), 20)
+        print(f"  insert every row (old)      : {t_full * 1000:9.2f} ms")
+        print(f"  open VirtualTable           : {t_virtual * 1000:9.2f} ms ({len(table.tree.get_children())} rows materialized)")
+        print(f"  first sort by a column      : {t_sort * 1000:9.2f} ms")
+        print(f"  reverse (index reused)      : {t_resort * 1000:9.2f} ms")
+        print("  filter keystrokes           : " + ", ".join(f"{t * 1000:.2f} ms" for t in t_keys))
+        print(f"  jump to the middle          : {t_scroll * 1000:9.2f} ms")
+        assert table.view == sorted((i for i, r in enumerate(data) if keystrokes in r[1].lower()),
+                                    key=lambda i: data[i][1], reverse=True)
+        assert len(table.tree.get_children()) <= table.visible
+    finally:
+        root.destroy()
+    print("  OK: filtered, sorted view matches a full scan; only the window is in the Treeview")
+
+# -----------------------------------------------------------
+# tasks.TaskRunner: event-loop stalls while a screen loads
+# -----------------------------------------------------------
+
+class _Loop:
+    """Stand-in for Tk's event loop: root.after callbacks in due order"""
+
+    def __init__(self):
+        import heapq
+        self._heap, self._push, self._pop, self._seq = [], heapq.heappush, heapq.heappop, 0
+
+    def after(self, ms, fn):
+        self._seq += 1
+        self._push(self._heap, (time.perf_counter() + ms / 1000, self._seq, fn))
+
+    def run(self, seconds):
+        end = time.perf_counter() + seconds
+        while self._heap and self._heap[0][0] < end:
+            due, _, fn = self._pop(self._heap)
+            time.sleep(max(0.0, due - time.perf_counter()))
+            fn()
+
+def bench_gui_tasks(students=50_000, sections=200, visits=5):
+    """Dashboard student count parsed on the Tk thread, through the TaskRunner, and from the manifest"""
+    import json
+    import store
+    import tasks
+    import attendance_log
+
+    print(f"\nGUI loads: admin dashboard student count, {students} students in {sections} section shards")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attendance_master.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_synthetic_attendance(students, sections), f)
+        attendance_log._ensure_sharded(path)    # the layout after the first mark
+
+        def count():
+            return len(attendance_log.view(path, {"attendance_records": {}})["attendance_records"])
+
+        loop = _Loop()
+        runner = tasks.TaskRunner(loop)
+        runner.start_heartbeat()
+        shown = []
+        def run_until_shown(n, limit=10.0):
+            # a loaded machine can take longer than the usual window to parse
+            end = time.perf_counter() + limit
+            while len(shown) < n and time.perf_counter() < end:
+                loop.run(0.1)
+        for i in range(visits):
+            # inline: the handler parses before it returns to the loop
+            runner.navigate(f"inline {i}")
+            store.invalidate()
+            loop.after(0, lambda: shown.append(count()))
+            loop.run(2.0)
+        for i in range(visits):
+            runner.navigate(f"background {i}")
+            store.invalidate()
+            loop.after(0, lambda: runner.submit(count, shown.append))
+            run_until_shown(visits + i + 1)
+        for i in range(visits):
+            # what admin_home does now: metadata.total_students, no shard is read
+            runner.navigate(f"manifest {i}")
+            store.invalidate()
+            loop.after(0, lambda: runner.submit(lambda: attendance_log.student_count(path), shown.append))
+            run_until_shown(2 * visits + i + 1)
+        store.invalidate()
+        manifest_s = _timeit(lambda: attendance_log.student_count(path))
+        # a visit abandoned at once: its result must never be delivered
+        runner.navigate("abandoned")
+        store.invalidate()
+        runner.submit(count, lambda _n: shown.append("stale"))
+        runner.navigate("next screen")
+        loop.run(1.5)
+        runner.shutdown()
+
+        def worst(prefix):
+            return max(s.worst_ms for name, s in runner.stats.items() if name.startswith(prefix))
+        print(f"  worst event-loop stall, parse on the Tk thread : {worst('inline'):8.1f} ms")
+        print(f"  worst event-loop stall, parse in the runner    : {worst('background'):8.1f} ms")
+        print(f"  worst event-loop stall, manifest count         : {worst('manifest'):8.1f} ms "
+              f"(count itself {manifest_s * 1000:.1f} ms)")
+        assert shown == [students] * (3 * visits)
+    print("  OK: counts delivered on the loop thread; the abandoned screen's result was dropped")
+
+# -----------------------------------------------------------
+# charts: aggregated, cached attendance charts
+# -----------------------------------------------------------
+
+def bench_charts(sections=4, per_section=60, subjects=5):
+    """Bar-per-cell teacher chart vs aggregated charts rendered once and cached"""
+    import json
+    import store
+    import charts
+    import analytics
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    students = sections * per_section
+    secs = [f"S{i:03d}" for i in range(sections)]
+    print(f"\nAttendance charts: {sections} sections x {per_section} students x {subjects} subjects")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attendance_master.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_synthetic_attendance(students, sections, subjects), f)
+        m = analytics.matrix(path, secs)
+        cells = m.cells(m.rows_for_sections(secs))
+
+        def old():
+            # what view_attendance drew: a bar and a text label per (student, subject)
+            fig = Figure(figsize=(14, 8), dpi=100)
+            ax = fig.add_subplot(111)
+            bars = ax.bar([f"{r} - {m.subject_names[j]}" for r, j, _ in cells], [p for _, _, p in cells])
+            for bar, (_, _, p) in zip(bars, cells):
+                ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 1, f"{p:.1f}%", fontsize=7)
+            ax.tick_params(axis="x", rotation=45, labelsize=8)
+            fig.tight_layout()
+            FigureCanvasAgg(fig).print_png(os.path.join(tmp, "old.png"))
+        charts.chart(path, secs[:1], "sections")    # font cache and imports
+        t_old = _timeit(old)
+        t_first = {k: _timeit(lambda k=k: charts.chart(path, secs, k)) for k in ("subjects", "sections")}
+        t_cached = {k: _timeit(lambda k=k: charts.chart(path, secs, k), 20) for k in ("subjects", "sections")}
+        code = m.subjects[0]
+        t_drill = _timeit(lambda: charts.chart(path, secs, "students", secs[0], code))
+        print(f"  bar per cell ({len(cells)} bars + labels) : {t_old * 1000:9.1f} ms")
+        for k in t_first:
+            print(f"  {k:<8} first render / cached     : {t_first[k] * 1000:9.1f} ms / {t_cached[k] * 1000:.2f} ms")
+        print(f"  drill-down, one section x subject  : {t_drill * 1000:9.1f} ms")
+        before = charts.chart(path, secs, "subjects")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_synthetic_attendance(students, sections, subjects + 1), f)
+        store.invalidate()
+        assert charts.chart(path, secs, "subjects") != before
+    print("  OK: changed attendance produces a new chart; unchanged data reuses the cached PNG")
+
+# -----------------------------------------------------------
+# reports: end-of-term batch reports in a process pool
+# -----------------------------------------------------------
+
+def bench_reports(sections=200, per_section=10, subjects=4, worker_counts=None):
+    """Whole-campus report run per worker count, then reruns that skip unchanged sections"""
+    import json
+    import store
+    import reports
+
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or [w for w in (1, 2, 4, 8, 16) if w <= cores]
+    data = _synthetic_attendance(sections * per_section, sections, subjects)
+    print(f"\nBatch reports: {sections} sections x {per_section} students, {cores} core(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attendance_master.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        base = None
+        for workers in worker_counts:
+            out = os.path.join(tmp, f"reports{workers}")
+            t = _timeit(lambda: reports.generate(path, workers=workers, out_dir=out))
+            base = base or t
+            print(f"  {workers:>2} worker(s): {t:7.2f}s  speedup {base / t:4.2f}x  ({sections / t:6.1f} sections/s)")
+        out = os.path.join(tmp, f"reports{worker_counts[-1]}")
+        t_same = _timeit(lambda: reports.generate(path, out_dir=out))
+        rec = next(iter(data["attendance_records"].values()))
+        next(iter(rec["subjects"].values()))["total_present_days"] -= 1
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        store.invalidate()
+        rendered, skipped = reports.generate(path, out_dir=out)
+        print(f"  rerun, nothing changed   : {t_same:7.2f}s")
+        print(f"  rerun, one mark changed  : {len(rendered)} rendered, {len(skipped)} skipped")
+        assert rendered == [rec["section"]] and len(skipped) == sections - 1
+        index = store.load(os.path.join(out, reports.INDEX_FILE), {})
+        assert len(index["sections"]) == sections
+    print("  OK: every section indexed; only changed sections are redrawn")
+
+# -----------------------------------------------------------
+# reportcards: one PDF per student
+# -----------------------------------------------------------
+
+def _campus(folder, students, sections, subjects=5):
+    """Write the files a report card reads for a synthetic cohort"""
+    import json
+    data = _synthetic_attendance(students, sections, subjects)
+    records = data["attendance_records"]
+    files = {
+        "attendance_master.json": data,
+        "sections.json": {roll: rec["section"] for roll, rec in records.items()},
+        "studentsubjects.json": {roll: {"section": rec["section"], "subjects": [f"Subject {j}" for j in range(subjects)]}
+                                 for roll, rec in records.items()},
+        "subjects.json": {"subjects": [{"name": f"Subject {j}", "code": f"SUB{j}"} for j in range(subjects)]},
+        "exam_date.json": {"exam_schedule": [{"subject_code": f"SUB{j}", "subject_name": f"Subject {j}",
+                                              "exam_date": f"{10 + j}/12/2025"} for j in range(subjects)]},
+    }
+    for name, doc in files.items():
+        with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+            json.dump(doc, f)
+
+def bench_report_cards(cohorts=(2_000, 10_000), sections=200, workers=None):
+    """Report cards per second, and the parent's peak memory as the cohort grows"""
+    import itertools
+    import tracemalloc
+    import store
+    import reportcards
+
+    print(f"\nReport cards (PyMuPDF), {os.cpu_count()} core(s)")
+    for students in cohorts:
+        with tempfile.TemporaryDirectory() as tmp:
+            _campus(tmp, students, sections)
+            store.invalidate()
+            list(itertools.islice(reportcards.cards(tmp), 1))     # inputs parsed and cached
+            tracemalloc.start()
+            t = _timeit(lambda: reportcards.generate(tmp, workers=workers))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            written = sum(len(files) for _, _, files in os.walk(reportcards.card_dir(tmp)))
+            print(f"  {students:>6} students: {t:6.1f}s  {students / t:6.0f} cards/s  parent peak {peak / 2**20:5.1f} MB")
+            assert written == students
+    print("  OK: one PDF per student; only the queued batches are held in the parent, never the PDFs")
+
+
+def _university(subjects, sections, per_section, programmes, rng):
+    """sectionsubjects.json-style allocation: a section takes subjects of its programme plus one elective"""
+    names = [f"Subject {i:03d}" for i in range(subjects)]
+    size = subjects // programmes
+    alloc = {}
+    for s in range(sections):
+        pool = names[(s % programmes) * size:(s % programmes + 1) * size]
+        alloc[f"S{s:03d}"] = rng.sample(pool, per_section - 1) + [rng.choice(names)]
+    return names, alloc
+
+def bench_timetable(subjects=300, sections=200, per_section=7, programmes=10, seed=24):
+    """Exam days and solve time of the timetable generator against plain greedy colouring"""
+    import datetime
+    import random
+    import store
+    import timetable
+
+    rng = random.Random(seed)
+    names, alloc = _university(subjects, sections, per_section, programmes, rng)
+    start = datetime.date(2026, 11, 2)
+    blackout = [start + datetime.timedelta(days=d) for d in (3, 4, 10)]
+    print(f"\nExam timetable: {subjects} subjects, {sections} sections, {per_section} subjects per section")
+    with tempfile.TemporaryDirectory() as tmp:
+        alloc_path = os.path.join(tmp, "sectionsubjects.json")
+        subjects_path = os.path.join(tmp, "subjects.json")
+        exam_path = os.path.join(tmp, "exam_date.json")
+        store.save(alloc_path, alloc)
+        store.save(subjects_path, {"subjects": [{"name": n, "code": f"SUB{i:03d}"} for i, n in enumerate(names)]})
+        p = timetable.Problem(alloc, {})
+        for per_day in (1, 2):
+            greedy = max(timetable._greedy(p, per_day)) + 1
+            t0 = time.perf_counter()
+            rows = timetable.make_timetable(alloc_path, subjects_path, start, blackout, per_day)
+            t = time.perf_counter() - t0
+            days = len({r[0] for r in rows})
+            print(f"  max {per_day}/day: {days:>2} exam days (greedy {greedy}, lower bound {p.lower_bound(per_day)})"
+                  f", last on {max(r[0] for r in rows)}, {t:.2f}s")
+            assert len(rows) == subjects and days <= greedy and t < 2 * timetable.TIME_LIMIT
+            assert not any(r[0] in blackout or r[0].weekday() in timetable.DAYS_OFF for r in rows)
+            timetable.write_timetable(rows, exam_path)
+            assert timetable.clashes(alloc_path, subjects_path, exam_path, per_day) == []
+    print("  OK: no section over its daily limit, no exam on a blackout date or a Sunday")
+
+
+def bench_exam_schedule(subjects=300, sections=200, allocated=100, students=20_000, views=2_000):
+    """Section exam views: per-call rebuild vs the materialized schedule, and ICS export"""
+    import datetime
+    import random
+    import store
+    import exam_date
+    import examschedule
+
+    rng = random.Random(25)
+    names = [f"Subject {i:03d}" for i in range(subjects)]
+    start = datetime.date(2026, 11, 2)
+    exams = {"exam_schedule": [{"subject_code": exam_date.getSubjectCode(n), "subject_name": n,
+                                "exam_date": (start + datetime.timedelta(days=rng.randrange(30))).strftime("%d/%m/%Y")}
+                               for n in names]}
+    secs = [f"S{s:03d}" for s in range(sections)]
+    taken = {sec: rng.sample(names, 7) for sec in secs}
+    print(f"\nSection exam schedule: {sections} sections ({allocated} in sectionsubjects.json), {students:,} students")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)       # exam_date reads its files from the current directory
+        try:
+            store.save(exam_date.EXAMFILE, exams)
+            store.save(exam_date.SUBJECTSFILE, {"subjects": [{"name": n, "code": exam_date.getSubjectCode(n)} for n in names]})
+            store.save(exam_date.ALLOCATIONFILE, {sec: taken[sec] for sec in secs[:allocated]})
+            store.save(exam_date.STUDENTSUBJECTSFILE, {f"R{i:06d}": {"section": secs[i % sections], "subjects": taken[secs[i % sections]]}
+                                                       for i in range(students)})
+            today = start + datetime.timedelta(days=10)
+
+            def before(sec):
+                # what viewSectionExamDates did, plus the sort a "next exams" list needs
+                subs, _ = exam_date.loadSectionSubjects(sec)
+                exam_map = exam_date.loadExamMap()
+                rows = [(examschedule.parse_date(exam_map.get(s["code"].upper(), {}).get("examDate", "")), s["code"]) for s in subs]
+                return sorted((r for r in rows if r[0] and r[0] >= today))[:examschedule.UPCOMING]
+            def after(sec):
+                return examschedule.schedule().section(sec).next(today=today)
+            for sec in (secs[0], secs[-1]):
+                assert [(d, c) for d, c, _, _ in after(sec)] == before(sec)
+            picks = [rng.choice(secs) for _ in range(views)]
+            old = _timeit(lambda: [before(sec) for sec in picks]) / views
+            store.invalidate()
+            cold = _timeit(examschedule.schedule)
+            new = _timeit(lambda: [after(sec) for sec in picks]) / views
+            week = _timeit(lambda: examschedule.schedule().between(today, today + datetime.timedelta(days=6)), repeat=100)
+            print(f"  view before:  {_fmt_us(old)} per section (fallback scans studentsubjects.json)")
+            print(f"  view after:   {_fmt_us(new)} per section; build once {cold * 1000:.0f} ms")
+            print(f"  all sections' exams in one week: {_fmt_us(week)}")
+            t = _timeit(lambda: examschedule.export_ics())
+            written = os.listdir(examschedule.calendar_dir())
+            print(f"  ICS export:   {len(written)} calendars in {t * 1000:.0f} ms")
+            assert len(written) == sections
+            exam_date.updateExamMap({exam_date.getSubjectCode(names[0]): {"subjectName": names[0], "examDate": "01/01/2027"}})
+            assert examschedule.schedule().by_code[exam_date.getSubjectCode(names[0])][0] == datetime.date(2027, 1, 1)
+        finally:
+            os.chdir(cwd)
+            store.invalidate()
+    print("  OK: same upcoming exams as before; the schedule is rebuilt after exam_date.json changes")
+
+
+if __name__ == "__main__":
+    print("1. User store lookup (100k users)")
+    print("2. Cached JSON store (dashboard renders)")
+    print("3. JSON vs SQLite backend (50k students)")
+    print("4. Concurrent writers stress check")
+    print("5. Login latency per password-hash cost")
+    print("6. Attendance analytics (100k students x 10 subjects)")
+    print("7. CLI startup import time (budget check)")
+    print("8. Launcher probe and time to first window")
+    print("9. Roll-number registry lookups and concurrent registration")
+    print("10. Bulk onboarding of 5,000 students from CSV")
+    print("11. Assignment uploads: dedup and background copy")
+    print("12. Assignment listing from the submission index (5,000 PDFs)")
+    print("13. PDF text extraction: process pool and page cache")
+    print("14. Near-duplicate submissions with MinHash/LSH (3,000 essays)")
+    print("15. Full-text search over 200,000 topics")
+    print("16. Virtualized list screens (50,000 rows)")
+    print("17. GUI background loads and event-loop stalls")
+    print("18. Attendance charts: aggregated and cached (240 students)")
+    print("19. End-of-term batch reports (200 sections, per worker count)")
+    print("20. Student report-card PDFs (10,000 students)")
+    print("21. Exam timetable generation (300 subjects, 200 sections)")
+    print("22. Section exam schedule: materialized view and ICS export")
+    ch = input("Enter choice: ").strip()
+    if ch == "1":
+        bench_user_lookup()
+    elif ch == "2":
+        bench_store_cache()
+    elif ch == "3":
+        bench_backends()
+    elif ch == "4":
+        stress_concurrent_writers()
+    elif ch == "5":
+        bench_login_latency()
+    elif ch == "6":
+        bench_analytics()
+    elif ch == "7":
+        bench_startup()
+    elif ch == "8":
+        bench_launch()
+    elif ch == "9":
+        bench_roll_registry()
+    elif ch == "10":
+        bench_onboarding()
+    elif ch == "11":
+        bench_assignment_uploads()
+    elif ch == "12":
+        bench_assignment_index()
+    elif ch == "13":
+        bench_pdf_text()
+    elif ch == "14":
+        bench_similarity()
+    elif ch == "15":
+        bench_search()
+    elif ch == "16":
+        bench_virtual_table()
+    elif ch == "17":
+        bench_gui_tasks()
+    elif ch == "18":
+        bench_charts()
+    elif ch == "19":
+        bench_reports()
+    elif ch == "20":
+        bench_report_cards()
+    elif ch == "21":
+        bench_timetable()
+    elif ch == "22":
+        bench_exam_schedule()
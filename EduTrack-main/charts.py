@@ -0,0 +1,167 @@
+import os
+import sys
+import hashlib
+import tempfile
+import numpy as np
+import analytics
+
+# Attendance charts, rendered to PNG and cached by the data they show.
+#
+# Large sections are summarised instead of drawing a bar per (student, subject):
+#   "subjects"   histogram of the students' % in each subject (small multiples)
+#   "sections"   box plot of the students' overall % per section
+#   "students"   drill-down: one bar per student for one section and subject,
+#                drawn only when asked for
+# A chart's file name is a SHA-1 over its kind, title and the exact values
+# drawn, so reopening a screen costs a hash and an image load until the
+# attendance changes. Rendering goes straight to an Agg canvas (no pyplot, no
+# GUI backend), so it can run on any thread.
+
+CHART_FOLDER = "charts"         # next to the attendance master
+KINDS = ("subjects", "sections", "students")
+TITLES = {"subjects": "Attendance % by subject", "sections": "Overall attendance % by section"}
+BINS = np.arange(0, 105, 5)     # 5% histogram buckets
+DPI = 100
+GRID_COLUMNS = 3                # histograms per row
+LABEL_BARS = 40                 # drill-downs with more bars than this skip the value labels
+MAX_CACHED = 200                # older PNGs beyond this are removed
+COLOR = "#2F5DA8"
+
+
+def chart_dir(master_path):
+    return os.path.join(os.path.dirname(os.path.abspath(master_path)), CHART_FOLDER)
+
+def series(m, kind, sections, section=None, subject=None):
+    """[(label, values)] drawn by a chart; values are the attendance % behind it"""
+    if kind == "subjects":
+        rows = m.rows_for_sections(sections)
+        w = m.working[rows]
+        pct = m.percentages(rows)
+        held = m.enrolled[rows] & (w > 0)
+        return [(m.subject_names[j], pct[held[:, j], j]) for j in range(len(m.subjects)) if held[:, j].any()]
+    if kind == "sections":
+        out = []
+        for sec in sections:
+            pct = m.student_summary(m.rows_for_sections([sec]))["percentage"]
+            pct = pct[~np.isnan(pct)]
+            if pct.size:
+                out.append((str(sec), pct))
+        return out
+    if kind == "students":
+        if subject not in m.subjects:
+            return []
+        j = m.subjects.index(subject)
+        rows = m.rows_for_sections([section])
+        rows = rows[m.enrolled[rows, j]]
+        pct = np.nan_to_num(m.percentages(rows)[:, j], nan=0.0)
+        order = sorted(range(len(rows)), key=lambda i: m.rolls[rows[i]])
+        return [(m.rolls[rows[i]], pct[i:i + 1]) for i in order]
+    raise ValueError(f"unknown chart kind {kind!r}")
+
+def chart_key(kind, title, data):
+    h = hashlib.sha1(f"{kind}\0{title}".encode())
+    for label, values in data:
+        h.update(b"\0" + str(label).encode() + b"\0")
+        h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+def render(kind, title, data):
+    """PNG bytes of a chart"""
+    import io
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    if kind == "subjects":
+        cols = min(GRID_COLUMNS, len(data))
+        nrows = -(-len(data) // cols)
+        fig = Figure(figsize=(3.0 * cols, 2.4 * nrows + 0.6), dpi=DPI)
+        for i, (name, values) in enumerate(data):
+            ax = fig.add_subplot(nrows, cols, i + 1)
+            ax.hist(values, bins=BINS, color=COLOR)
+            ax.axvline(analytics.THRESHOLD, color="#C0392B", linewidth=1)
+            ax.set_title(f"{name} (n={len(values)})", fontsize=9)
+            ax.set_xlim(0, 100)
+            ax.tick_params(labelsize=7)
+    elif kind == "sections":
+        fig = Figure(figsize=(max(5.0, 0.9 * len(data) + 2), 4.5), dpi=DPI)
+        ax = fig.add_subplot(111)
+        ax.boxplot([v for _, v in data], showfliers=True)
+        ax.set_xticks(range(1, len(data) + 1), [f"{s}\n(n={len(v)})" for s, v in data], fontsize=8)
+        ax.axhline(analytics.THRESHOLD, color="#C0392B", linewidth=1, linestyle="--")
+        ax.set_ylim(0, 100)
+        ax.set_ylabel("Overall attendance %")
+    else:
+        fig = Figure(figsize=(8.0, max(3.0, min(12.0, 0.22 * len(data) + 1))), dpi=DPI)
+        ax = fig.add_subplot(111)
+        values = [float(v[0]) for _, v in data]
+        bars = ax.barh([r for r, _ in data], values, color=COLOR)
+        ax.invert_yaxis()
+        ax.axvline(analytics.THRESHOLD, color="#C0392B", linewidth=1, linestyle="--")
+        ax.set_xlim(0, 100)
+        ax.set_xlabel("Attendance %")
+        ax.tick_params(axis="y", labelsize=7)
+        if len(data) <= LABEL_BARS:
+            ax.bar_label(bars, [f"{v:.0f}%" for v in values], fontsize=7, padding=2)
+    fig.suptitle(title, fontsize=11)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    FigureCanvasAgg(fig).print_png(buf)
+    return buf.getvalue()
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _prune(folder):
+    pngs = [e for e in os.scandir(folder) if e.name.endswith(".png")]
+    if len(pngs) <= MAX_CACHED:
+        return
+    pngs.sort(key=lambda e: e.stat().st_mtime)
+    for e in pngs[:len(pngs) - MAX_CACHED]:
+        try:
+            os.remove(e.path)
+        except OSError:
+            pass
+
+def chart(master_path, sections, kind="subjects", section=None, subject=None, title=None):
+    """Path of the PNG for a chart of sections' attendance, or None if there is nothing to draw"""
+    m = analytics.matrix(master_path, sections)
+    data = series(m, kind, sections, section, subject)
+    if not data:
+        return None
+    if title is None:
+        if kind == "students":
+            title = f"Section {section}: {m.subject_names[m.subjects.index(subject)]}"
+        else:
+            title = TITLES[kind]
+    folder = chart_dir(master_path)
+    path = os.path.join(folder, chart_key(kind, title, data) + ".png")
+    if os.path.exists(path):
+        os.utime(path)      # recently used charts survive pruning
+        return path
+    os.makedirs(folder, exist_ok=True)
+    _write_atomic(path, render(kind, title, data))
+    _prune(folder)
+    return path
+
+def drill_down_options(master_path, sections):
+    """[(section, [(subject code, subject name)])] with at least one enrolled student"""
+    m = analytics.matrix(master_path, sections)
+    out = []
+    for sec in sections:
+        rows = m.rows_for_sections([sec])
+        taken = m.enrolled[rows].any(axis=0)
+        out.append((sec, [(m.subjects[j], m.subject_names[j]) for j in np.flatnonzero(taken)]))
+    return out
+
+
+if __name__ == "__main__":
+    # python charts.py subjects|sections <section> ... : print the path of a chart
+    kind = sys.argv[1] if len(sys.argv) > 1 else "subjects"
+    print(chart(analytics._default_master(), [s.upper() for s in sys.argv[2:]] or ["A"], kind))
@@ -1,6 +1,5 @@
-import json
-from datetime import datetime
-import os
+from datetime import date, datetime
+import store
 
 SUBJECTSFILE = "subjects.json"
 EXAMFILE = "exam_date.json"
@@ -27,42 +26,25 @@ SUBJECT_NAME_TO_CODE = {
 }
 
 def loadSubjects():
-    try:
-        with open(SUBJECTSFILE, "r") as f:
-            data = json.load(f)
-    except:
-        return []
-    
+    data = store.view(SUBJECTSFILE, [])
     if isinstance(data, dict) and "subjects" in data:
-        return data["subjects"]
+        return list(data["subjects"])
     elif isinstance(data, list):
-        return data
+        return list(data)
     return []
 
 def loadSubjectAllocation():
     """Load section-subject allocation data"""
-    try:
-        with open(ALLOCATIONFILE, "r") as f:
-            return json.load(f)
-    except:
-        return {}
+    return store.view(ALLOCATIONFILE, {})
 
 def loadStudentSubjects():
     """Load student subjects data"""
-    try:
-        with open(STUDENTSUBJECTSFILE, "r") as f:
-            data = json.load(f)
-        return data
-    except:
-        return {}
+    return store.view(STUDENTSUBJECTSFILE, {})
 
 def loadExamMap():
-    try:
-        with open(EXAMFILE, "r") as f:
-            raw = json.load(f)
-    except:
-        raw = {}
-    
+    return examMapFromPayload(store.view(EXAMFILE, {}))
+
+def examMapFromPayload(raw):
     if isinstance(raw, dict) and "exam_schedule" in raw:
         items = raw["exam_schedule"]
     elif isinstance(raw, list):
@@ -82,7 +64,7 @@ def loadExamMap():
             }
     return examMap
 
-def saveExamMap(examMap):
+def examPayload(examMap):
     payload = {"exam_schedule": []}
     for code in sorted(examMap.keys()):
         entry = examMap[code]
@@ -91,8 +73,18 @@ def saveExamMap(examMap):
             "subject_name": entry.get("subjectName", ""),
             "exam_date": entry.get("examDate", "")
         })
-    with open(EXAMFILE, "w") as f:
-        json.dump(payload, f, indent=2)
+    return payload
+
+def saveExamMap(examMap):
+    store.save(EXAMFILE, examPayload(examMap))
+
+def updateExamMap(changes):
+    """Merge {code: {"subjectName", "examDate"}} into exam_date.json under the file lock"""
+    def apply(raw):
+        examMap = examMapFromPayload(raw)
+        examMap.update(changes)
+        return examPayload(examMap)
+    store.update(EXAMFILE, {"exam_schedule": []}, apply)
 
 def setExamDatesAdmin():
     subjects = loadSubjects()
@@ -114,7 +106,7 @@ def setExamDatesAdmin():
         print("Invalid input.")
         return
     
-    examMap = loadExamMap()
+    changes = {}
     for idx in indexes:
         if 0 <= idx < len(subjects):
             s = subjects[idx]
@@ -126,10 +118,13 @@ def setExamDatesAdmin():
             except:
                 print(f"Skipped {code}: invalid date format.")
                 continue
-            examMap[code] = {"subjectName": name, "examDate": dateStr}
+            changes[code] = {"subjectName": name, "examDate": dateStr}
     
-    saveExamMap(examMap)
+    updateExamMap(changes)
     print("Exam dates saved.")
+    import timetable
+    for sec, dateStr, names in timetable.clashes(ALLOCATIONFILE, SUBJECTSFILE, EXAMFILE):
+        print(f"Warning: section {sec} has {len(names)} exams on {dateStr}: {', '.join(names)}")
 
 def getExamDate(subjectCode):
     if not subjectCode:
@@ -197,32 +192,34 @@ def viewSectionExamDates(sectionName):
     if sectionName == "Not assigned":
         print("Section not assigned.")
         return
-        
-    subs, isAllocated = loadSectionSubjects(sectionName)
-    if not subs:
+    
+    import examschedule
+    sched = examschedule.schedule().section(sectionName)
+    if not sched.exams:
         print("No subjects available for this section.")
         return
     
-    examMap = loadExamMap()
     title = f"Section {sectionName} Exam Dates"
     print(f"\n{title}:")
     
-    if not isAllocated:
+    if not sched.allocated:
         print("(No section-specific allocation found; showing all subjects.)")
     else:
         print("(Showing section-specific subjects)")
     
-    for s in subs:
-        code = (s.get("code") or "").upper()
-        name = s.get("name") or ""
-        dateStr = examMap.get(code, {}).get("examDate", "Not set")
-        print(f" {name} ({code}) - Exam: {dateStr}")
+    for day, code, name, dateStr in sched.exams:
+        print(f" {name} ({code}) - Exam: {dateStr or 'Not set'}")
+    
+    upcoming = sched.next(1)
+    if upcoming:
+        day, code, name, dateStr = upcoming[0]
+        print(f"Next exam: {name} on {dateStr} (in {(day - date.today()).days} day(s))")
 
 def viewStudentExamSchedule(username):
     import subject
     import section
-    roll = subject.getRollNumber(username, "student")
-    sec = section.getSectionForRoll(roll)
+    roll = subject.lookupRollNumber(username, "student")
+    sec = section.getSectionForRoll(roll) if roll else "Not assigned"
     if sec == "Not assigned":
         print("Section not assigned.")
         return
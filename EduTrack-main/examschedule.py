@@ -0,0 +1,206 @@
+import os
+import re
+import sys
+import time
+import tempfile
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+import store
+import exam_date
+
+# Per-section exam schedule, built once and kept until its inputs change.
+#
+# exam_date.json, sectionsubjects.json, studentsubjects.json and
+# subjects.json are read together into one Schedule (store.memo re-checks
+# their signatures, so an edit to any of them rebuilds it on next use).
+# Every section's exams are held sorted by their parsed date, so "next N
+# exams" and date ranges are a bisect, and a date-sorted index over all
+# sections answers campus-wide ranges the same way.
+#
+# An exam is a tuple (date or None, subject code, subject name, date text);
+# exams without a valid date sort last. A section's subjects come from
+# sectionsubjects.json, else from the first student of that section in
+# studentsubjects.json, else every subject (as exam_date.loadSectionSubjects
+# always did).
+#
+#   calendars/<SECTION>.ics   one all-day event per dated exam (RFC 5545)
+
+CALENDAR_FOLDER = "calendars"
+DATE_FORMAT = "%d/%m/%Y"        # as in exam_date.json
+UPCOMING = 5                    # exams shown by next()
+PRODID = "-//EduTrack//Exam schedule//EN"
+
+
+def parse_date(text):
+    try:
+        return datetime.strptime(str(text).strip(), DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+def _sort_key(exam):
+    return (exam[0] is None, exam[0] or date.min, exam[2].lower(), exam[1])
+
+def _exams(subjects, exam_map):
+    """Date-sorted exams of [{"name", "code"}] subjects"""
+    out = []
+    for s in subjects:
+        code = (s.get("code") or "").upper()
+        text = exam_map.get(code, {}).get("examDate", "")
+        out.append((parse_date(text), code, s.get("name") or "", text))
+    out.sort(key=_sort_key)
+    return out
+
+
+class SectionSchedule:
+    """One section's exams, sorted by date"""
+
+    def __init__(self, section, exams, allocated):
+        self.section = section
+        self.exams = exams
+        self.allocated = allocated      # False when it fell back to every subject
+        self._days = [e[0].toordinal() for e in exams if e[0] is not None]
+
+    def next(self, n=UPCOMING, today=None):
+        """The first n exams on or after today"""
+        i = bisect_left(self._days, (today or date.today()).toordinal())
+        return self.exams[i:i + n]
+
+    def between(self, start, end):
+        """Exams with start <= date <= end"""
+        return self.exams[bisect_left(self._days, start.toordinal()):bisect_right(self._days, end.toordinal())]
+
+
+class Schedule:
+    def __init__(self, exam_map, allocation, student_subjects, subjects):
+        self.by_code = {}           # code -> exam
+        for code, entry in exam_map.items():
+            text = entry.get("examDate", "")
+            self.by_code[code] = (parse_date(text), code, entry.get("subjectName", ""), text)
+        def named(names):
+            return [{"name": n, "code": exam_date.getSubjectCode(n)} for n in names]
+        self.sections = {}
+        for sec, names in allocation.items():
+            if names:
+                sec = str(sec).strip().upper()
+                self.sections[sec] = SectionSchedule(sec, _exams(named(names), exam_map), True)
+        for data in student_subjects.values():
+            sec = str(data.get("section") or "").strip().upper() if isinstance(data, dict) else ""
+            if sec and sec not in self.sections and data.get("subjects"):
+                self.sections[sec] = SectionSchedule(sec, _exams(named(data["subjects"]), exam_map), True)
+        self._fallback = _exams(subjects, exam_map)
+        # (ordinal, section, exam) across all sections, for campus-wide ranges
+        self.index = sorted(((e[0].toordinal(), sec, e) for sec, s in self.sections.items() for e in s.exams
+                             if e[0] is not None), key=lambda r: (r[0], r[1], r[2][1]))
+        self._days = [r[0] for r in self.index]
+
+    def section(self, name):
+        name = (name or "").strip().upper()
+        return self.sections.get(name) or SectionSchedule(name, self._fallback, False)
+
+    def for_codes(self, codes):
+        """Date-sorted exams of the given subject codes (those with an entry in exam_date.json)"""
+        return sorted((self.by_code[c] for c in set(codes) if c in self.by_code), key=_sort_key)
+
+    def between(self, start, end):
+        """[(section, exam)] with start <= date <= end, by date"""
+        rows = self.index[bisect_left(self._days, start.toordinal()):bisect_right(self._days, end.toordinal())]
+        return [(sec, exam) for _, sec, exam in rows]
+
+
+def _paths(data_dir):
+    return [os.path.join(data_dir, name) for name in
+            (exam_date.EXAMFILE, exam_date.ALLOCATIONFILE, exam_date.STUDENTSUBJECTSFILE, exam_date.SUBJECTSFILE)]
+
+def schedule(data_dir=""):
+    """The shared Schedule of the data files in data_dir (the current directory by default); do not mutate it"""
+    exams, alloc, students, subjects = _paths(data_dir)
+    def build():
+        raw = store.view(subjects, [])
+        items = raw.get("subjects", []) if isinstance(raw, dict) else raw
+        return Schedule(exam_date.examMapFromPayload(store.view(exams, {})), store.view(alloc, {}),
+                        store.view(students, {}), [s for s in items if isinstance(s, dict)])
+    return store.memo(("exam-schedule", os.path.abspath(data_dir or ".")), (exams, alloc, students, subjects), build)
+
+# -----------------------------------------------------------
+# ICS export
+# -----------------------------------------------------------
+
+def _escape(text):
+    return str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _fold(line):
+    # content lines are limited to 75 octets; continuations start with a space
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:     # do not split a UTF-8 sequence
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+def ics(section_schedule, stamp=None):
+    """Text of an iCalendar file with one all-day event per dated exam"""
+    stamp = stamp or time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    sec = section_schedule.section
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN", "METHOD:PUBLISH",
+             f"X-WR-CALNAME:{_escape(f'Exams - Section {sec}')}"]
+    for day, code, name, _ in section_schedule.exams:
+        if day is None:
+            continue
+        lines += ["BEGIN:VEVENT",
+                  f"UID:{_escape(f'{code}-{sec}')}@edutrack",
+                  f"DTSTAMP:{stamp}",
+                  f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+                  f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}",
+                  f"SUMMARY:{_escape(f'Exam: {name} ({code})')}",
+                  f"DESCRIPTION:{_escape(f'Section {sec}')}",
+                  "TRANSP:TRANSPARENT",
+                  "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+def calendar_dir(data_dir=""):
+    return os.path.join(data_dir, CALENDAR_FOLDER)
+
+def file_stem(section):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(section)) or "_"
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def export_ics(data_dir="", sections=None, out_dir=None):
+    """Write calendars/<SECTION>.ics for sections (every known section when None); returns the paths"""
+    sched = schedule(data_dir)
+    out_dir = out_dir or calendar_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    paths = []
+    for sec in sorted(sched.sections) if sections is None else [str(s).strip().upper() for s in sections]:
+        path = os.path.join(out_dir, file_stem(sec) + ".ics")
+        _write_atomic(path, ics(sched.section(sec), stamp).encode("utf-8"))
+        paths.append(path)
+    return paths
+
+def export_interactive(data_dir=""):
+    secs = input("Sections (comma separated, blank for all): ").strip()
+    sections = [s.strip().upper() for s in secs.split(",") if s.strip()] or None
+    paths = export_ics(data_dir, sections)
+    print(f"Wrote {len(paths)} calendar(s) to {os.path.abspath(calendar_dir(data_dir))}")
+
+
+if __name__ == "__main__":
+    # python examschedule.py [section ...] : write the ICS calendars
+    paths = export_ics(sections=sys.argv[1:] or None)
+    print(f"Wrote {len(paths)} calendar(s) to {os.path.abspath(calendar_dir())}")
@@ -1,15 +1,22 @@
 from __future__ import annotations
 import os
 import sys
-import json
-import hmac
-import shutil
+import threading
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from typing import Literal
 
 import login
+import store
+import repository
+import attendance_log
+import assignments
+import pdftext
+import search
+import tasks
+import timetable
+import examschedule
 
 PRIMARY_DEEP = "#2C3E50"
 ACCENT_PINK = "#FF2F92"
@@ -40,18 +47,24 @@ PATH_EXAMS = os.path.join(ROOT, "exam_date.json")
 PATH_ASSIGNMENTS = os.path.join(ROOT, "assignments")
 
 def load_json(path, default):
-    try:
-        if not os.path.exists(path):
-            return default
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return default
+    return store.load(path, default)
+
+def view_json(path, default):
+    # shared cached copy: read-only callers only
+    return store.view(path, default)
 
 def save_json(path, payload):
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2)
+        store.save(path, payload)
+        return True
+    except Exception as e:
+        messagebox.showerror("File Error", f"Unable to save {os.path.basename(path)}: {e}")
+        return False
+
+def update_json(path, default, fn):
+    # locked read-modify-write, so another CLI/GUI session's changes are kept
+    try:
+        store.update(path, default, fn)
         return True
     except Exception as e:
         messagebox.showerror("File Error", f"Unable to save {os.path.basename(path)}: {e}")
@@ -76,7 +89,7 @@ def ensure_files():
     os.makedirs(PATH_ASSIGNMENTS, exist_ok=True)
 
 def subject_list():
-    data = load_json(PATH_SUBJECTS, {"subjects": []})
+    data = view_json(PATH_SUBJECTS, {"subjects": []})
     if isinstance(data, dict) and "subjects" in data:
         return data["subjects"]
     if isinstance(data, list):
@@ -96,32 +109,48 @@ def name_by_code(code):
     return code
 
 def teacher_sections_map():
-    return load_json(PATH_TEACHERSECTIONS, {})
+    return view_json(PATH_TEACHERSECTIONS, {})
 
 def sections_map():
-    return load_json(PATH_SECTIONS, {})
+    return view_json(PATH_SECTIONS, {})
 
 def section_list():
-    raw = load_json(PATH_SECTIONLIST, [])
+    raw = view_json(PATH_SECTIONLIST, [])
     return sorted({str(s).strip().upper() for s in raw if str(s).strip()})
 
 def section_subjects_map():
-    return load_json(PATH_SECTIONSUBJECTS, {})
+    return view_json(PATH_SECTIONSUBJECTS, {})
 
 def topics_map():
-    return load_json(PATH_TOPICS, {})
+    return view_json(PATH_TOPICS, {})
+
+def attendance_master(sections=None):
+    return attendance_log.view(PATH_ATTENDANCE, {"attendance_records": {}, "metadata": {}}, sections)
 
-def attendance_master():
-    return load_json(PATH_ATTENDANCE, {"attendance_records": {}, "metadata": {}})
+def update_attendance_master(fn, sections=None):
+    try:
+        attendance_log.update(PATH_ATTENDANCE, fn, sections=sections)
+        return True
+    except Exception as e:
+        messagebox.showerror("File Error", f"Unable to save {os.path.basename(PATH_ATTENDANCE)}: {e}")
+        return False
+
+def journal_attendance(events):
+    try:
+        attendance_log.append(PATH_ATTENDANCE, events)
+        return True
+    except Exception as e:
+        messagebox.showerror("File Error", f"Unable to record attendance: {e}")
+        return False
 
 def rollnumbers_map():
-    return load_json(PATH_ROLLNUMBERS, {"map": {"student": {}, "teacher": {}, "admin": {}}, "counters": {}})
+    return view_json(PATH_ROLLNUMBERS, {"map": {"student": {}, "teacher": {}, "admin": {}}, "counters": {}})
 
 def exams_payload():
-    return load_json(PATH_EXAMS, {"exam_schedule": []})
+    return view_json(PATH_EXAMS, {"exam_schedule": []})
 
 def student_subjects(roll):
-    sdata = load_json(PATH_STUDENTSUBJECTS, {})
+    sdata = view_json(PATH_STUDENTSUBJECTS, {})
     entry = sdata.get(roll)
     if entry and isinstance(entry, dict):
         names = entry.get("subjects", [])
@@ -140,28 +169,34 @@ def student_section(roll):
     sec = sm.get(roll)
     if sec:
         return str(sec).strip().upper()
-    sdata = load_json(PATH_STUDENTSUBJECTS, {}).get(roll, {})
+    sdata = view_json(PATH_STUDENTSUBJECTS, {}).get(roll, {})
     return str(sdata.get("section", "Not assigned")).strip().upper()
 
 def ensure_student_attendance(roll, sec, names):
-    att = attendance_master()
-    records = att.get("attendance_records", {})
-    if roll not in records:
-        subjects_dict = {}
-        for nm in names:
-            code = code_by_name(nm)
-            subjects_dict[code] = {
-                "subject_name": nm,
-                "total_working_days": 0,
-                "total_present_days": 0,
-                "attendance_percentage": 0.0,
-                "last_updated": datetime.now().strftime("%Y-%m-%d")
-            }
-        records[roll] = {"name": roll, "section": sec, "subjects": subjects_dict}
-        att["attendance_records"] = records
-        att.setdefault("metadata", {})["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-        att["metadata"]["total_students"] = len(records)
-        save_json(PATH_ATTENDANCE, att)
+    if roll in attendance_master().get("attendance_records", {}):
+        return
+    subjects_dict = {}
+    for nm in names:
+        code = code_by_name(nm)
+        subjects_dict[code] = {
+            "subject_name": nm,
+            "total_working_days": 0,
+            "total_present_days": 0,
+            "attendance_percentage": 0.0,
+            "last_updated": datetime.now().strftime("%Y-%m-%d")
+        }
+    update_attendance_master(lambda att: att.setdefault("attendance_records", {}).setdefault(
+        roll, {"name": roll, "section": sec, "subjects": subjects_dict}), [sec])
+
+def assign_student_section(roll, sec):
+    sec_subjects = section_subjects_map().get(sec, [])
+    update_json(PATH_SECTIONS, {}, lambda secmap: secmap.update({roll: sec}))
+    update_json(PATH_STUDENTSUBJECTS, {}, lambda studentsubj: studentsubj.update({roll: {"section": sec, "subjects": sec_subjects}}))
+    rec = attendance_master().get("attendance_records", {}).get(roll)
+    if rec is not None and str(rec.get("section", "")).strip().upper() != str(sec).strip().upper():
+        # move the existing record (and its counters) to the new section's shard
+        update_attendance_master(lambda att: att["attendance_records"][roll].update(section=sec))
+    ensure_student_attendance(roll, sec, sec_subjects)
 
 class View:
     def frame(self, parent, bg, border=False):
@@ -199,6 +234,197 @@ class View:
     def clear(self, frame):
         for w in frame.winfo_children():
             w.destroy()
+    def table(self, parent, columns, rows=(), **options):
+        return VirtualTable(self, parent, columns, rows, **options)
+
+def _sort_value(value):
+    # numbers before text, text case-insensitively
+    if isinstance(value, (int, float)):
+        return (0, value, "")
+    return (1, 0, str(value).lower())
+
+class VirtualTable:
+    """Treeview that only materializes the rows in view
+
+    rows is any sequence of tuples (a list, or a provider with __len__ and
+    __getitem__). The first len(columns) values are shown; extra trailing
+    values are there for sort_keys, which map a column name to a key
+    function on the whole row. A heading click sorts by that column through
+    an index sorted once per column (clicking again reverses it). The filter
+    box narrows the current matches while the text only grows.
+    """
+
+    def __init__(self, view, parent, columns, rows=(), widths=None, height=14, sort_keys=None,
+                 filter_label="Filter", on_open=None):
+        self.columns = tuple(columns)
+        self.sort_keys = sort_keys or {}
+        self.on_open = on_open
+        self.frame = view.frame(parent, BG_PANEL)
+        self.filter_ent = None
+        bar = view.frame(self.frame, BG_PANEL); bar.pack(fill="x", pady=(0, 6))
+        if filter_label:
+            view.label(bar, filter_label, SMALL, PRIMARY_DEEP, BG_PANEL).pack(side="left")
+            self.filter_ent = view.entry(bar, width=20); self.filter_ent.pack(side="left", padx=6)
+            self.filter_ent.bind("<KeyRelease>", lambda _e: self.set_filter(self.filter_ent.get()))
+        self.count_lbl = view.label(bar, "", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL)
+        self.count_lbl.pack(side="right")
+        body = view.frame(self.frame, BG_PANEL); body.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings", height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+        for i, col in enumerate(self.columns):
+            self.tree.heading(col, text=col, command=lambda i=i: self.sort_by(i))
+            self.tree.column(col, anchor="center", width=(widths or {}).get(col, 140))
+        self.tree.bind("<Configure>", self._resized)
+        self.tree.bind("<<TreeviewSelect>>", self._selected_changed)
+        self.tree.bind("<MouseWheel>", lambda e: self._move_top(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda _e: self._move_top(-3))
+        self.tree.bind("<Button-5>", lambda _e: self._move_top(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1), ("<Prior>", -height), ("<Next>", height),
+                          ("<Home>", -10**9), ("<End>", 10**9)):
+            self.tree.bind(key, lambda _e, step=step: self._move_selection(step))
+        self.tree.bind("<Double-1>", lambda _e: self._open())
+        self.tree.bind("<Return>", lambda _e: self._open())
+        self.visible = height
+        self.top = 0
+        self.selected_pos = None
+        self.sort_col, self.reverse = None, False
+        self.set_rows(rows)
+
+    def pack(self, **kw):
+        self.frame.pack(**kw)
+        return self
+
+    # --- data ---
+
+    def set_rows(self, rows, keep_place=False):
+        """Replace the rows, keeping the current sort column and filter text
+
+        keep_place keeps the scroll position and selection, for refreshing
+        values of the same rows in the same order.
+        """
+        place = (self.top, self.selected_pos) if keep_place else None
+        self.rows = rows
+        self._orders = {}       # column -> row indices in ascending order
+        self._texts = None      # row -> lower-cased text the filter looks in
+        self._filter, self._matches = "", None
+        text = self.filter_ent.get() if self.filter_ent is not None else ""
+        if text.strip():
+            self.set_filter(text, render=False)
+        self._rebuild(place)
+
+    def _order(self):
+        if self.sort_col is None:
+            return range(len(self.rows))
+        if self.sort_col not in self._orders:
+            col = self.sort_col
+            key = self.sort_keys.get(self.columns[col])
+            rows = self.rows
+            self._orders[col] = sorted(range(len(rows)), key=(lambda i: key(rows[i])) if key else
+                                       (lambda i: _sort_value(rows[i][col])))
+        return self._orders[self.sort_col]
+
+    def _rebuild(self, place=None):
+        order = self._order()
+        if self.reverse:
+            order = order[::-1]
+        if self._matches is not None:
+            keep = set(self._matches)
+            order = [i for i in order if i in keep]
+        self.view = order
+        self.top, self.selected_pos = place or (0, None)
+        self._render()
+
+    def sort_by(self, col):
+        self.reverse = not self.reverse if col == self.sort_col else False
+        self.sort_col = col
+        for i, name in enumerate(self.columns):
+            mark = (" \u25bc" if self.reverse else " \u25b2") if i == col else ""
+            self.tree.heading(name, text=name + mark)
+        self._rebuild()
+
+    def set_filter(self, text, render=True):
+        text = text.strip().lower()
+        if text == self._filter:
+            return
+        if not text:
+            self._matches = None
+        else:
+            if self._texts is None:
+                n = len(self.columns)
+                self._texts = ["\x1f".join(str(v) for v in self.rows[i][:n]).lower() for i in range(len(self.rows))]
+            texts = self._texts
+            if self._matches is not None and self._filter and text.startswith(self._filter):
+                pool = self._matches        # longer text: only current matches can still match
+            else:
+                pool = range(len(texts))
+            self._matches = [i for i in pool if text in texts[i]]
+        self._filter = text
+        if render:
+            self._rebuild()
+
+    def selected(self):
+        """The selected row, or None"""
+        if self.selected_pos is None or self.selected_pos >= len(self.view):
+            return None
+        return self.rows[self.view[self.selected_pos]]
+
+    # --- window ---
+
+    def _render(self):
+        n, ncols = len(self.view), len(self.columns)
+        self.top = max(0, min(self.top, n - self.visible))
+        self.tree.delete(*self.tree.get_children())
+        for pos in range(self.top, min(n, self.top + self.visible)):
+            self.tree.insert("", "end", iid=str(pos), values=tuple(self.rows[self.view[pos]][:ncols]))
+        if self.selected_pos is not None and self.tree.exists(str(self.selected_pos)):
+            self.tree.selection_set(str(self.selected_pos))
+        self.scrollbar.set(*((self.top / n, min(1.0, (self.top + self.visible) / n)) if n else (0.0, 1.0)))
+        total = len(self.rows)
+        self.count_lbl.configure(text=f"{n:,} row(s)" if n == total else f"{n:,} of {total:,} row(s)")
+
+    def _resized(self, event):
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - 28) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self._render()
+
+    def _scroll(self, *args):
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.view))
+            self._render()
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.visible if args[2] == "pages" else 1)
+            self._move_top(step)
+
+    def _move_top(self, step):
+        self.top += step
+        self._render()
+        return "break"
+
+    def _selected_changed(self, _event):
+        sel = self.tree.selection()
+        if sel:
+            self.selected_pos = int(sel[0])
+
+    def _move_selection(self, step):
+        if not self.view:
+            return "break"
+        pos = self.top if self.selected_pos is None else self.selected_pos + step
+        self.selected_pos = max(0, min(pos, len(self.view) - 1))
+        if self.selected_pos < self.top:
+            self.top = self.selected_pos
+        elif self.selected_pos >= self.top + self.visible:
+            self.top = self.selected_pos - self.visible + 1
+        self._render()
+        return "break"
+
+    def _open(self):
+        row = self.selected()
+        if row is not None and self.on_open:
+            self.on_open(row)
 
 class App:
     def __init__(self, root):
@@ -216,9 +442,15 @@ class App:
         self.sidebar_frame = None
         self.content_frame = None
         self.sidebar_buttons = {}
+        self.login_button = None
+        self.login_pending = False
+        self.upload_pending = False
+        self.tasks = tasks.TaskRunner(root)
+        self.tasks.start_heartbeat()
         self.show_login()
 
     def show_login(self):
+        self.tasks.navigate("Login")
         if self.shell_frame:
             self.shell_frame.destroy()
             self.shell_frame = None
@@ -241,7 +473,8 @@ class App:
         self.password_entry = self.v.entry(form, show="*")
         self.password_entry.pack(fill="x", padx=30, pady=(4, 24))
         buttons = self.v.frame(form, BG_PANEL); buttons.pack(fill="x", padx=30, pady=12)
-        self.v.button(buttons, "Login", self.attempt_login, ACCENT_PINK).pack(fill="x", pady=6)
+        self.login_button = self.v.button(buttons, "Login", self.attempt_login, ACCENT_PINK)
+        self.login_button.pack(fill="x", pady=6)
         self.v.button(buttons, "Create Account", self.open_create_account, SIDEBAR_BLUE).pack(fill="x", pady=6)
         self.v.button(buttons, "Forgot Password", self.open_forgot_password, PRIMARY_DEEP).pack(fill="x", pady=6)
         self.root.bind("<Return>", lambda _e: self.attempt_login())
@@ -252,17 +485,50 @@ class App:
         if not username or not password:
             messagebox.showerror("Missing Data", "Please enter both username and password.")
             return
+        if self.login_pending:
+            return
         user = self.users.find(username)
         if not user:
             messagebox.showerror("Login Failed", "No such user. Please create an account.")
             return
-        if not hmac.compare_digest(login.make_hash(password, user.salt), user.pwd_hash):
-            messagebox.showerror("Login Failed", "Wrong password. Please try again.")
-            return
-        self.active_user = username
-        self.active_role = user.role
-        self.show_shell()
-        self.show_role_dashboard()
+        self.login_pending = True
+        self.login_button.configure(text="Verifying...", state="disabled")
+        def verified(ok, error):
+            self.login_pending = False
+            if self.login_button.winfo_exists():
+                self.login_button.configure(text="Login", state="normal")
+            if error:
+                messagebox.showerror("Login Failed", f"Unable to verify password: {error}"); return
+            if not ok:
+                messagebox.showerror("Login Failed", "Wrong password. Please try again."); return
+            if isinstance(ok, tuple):
+                # the stored hash is outdated: the worker made a new one, store it here
+                login.upgrade_password(self.users, user, password, ok)
+            self.active_user = username
+            self.active_role = user.role
+            self.show_shell()
+            self.show_role_dashboard()
+        self.off_thread(lambda: login.check_password(self.users, user, password, upgrade=False), verified)
+
+    def off_thread(self, fn, done):
+        """Run fn() on its own thread, then done(result, error) on the Tk thread
+
+        For password hashing: the KDF takes tens of milliseconds, and unlike
+        tasks.submit the result is delivered even if the screen changes.
+        """
+        result = {}
+        def run():
+            try:
+                result["value"] = fn()
+            except Exception as e:
+                result["error"] = e
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        def poll():
+            if worker.is_alive():
+                self.root.after(20, poll); return
+            done(result.get("value"), result.get("error"))
+        self.root.after(20, poll)
 
     def open_create_account(self):
         d = self.v.toplevel(self.root, "Create Account", "420x360")
@@ -309,12 +575,26 @@ class App:
                 messagebox.showerror("Weak Password", "Password must be more than 4 characters."); return
             if self.users.find(name):
                 messagebox.showerror("Duplicate User", "This username already exists."); return
-            salt = login.make_salt(); pwd_hash = login.make_hash(secret, salt)
-            ans_salt = login.make_salt(); ans_hash = login.make_hash(answer, ans_salt)
-            self.users.add(name, role, salt, pwd_hash, question, ans_salt, ans_hash)
-            login.save_users(self.users)
-            messagebox.showinfo("Account", "Account created successfully."); d.destroy()
-        self.v.button(d, "Save Account", save, SIDEBAR_BLUE).pack(pady=(0, 18))
+            def hashes():
+                salt, ans_salt = login.make_salt(), login.make_salt()
+                return salt, login.hash_password(secret, salt), ans_salt, login.hash_password(answer, ans_salt)
+            def hashed(result, error):
+                if save_button.winfo_exists():
+                    save_button.configure(text="Save Account", state="normal")
+                if error:
+                    messagebox.showerror("Account", f"Unable to create account: {error}"); return
+                if self.users.find(name):
+                    messagebox.showerror("Duplicate User", "This username already exists."); return
+                salt, pwd_hash, ans_salt, ans_hash = result
+                self.users.add(name, role, salt, pwd_hash, question, ans_salt, ans_hash)
+                login.save_users(self.users)
+                messagebox.showinfo("Account", "Account created successfully.")
+                if d.winfo_exists():
+                    d.destroy()
+            save_button.configure(text="Saving...", state="disabled")
+            self.off_thread(hashes, hashed)
+        save_button = self.v.button(d, "Save Account", save, SIDEBAR_BLUE)
+        save_button.pack(pady=(0, 18))
 
     def open_forgot_password(self):
         d = self.v.toplevel(self.root, "Password Help", "420x260")
@@ -341,13 +621,26 @@ class App:
                     messagebox.showerror("Missing Data", "Answer and password are required."); return
                 if len(new_secret) <= 4:
                     messagebox.showerror("Weak Password", "Password must be more than 4 characters."); return
-                if login.make_hash(ans, u.ans_salt) != u.ans_hash:
-                    messagebox.showerror("Incorrect Answer", "Security answer does not match."); return
-                new_salt = login.make_salt(); new_hash = login.make_hash(new_secret, new_salt)
-                u.salt = new_salt; u.pwd_hash = new_hash
-                login.save_users(self.users)
-                messagebox.showinfo("Updated", "Password has been reset."); reset.destroy(); d.destroy()
-            self.v.button(reset, "Save New Password", save_new, SIDEBAR_BLUE).pack(pady=(0, 18))
+                def check_and_hash():
+                    if not login.verify_password(ans, u.ans_salt, u.ans_hash):
+                        return None
+                    return login.new_password_hash(new_secret)
+                def done(hashed, error):
+                    if save_button.winfo_exists():
+                        save_button.configure(text="Save New Password", state="normal")
+                    if error:
+                        messagebox.showerror("Password Help", f"Unable to reset password: {error}"); return
+                    if not hashed:
+                        messagebox.showerror("Incorrect Answer", "Security answer does not match."); return
+                    login.set_password(u, new_secret, hashed)
+                    login.save_users(self.users)
+                    messagebox.showinfo("Updated", "Password has been reset.")
+                    if d.winfo_exists():
+                        d.destroy()
+                save_button.configure(text="Checking...", state="disabled")
+                self.off_thread(check_and_hash, done)
+            save_button = self.v.button(reset, "Save New Password", save_new, SIDEBAR_BLUE)
+            save_button.pack(pady=(0, 18))
         self.v.button(d, "Continue", go, SIDEBAR_BLUE).pack(pady=(0, 18))
 
     def show_shell(self):
@@ -383,12 +676,24 @@ class App:
             self.sidebar_buttons[text] = b
 
     def container(self, title_text):
+        self.tasks.navigate(title_text)
         self.v.clear(self.content_frame)
         self.v.label(self.content_frame, title_text, TITLE, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x", padx=20, pady=(20, 10))
         div = self.v.frame(self.content_frame, NEUTRAL_GRAYBLUE); div.configure(height=2); div.pack(fill="x", padx=20, pady=(0, 10))
         c = self.v.frame(self.content_frame, BG_PANEL); c.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         return c
 
+    def load(self, parent, fn, done, text="Loading..."):
+        """Run fn() in the background with a placeholder in parent, then done(result) on the Tk thread"""
+        placeholder = self.v.label(parent, text, SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w")
+        placeholder.pack(fill="x", pady=4)
+        def finished(result):
+            placeholder.destroy()
+            done(result)
+        def failed(exc):
+            placeholder.configure(text=f"Could not load: {exc}")
+        return self.tasks.submit(fn, finished, failed)
+
     def logout(self):
         self.active_user = ""
         self.active_role = ""
@@ -453,25 +758,22 @@ class App:
 
     def student_exam_schedule(self):
         roll, sec = self.student_roll_and_section()
-        names = student_subjects(roll)
-        codes = [code_by_name(nm) for nm in names]
-        schedule = exams_payload().get("exam_schedule", [])
-        matched = []
-        for item in schedule:
-            scode = item.get("subject_code") or item.get("code")
-            if scode in codes:
-                matched.append((item.get("subject_name", name_by_code(scode)), scode, item.get("exam_date", "")))
+        codes = [code_by_name(nm) for nm in student_subjects(roll)]
+        exams = examschedule.schedule(ROOT).for_codes(codes)       # already in date order
         c = self.container("My Exam Schedule")
-        if not matched:
+        if not exams:
             self.v.label(c, "No exam dates found for your subjects.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x")
             return
+        today = datetime.now().date()
+        upcoming = [e for e in exams if e[0] and e[0] >= today]
+        if upcoming:
+            day, code, name, text = upcoming[0]
+            self.v.label(c, f"Next exam: {name or name_by_code(code)} on {text} (in {(day - today).days} day(s))",
+                         BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x", pady=(0, 8))
+        rows = [(name or name_by_code(code), code, text, day or datetime.max.date()) for day, code, name, text in exams]
         cols = ("Subject", "Code", "Exam Date")
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=10)
-        for col in cols:
-            tree.heading(col, text=col); tree.column(col, anchor="center", width=200)
-        tree.pack(fill="both", expand=True)
-        for nm, code, date in matched:
-            tree.insert("", "end", values=(nm, code, date))
+        self.v.table(c, cols, rows, widths=dict.fromkeys(cols, 200), height=10,
+                     sort_keys={"Exam Date": lambda r: r[3]}).pack(fill="both", expand=True)
 
     def _add_scroll(self, parent):
         outer = self.v.frame(parent, BG_PANEL)
@@ -492,23 +794,20 @@ class App:
 
     def student_view_attendance(self):
         roll, _ = self.student_roll_and_section()
-        data = attendance_master().get("attendance_records", {}).get(roll, {})
-        subjects = data.get("subjects", {})
         c = self.container("My Attendance")
-        cols = ("Subject", "Name", "Sessions", "Present", "Percent", "Updated")
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=12)
-        for col in cols:
-            tree.heading(col, text=col); tree.column(col, anchor="center", width=140)
-        tree.pack(fill="both", expand=True)
-        for code, det in subjects.items():
-            tree.insert("", "end", values=(code, det.get("subject_name", code), det.get("total_working_days", 0),
-                                           det.get("total_present_days", 0), f"{det.get('attendance_percentage', 0.0):.2f}%",
-                                           det.get("last_updated", "-")))
-        if subjects:
-            try:
-                from matplotlib.figure import Figure
-                from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-                plot_host = self._add_scroll(c)
+        def build():
+            data = repository.backend().attendance_for_roll(PATH_ATTENDANCE, roll) or {}
+            subjects = data.get("subjects", {})
+            rows = [(code, det.get("subject_name", code), det.get("total_working_days", 0),
+                     det.get("total_present_days", 0), f"{det.get('attendance_percentage', 0.0):.2f}%",
+                     det.get("last_updated", "-"), det.get("attendance_percentage", 0.0))
+                    for code, det in subjects.items()]
+            fig = None
+            if subjects:
+                try:
+                    from matplotlib.figure import Figure
+                except Exception:
+                    return rows, None
                 bar_count = len(subjects)
                 fig_h = max(3.5, min(10.0, 0.45 * bar_count))
                 fig = Figure(figsize=(7.0, fig_h), dpi=100)
@@ -520,13 +819,26 @@ class App:
                 ax.set_xlabel("Percentage")
                 ax.set_title(f"Attendance % for {roll}")
                 fig.tight_layout()
+            return rows, fig
+        def show(result):
+            rows, fig = result
+            cols = ("Subject", "Name", "Sessions", "Present", "Percent", "Updated")
+            self.v.table(c, cols, rows, height=12, sort_keys={"Percent": lambda r: r[6]}).pack(fill="both", expand=True)
+            if not rows:
+                return
+            try:
+                from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+                if fig is None:
+                    raise ImportError("matplotlib")
+                plot_host = self._add_scroll(c)
                 canvas = FigureCanvasTkAgg(fig, master=plot_host); canvas.draw(); canvas.get_tk_widget().pack(fill="both", expand=True, pady=8)
             except Exception:
                 self.v.label(c, "Graph unavailable. Install matplotlib.", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x", pady=8)
+        self.load(c, build, show)
 
     def student_attendance_summary(self):
         roll, _ = self.student_roll_and_section()
-        data = attendance_master().get("attendance_records", {}).get(roll, {})
+        data = repository.backend().attendance_for_roll(PATH_ATTENDANCE, roll) or {}
         c = self.container("Attendance Summary")
         if not data:
             self.v.label(c, "No attendance data found.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
@@ -548,44 +860,68 @@ class App:
             self.v.label(c, "You are not assigned to any section yet.", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x", pady=8)
             return
 
-        topics_db = load_json(PATH_TOPICS, {})
+        topics_db = topics_map()
         sec_topics = topics_db.get(sec, [])
         if not sec_topics:
             self.v.label(c, "No topics have been recorded for your section.", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x", pady=8)
             return
 
-        grouped = {}
-        for t in sec_topics:
-            subj = t.get("subject", "(unknown)").strip()
-            grouped.setdefault(subj, []).append(t)
-
-        for subj, items in grouped.items():
-            self.v.label(c, f"{subj}:", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x", pady=(12,4))
-            for it in items:
-                date = it.get("date", "")
-                topictext = it.get("topic", "(no description)")
-                display = f"• {topictext}" + (f"  [{date}]" if date else "")
-                self.v.label(c, display, SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x", pady=2)
+        # one row per topic, grouped by subject in the order recorded
+        rows = [(t.get("subject", "(unknown)").strip(), t.get("topic", "(no description)"), t.get("date", ""), i)
+                for i, t in enumerate(sec_topics)]
+        self.v.table(c, ("Subject", "Topic", "Date"), rows, widths={"Subject": 160, "Topic": 420, "Date": 110},
+                     sort_keys={"Subject": lambda r: (r[0].lower(), r[3]),
+                                "Date": lambda r: (search.iso_date(r[2]) or "", r[3])}).pack(fill="both", expand=True, pady=(8, 0))
 
     def student_submit_assignment(self):
         roll, sec = self.student_roll_and_section()
         c = self.container("Submit Assignment")
         self.v.label(c, "Select a PDF to submit.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x")
+        bar = ttk.Progressbar(c, mode="determinate", maximum=100)
+        status = self.v.label(c, "", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w")
         def choose():
+            if self.upload_pending:
+                return
             path = filedialog.askopenfilename(title="Select Assignment PDF", filetypes=[("PDF Files", "*.pdf")])
             if not path:
                 return
             if not path.lower().endswith(".pdf"):
                 messagebox.showerror("File", "Only PDF files allowed."); return
-            dest_folder = os.path.join(PATH_ASSIGNMENTS, sec or "UNASSIGNED")
-            os.makedirs(dest_folder, exist_ok=True)
-            dest_path = os.path.join(dest_folder, f"{roll}.pdf")
-            try:
-                shutil.copy2(path, dest_path)
-                messagebox.showinfo("Assignment", f"Submitted: {dest_path}")
-            except Exception as e:
-                messagebox.showerror("Assignment", str(e))
-        self.v.button(c, "Choose PDF and Submit", choose, SIDEBAR_BLUE).pack(pady=10)
+            # copy and hash on a worker thread; the Tk thread only polls the progress
+            progress, result = {"done": 0, "total": 0}, {}
+            def report(done, total):
+                progress["done"], progress["total"] = done, total
+            def upload():
+                try:
+                    result["version"] = assignments.store_submission(
+                        roll, sec or "UNASSIGNED", path, PATH_ASSIGNMENTS, report)
+                except Exception as e:
+                    result["error"] = e
+            # not a daemon: closing the window lets a running copy finish
+            worker = threading.Thread(target=upload)
+            self.upload_pending = True
+            submit_button.configure(text="Uploading...", state="disabled")
+            bar.pack(fill="x", pady=(8, 2)); status.pack(fill="x")
+            worker.start()
+            def poll():
+                if bar.winfo_exists() and progress["total"]:
+                    bar["value"] = progress["done"] * 100 / progress["total"]
+                    status.configure(text=f"{progress['done'] / 2**20:.1f} of {progress['total'] / 2**20:.1f} MB")
+                if worker.is_alive():
+                    self.root.after(50, poll); return
+                self.upload_pending = False
+                if submit_button.winfo_exists():
+                    submit_button.configure(text="Choose PDF and Submit", state="normal")
+                if "error" in result:
+                    messagebox.showerror("Assignment", str(result["error"])); return
+                v = result["version"]
+                if v["new_content"]:
+                    pdftext.service(PATH_ASSIGNMENTS).queue(v["sha256"])
+                note = "" if v["new_content"] else "\nSame file as an earlier upload; stored only once."
+                messagebox.showinfo("Assignment", f"Submitted version {v['version']} of {os.path.basename(path)}{note}")
+            self.root.after(50, poll)
+        submit_button = self.v.button(c, "Choose PDF and Submit", choose, SIDEBAR_BLUE)
+        submit_button.pack(pady=10)
 
     def dashboard_admin(self):
         items = [
@@ -597,6 +933,7 @@ class App:
             ("Assign section to student (choose from list)", self.admin_assign_section_to_student),
             ("Assign sections to teacher", self.admin_assign_sections_to_teacher),
             ("Set/Update exam dates", self.admin_set_exam_dates),
+            ("Generate exam timetable", self.admin_generate_timetable),
             ("View all exam dates", self.admin_view_all_exam_dates),
             ("View section assignments", self.admin_view_section_assignments),
             ("View student info", self.admin_view_student_info),
@@ -610,22 +947,26 @@ class App:
         subjects = subject_list()
         sections = section_list()
         teachers = teacher_sections_map()
-        att = attendance_master()
-        students_count = len(att.get("attendance_records", {}))
         stats_frame = self.v.frame(c, "#FFFFFF", border=True)
         stats_frame.pack(fill="x", padx=0, pady=8)
         metrics = [
-            ("Students", students_count, "Onboarded learners"),
+            ("Students", "...", "Onboarded learners"),
             ("Subjects", len(subjects), "Academic offerings"),
             ("Sections", len(sections), "Active homerooms"),
             ("Teachers", len(teachers), "Faculty mapped"),
         ]
+        values = {}
         for title, value, desc in metrics:
             card = self.v.frame(stats_frame, "#FFFFFF", border=True)
             card.pack(side="left", expand=True, fill="both", padx=8, pady=8)
-            self.v.label(card, str(value), HEADING, PRIMARY_DEEP, "#FFFFFF").pack(pady=(18, 4))
+            values[title] = self.v.label(card, str(value), HEADING, PRIMARY_DEEP, "#FFFFFF")
+            values[title].pack(pady=(18, 4))
             self.v.label(card, title.upper(), SMALL, NEUTRAL_GRAYBLUE, "#FFFFFF").pack()
             self.v.label(card, desc, SMALL, PRIMARY_DEEP, "#FFFFFF").pack(pady=(4, 16))
+        # the count comes from the attendance manifest; fill it in when ready
+        self.tasks.submit(lambda: attendance_log.student_count(PATH_ATTENDANCE),
+                          lambda n: values["Students"].configure(text=str(n)),
+                          lambda _e: values["Students"].configure(text="-"))
         quick = self.v.frame(c, BG_PANEL, border=True)
         quick.pack(fill="x", pady=18)
         self.v.label(quick, "Quick Actions", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x", padx=18, pady=(16, 8))
@@ -653,10 +994,14 @@ class App:
             code = code_ent.get().strip().upper(); name = name_ent.get().strip()
             if not code or not name:
                 messagebox.showerror("Input", "Code and name required."); return
-            subs = subject_list()
-            if any(s.get("code") == code for s in subs):
+            if any(s.get("code") == code for s in subject_list()):
                 messagebox.showerror("Duplicate", "Subject code already exists."); return
-            subs.append({"code": code, "name": name}); save_json(PATH_SUBJECTS, {"subjects": subs})
+            def add(data):
+                subs = data.get("subjects", []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
+                if not any(s.get("code") == code for s in subs):
+                    subs.append({"code": code, "name": name})
+                return {"subjects": subs}
+            if not update_json(PATH_SUBJECTS, {"subjects": []}, add): return
             messagebox.showinfo("Subject", "Subject added."); self.admin_list_subjects()
         self.v.button(c, "Save", save, SIDEBAR_BLUE).pack(pady=8)
 
@@ -667,12 +1012,8 @@ class App:
             self.v.label(c, "No subjects found. Use 'Add subject' to create one.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x")
             return
         cols = ("Code", "Name")
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=12)
-        for col in cols:
-            tree.heading(col, text=col); tree.column(col, anchor="center", width=220)
-        tree.pack(fill="both", expand=True)
-        for s in subs:
-            tree.insert("", "end", values=(s.get("code",""), s.get("name","")))
+        rows = [(s.get("code",""), s.get("name","")) for s in subs]
+        self.v.table(c, cols, rows, widths=dict.fromkeys(cols, 220), height=12).pack(fill="both", expand=True)
 
     def admin_create_section(self):
         c = self.container("Create Section")
@@ -682,15 +1023,15 @@ class App:
             if not s: messagebox.showerror("Input", "Invalid section."); return
             lst = section_list()
             if s in lst: messagebox.showerror("Duplicate", "Section already exists."); return
-            lst.append(s); save_json(PATH_SECTIONLIST, sorted(lst))
-            section_subjects = section_subjects_map()
-            if s in ["AI", "BI", "CI", "DI"]:
-                section_subjects[s] = ["Basic Maths", "English-I", "C Lang", "Electronics", "Computer Networking"]
-            elif s in ["AIII", "BIII", "CIII", "DIII"]:
-                section_subjects[s] = ["DSA", "English-III", "Maths-III", "Artificial Intelligence", "Operating System"]
-            elif s in ["AV", "BV", "CV", "DV"]:
-                section_subjects[s] = ["English-V", "Machine Learning", "Algorithm", "OOP", "Database"]
-            save_json(PATH_SECTIONSUBJECTS, section_subjects)
+            if not update_json(PATH_SECTIONLIST, [], lambda cur: sorted({str(x).strip().upper() for x in cur if str(x).strip()} | {s})): return
+            def add_subjects(section_subjects):
+                if s in ["AI", "BI", "CI", "DI"]:
+                    section_subjects[s] = ["Basic Maths", "English-I", "C Lang", "Electronics", "Computer Networking"]
+                elif s in ["AIII", "BIII", "CIII", "DIII"]:
+                    section_subjects[s] = ["DSA", "English-III", "Maths-III", "Artificial Intelligence", "Operating System"]
+                elif s in ["AV", "BV", "CV", "DV"]:
+                    section_subjects[s] = ["English-V", "Machine Learning", "Algorithm", "OOP", "Database"]
+            update_json(PATH_SECTIONSUBJECTS, {}, add_subjects)
             messagebox.showinfo("Section", f"Section {s} created."); self.admin_list_sections()
         self.v.button(c, "Create", save, SIDEBAR_BLUE).pack(pady=8)
 
@@ -700,17 +1041,12 @@ class App:
         if not secs:
             self.v.label(c, "No sections found. Use 'Create section' to add one.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x")
             return
-        cols = ("Section",)
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=12)
-        for col in cols: tree.heading(col, text=col); tree.column(col, anchor="center", width=200)
-        tree.pack(fill="both", expand=True)
-        for s in secs:
-            tree.insert("", "end", values=(s,))
+        self.v.table(c, ("Section",), [(s,) for s in secs], widths={"Section": 200}, height=12).pack(fill="both", expand=True)
 
     def admin_assign_section_to_student(self):
         c = self.container("Assign Section to Student")
         rmap = rollnumbers_map().get("map", {}).get("student", {})
-        secmap = sections_map(); lst = section_list()
+        lst = section_list()
 
         nb = ttk.Notebook(c)
         nb.pack(fill="both", expand=True)
@@ -743,11 +1079,7 @@ class App:
                 sec = section_var.get().strip()
                 if not roll or not sec:
                     messagebox.showerror("Input", "Choose student and section."); return
-                secmap[roll] = sec; save_json(PATH_SECTIONS, secmap)
-                sec_subjects = section_subjects_map().get(sec, [])
-                studentsubj = load_json(PATH_STUDENTSUBJECTS, {}); studentsubj[roll] = {"section": sec, "subjects": sec_subjects}
-                save_json(PATH_STUDENTSUBJECTS, studentsubj)
-                ensure_student_attendance(roll, sec, sec_subjects)
+                assign_student_section(roll, sec)
                 messagebox.showinfo("Assigned", f"Assigned {roll} to section {sec}.")
                 self.admin_view_section_assignments()
             self.v.button(tab_select, "Assign", assign_sel, SIDEBAR_BLUE).pack(pady=10)
@@ -763,11 +1095,7 @@ class App:
                 messagebox.showerror("Input", "Enter roll and section."); return
             if sec not in lst:
                 messagebox.showerror("Input", "Section not found. Create section first."); return
-            secmap[roll] = sec; save_json(PATH_SECTIONS, secmap)
-            sec_subjects = section_subjects_map().get(sec, [])
-            studentsubj = load_json(PATH_STUDENTSUBJECTS, {}); studentsubj[roll] = {"section": sec, "subjects": sec_subjects}
-            save_json(PATH_STUDENTSUBJECTS, studentsubj)
-            ensure_student_attendance(roll, sec, sec_subjects)
+            assign_student_section(roll, sec)
             messagebox.showinfo("Assigned", f"Assigned {roll} to section {sec}.")
             self.admin_view_section_assignments()
         self.v.button(tab_manual, "Assign", assign_manual, SIDEBAR_BLUE).pack(pady=10)
@@ -787,8 +1115,9 @@ class App:
             missing = [s for s in lst if s not in sec_all]
             if missing:
                 messagebox.showerror("Input", f"Unknown sections: {', '.join(missing)}"); return
-            tmap[tname] = sorted(set(lst)); save_json(PATH_TEACHERSECTIONS, tmap)
-            messagebox.showinfo("Teacher", f"Assigned sections {', '.join(tmap[tname])} to {tname}.")
+            chosen = sorted(set(lst))
+            if not update_json(PATH_TEACHERSECTIONS, {}, lambda cur: cur.update({tname: chosen})): return
+            messagebox.showinfo("Teacher", f"Assigned sections {', '.join(chosen)} to {tname}.")
         self.v.button(c, "Save", save, SIDEBAR_BLUE).pack(pady=8)
 
     def admin_set_exam_dates(self):
@@ -802,42 +1131,92 @@ class App:
         def save_date():
             code = code_var.get().strip().upper(); date_str = date_ent.get().strip()
             if not code or not date_str: messagebox.showerror("Input", "Code and date required."); return
-            payload = exams_payload(); found = False
-            for item in payload.get("exam_schedule", []):
-                if (item.get("subject_code") or item.get("code")) == code:
-                    item["subject_code"] = code; item["exam_date"] = date_str; found = True; break
-            if not found:
+            def set_date(payload):
+                for item in payload.setdefault("exam_schedule", []):
+                    if (item.get("subject_code") or item.get("code")) == code:
+                        item["subject_code"] = code; item["exam_date"] = date_str; return
                 name = next((s["name"] for s in subs if s["code"] == code), "")
-                payload.setdefault("exam_schedule", []).append({"subject_code": code, "subject_name": name, "exam_date": date_str})
-            save_json(PATH_EXAMS, payload); messagebox.showinfo("Exams", "Exam date saved.")
+                payload["exam_schedule"].append({"subject_code": code, "subject_name": name, "exam_date": date_str})
+            if not update_json(PATH_EXAMS, {"exam_schedule": []}, set_date): return
+            clashes = timetable.clashes(PATH_SECTIONSUBJECTS, PATH_SUBJECTS, PATH_EXAMS)
+            if clashes:
+                lines = [f"{sec}: {', '.join(names)} on {when}" for sec, when, names in clashes[:10]]
+                messagebox.showwarning("Exams", "Exam date saved, but these sections have two exams on one day:\n" + "\n".join(lines))
+            else:
+                messagebox.showinfo("Exams", "Exam date saved.")
         self.v.button(c, "Save Date", save_date, SIDEBAR_BLUE).pack(pady=8)
 
+    def admin_generate_timetable(self):
+        c = self.container("Generate Exam Timetable")
+        fields = {}
+        for key, text, value in (("start", "First exam day (DD/MM/YYYY)", ""),
+                                 ("blackout", "Blackout dates (comma separated, optional)", ""),
+                                 ("per_day", "Maximum exams per section per day", "1")):
+            self.v.label(c, text, BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x")
+            fields[key] = self.v.entry(c); fields[key].insert(0, value); fields[key].pack(fill="x", pady=6)
+        status = self.v.label(c, "", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w")
+        cols = ("Exam Date", "Code", "Subject", "Sections")
+        table = self.v.table(c, cols, widths={"Exam Date": 140, "Code": 120, "Subject": 320, "Sections": 100}, height=12,
+                             sort_keys={"Exam Date": lambda r: search.iso_date(r[0]) or r[0]})
+        state = {"rows": []}
+        def generate():
+            try:
+                start = timetable.parse_date(fields["start"].get())
+                blackout = [timetable.parse_date(t) for t in fields["blackout"].get().split(",") if t.strip()]
+            except ValueError:
+                messagebox.showerror("Input", "Dates must be DD/MM/YYYY."); return
+            per_day = fields["per_day"].get().strip()
+            per_day = int(per_day) if per_day.isdigit() and int(per_day) > 0 else 1
+            status.configure(text="Scheduling...")
+            def done(rows):
+                state["rows"] = rows
+                table.set_rows([(d.strftime(timetable.DATE_FORMAT), code, name, n) for d, code, name, n in rows])
+                status.configure(text=f"{len(rows)} exams on {len({r[0] for r in rows})} day(s)" if rows
+                                 else "No section subject allocations found.")
+            self.tasks.submit(lambda: timetable.make_timetable(PATH_SECTIONSUBJECTS, PATH_SUBJECTS, start, blackout, per_day),
+                              done, lambda e: status.configure(text=f"Could not schedule: {e}"))
+        def save():
+            if not state["rows"]: messagebox.showerror("Timetable", "Generate a timetable first."); return
+            try:
+                timetable.write_timetable(state["rows"], PATH_EXAMS)
+            except Exception as e:
+                messagebox.showerror("File Error", f"Unable to save {os.path.basename(PATH_EXAMS)}: {e}"); return
+            messagebox.showinfo("Exams", f"Saved {len(state['rows'])} exam dates.")
+        buttons = self.v.frame(c, BG_PANEL)
+        buttons.pack(fill="x", pady=8)
+        self.v.button(buttons, "Generate", generate, SIDEBAR_BLUE).pack(side="left", padx=(0, 8))
+        self.v.button(buttons, "Save to exam dates", save, SIDEBAR_BLUE).pack(side="left")
+        status.pack(fill="x", pady=4)
+        table.pack(fill="both", expand=True)
+
     def admin_view_all_exam_dates(self):
         c = self.container("Exam Dates (All Subjects)")
         data = exams_payload().get("exam_schedule", [])
         if not data:
             self.v.label(c, "No exam dates set.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
         cols = ("Subject", "Code", "Exam Date")
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=12)
-        for col in cols: tree.heading(col, text=col); tree.column(col, anchor="center", width=220)
-        tree.pack(fill="both", expand=True)
-        for item in data:
-            tree.insert("", "end", values=(item.get("subject_name",""), item.get("subject_code",""), item.get("exam_date","")))
+        rows = [(item.get("subject_name",""), item.get("subject_code",""), item.get("exam_date","")) for item in data]
+        self.v.table(c, cols, rows, widths=dict.fromkeys(cols, 220), height=12,
+                     sort_keys={"Exam Date": lambda r: search.iso_date(r[2]) or r[2]}).pack(fill="both", expand=True)
+        status = self.v.label(c, "", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w")
+        def export():
+            status.configure(text="Writing calendars...")
+            self.tasks.submit(lambda: examschedule.export_ics(ROOT),
+                              lambda paths: status.configure(text=f"Wrote {len(paths)} section calendar(s) to "
+                                                                  f"{examschedule.calendar_dir(ROOT)}"),
+                              lambda e: status.configure(text=f"Could not export: {e}"))
+        self.v.button(c, "Export section calendars (ICS)", export, SIDEBAR_BLUE).pack(pady=8)
+        status.pack(fill="x")
 
     def admin_view_section_assignments(self):
         c = self.container("Section Assignments")
         mapping = sections_map()
         if not mapping:
             self.v.label(c, "No students assigned yet.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
-        bysec = {}
-        for roll, sec in mapping.items():
-            sec = str(sec).strip().upper(); bysec.setdefault(sec, []).append(roll)
-        cols = ("Section", "Students")
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=12)
-        for col in cols: tree.heading(col, text=col); tree.column(col, anchor="center", width=280)
-        tree.pack(fill="both", expand=True)
-        for sec, rolls in sorted(bysec.items()):
-            tree.insert("", "end", values=(sec, ", ".join(sorted(rolls))))
+        # one row per student rather than one joined string per section
+        rows = sorted((str(sec).strip().upper(), roll) for roll, sec in mapping.items())
+        cols = ("Section", "Student Roll")
+        self.v.table(c, cols, rows, widths=dict.fromkeys(cols, 280), height=12).pack(fill="both", expand=True)
 
     def admin_view_student_info(self):
         c = self.container("View Student Info")
@@ -873,12 +1252,16 @@ class App:
 
             try:
                 import subject, section
-                roll = subject.getRollNumber(studentname, "student")
-                sec = section.getSectionForRoll(roll)
+                # a lookup only: a typo here must not register a new student
+                roll = subject.lookupRollNumber(studentname, "student")
+                sec = section.getSectionForRoll(roll) if roll else None
             except Exception:
                 rmap = rollnumbers_map()
-                roll = rmap.get("map", {}).get("student", {}).get(studentname, studentname)
+                roll = rmap.get("map", {}).get("student", {}).get(studentname)
                 sec = sections_map().get(roll, "Not assigned")
+            if roll is None:
+                messagebox.showerror("Unknown Student", f"No student registered as '{studentname}'.")
+                return
 
             names = student_subjects(roll)
             ensure_student_attendance(roll, sec, names)
@@ -912,11 +1295,13 @@ class App:
         items = [
             ("View my sections", self.teacher_view_sections),
             ("Mark present", self.teacher_mark_present),
+            ("Take roll call (whole section)", self.teacher_roll_call),
             ("Update attendance/ mark absent", self.teacher_update_attendance),
             ("View attendance chart", self.teacher_view_chart),
             ("Add topic covered", self.teacher_add_topic),
             ("View topics covered", self.teacher_view_topics),
             ("View submitted assignments", self.teacher_view_assignments),
+            ("Search topics & assignments", self.teacher_search),
         ]
         self.set_sidebar(items)
         self.teacher_view_sections()
@@ -926,8 +1311,11 @@ class App:
         secs = teacher_sections_map().get(self.active_user, [])
         if not secs:
             self.v.label(c, "No sections assigned.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
-        for s in secs:
-            self.v.label(c, s, BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x", pady=2)
+        counts = {}
+        for sec in sections_map().values():
+            sec = str(sec).strip().upper(); counts[sec] = counts.get(sec, 0) + 1
+        self.v.table(c, ("Section", "Students"), [(s, counts.get(s, 0)) for s in secs],
+                     widths={"Section": 200, "Students": 120}, height=12).pack(fill="both", expand=True)
 
     def teacher_mark_present(self):
         c = self.container("Mark Present")
@@ -936,8 +1324,8 @@ class App:
         def go():
             roll = roll_ent.get().strip(); code = code_ent.get().strip().upper()
             if not roll or not code: messagebox.showerror("Input", "Enter roll and subject code."); return
-            att = attendance_master(); recs = att.get("attendance_records", {})
-            if roll not in recs: messagebox.showerror("Attendance", "Student not found."); return
+            recs = attendance_master(teacher_sections_map().get(self.active_user, [])).get("attendance_records", {})
+            if roll not in recs: messagebox.showerror("Attendance", "Student not found in your sections."); return
             subs = recs[roll].get("subjects", {})
             key = code if code in subs else None
             if not key:
@@ -945,19 +1333,73 @@ class App:
                     if str(v.get("subject_name","")).strip().upper() == code.strip().upper():
                         key = k; break
             if not key: messagebox.showerror("Subject", "Subject not found for student."); return
-            det = subs[key]
-            det["total_working_days"] = int(det.get("total_working_days", 0)) + 1
-            det["total_present_days"] = int(det.get("total_present_days", 0)) + 1
-            tw = det["total_working_days"]; tp = det["total_present_days"]
-            det["attendance_percentage"] = round((tp / tw) * 100, 2) if tw else 0.0
-            det["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-            recs[roll]["subjects"][key] = det
-            att["attendance_records"] = recs
-            att.setdefault("metadata", {})["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-            save_json(PATH_ATTENDANCE, att)
-            messagebox.showinfo("Attendance", "Marked present.")
+            event = attendance_log.make_event(roll, key, True, self.active_user,
+                                              subject_name=subs[key].get("subject_name", key),
+                                              section=recs[roll].get("section"))
+            if journal_attendance([event]):
+                messagebox.showinfo("Attendance", "Marked present.")
         self.v.button(c, "Mark", go, SIDEBAR_BLUE).pack(pady=8)
 
+    def teacher_roll_call(self):
+        c = self.container("Take Roll Call")
+        mysecs = teacher_sections_map().get(self.active_user, [])
+        if not mysecs:
+            self.v.label(c, "No sections assigned.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
+        top = self.v.frame(c, BG_PANEL); top.pack(fill="x")
+        self.v.label(top, "Section", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").grid(row=0, column=0, sticky="w")
+        sec_var = tk.StringVar(value=mysecs[0])
+        ttk.Combobox(top, textvariable=sec_var, values=mysecs, state="readonly").grid(row=1, column=0, sticky="we", padx=(0, 8), pady=6)
+        self.v.label(top, "Subject code", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").grid(row=0, column=1, sticky="w")
+        code_var = tk.StringVar()
+        code_box = ttk.Combobox(top, textvariable=code_var)
+        code_box.grid(row=1, column=1, sticky="we", padx=(0, 8), pady=6)
+        self.v.label(top, "Date (YYYY-MM-DD)", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").grid(row=0, column=2, sticky="w")
+        date_ent = self.v.entry(top, width=14); date_ent.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        date_ent.grid(row=1, column=2, sticky="we", pady=6)
+        roster_host = self._add_scroll(c)
+        present_vars = {}
+
+        def load_roster(*_):
+            sec = sec_var.get().strip().upper()
+            codes = [code_by_name(nm) for nm in section_subjects_map().get(sec, [])]
+            code_box.configure(values=codes)
+            if codes and code_var.get() not in codes:
+                code_var.set(codes[0])
+            self.v.clear(roster_host); present_vars.clear()
+            rolls = repository.backend().roster(PATH_SECTIONS, sec)
+            if not rolls:
+                self.v.label(roster_host, "No students in this section.", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x"); return
+            for roll in rolls:
+                var = tk.BooleanVar(value=True)
+                tk.Checkbutton(roster_host, text=roll, variable=var, font=SMALL, fg=PRIMARY_DEEP, bg=BG_PANEL,
+                               activebackground=BG_PANEL, anchor="w").pack(fill="x")
+                present_vars[roll] = var
+
+        def save():
+            import attendance
+            sec = sec_var.get().strip().upper(); code = code_var.get().strip().upper(); date = date_ent.get().strip()
+            if not code or not present_vars:
+                messagebox.showerror("Input", "Choose a section with students and a subject code."); return
+            try:
+                datetime.strptime(date, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Input", "Date must be YYYY-MM-DD."); return
+            absentees = [roll for roll, var in present_vars.items() if not var.get()]
+            try:
+                result = attendance.mark_section_attendance(self.active_user, sec, code, date, absentees, data_dir=ROOT)
+            except ValueError as e:
+                messagebox.showerror("Subject", str(e)); return
+            if result is None:
+                messagebox.showerror("Attendance", f"You are not assigned to section {sec}."); return
+            msg = f"Marked {len(result['present'])} present, {len(result['absent'])} absent."
+            if result["not_on_roster"]:
+                msg += f"\nNot in section {sec}, not marked: {', '.join(result['not_on_roster'])}"
+            messagebox.showinfo("Attendance", msg)
+
+        sec_var.trace_add("write", load_roster)
+        self.v.button(top, "Save Roll Call", save, SIDEBAR_BLUE).grid(row=1, column=3, padx=(12, 0))
+        load_roster()
+
     def teacher_update_attendance(self):
         c = self.container("Update Attendance / Mark Absent")
         self.v.label(c, "Student roll", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); roll_ent = self.v.entry(c); roll_ent.pack(fill="x", pady=6)
@@ -969,8 +1411,8 @@ class App:
             try: tw = int(tw_ent.get().strip()); tp = int(tp_ent.get().strip())
             except Exception: messagebox.showerror("Input", "Enter numeric values."); return
             if tp > tw: messagebox.showerror("Input", "Present days cannot exceed working days."); return
-            att = attendance_master(); recs = att.get("attendance_records", {})
-            if roll not in recs: messagebox.showerror("Attendance", "Student not found."); return
+            recs = attendance_master(teacher_sections_map().get(self.active_user, [])).get("attendance_records", {})
+            if roll not in recs: messagebox.showerror("Attendance", "Student not found in your sections."); return
             subs = recs[roll].get("subjects", {})
             key = code if code in subs else None
             if not key:
@@ -978,47 +1420,90 @@ class App:
                     if str(v.get("subject_name","")).strip().upper() == code.strip().upper():
                         key = k; break
             if not key: messagebox.showerror("Subject", "Subject not found for student."); return
-            det = subs[key]
-            det["total_working_days"] = tw
-            det["total_present_days"] = tp
-            det["attendance_percentage"] = round((tp / tw) * 100, 2) if tw else 0.0
-            det["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-            recs[roll]["subjects"][key] = det
-            att["attendance_records"] = recs
-            att.setdefault("metadata", {})["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-            save_json(PATH_ATTENDANCE, att)
-            messagebox.showinfo("Attendance", "Updated.")
+            def apply(att):
+                det = att["attendance_records"][roll]["subjects"][key]
+                det["total_working_days"] = tw
+                det["total_present_days"] = tp
+                det["attendance_percentage"] = round((tp / tw) * 100, 2) if tw else 0.0
+                det["last_updated"] = datetime.now().strftime("%Y-%m-%d")
+            if update_attendance_master(apply, [recs[roll].get("section", "")]):
+                messagebox.showinfo("Attendance", "Updated.")
         self.v.button(c, "Update", go, SIDEBAR_BLUE).pack(pady=8)
 
     def teacher_view_chart(self):
         c = self.container("Attendance Chart (My Sections)")
-        try:
-            from matplotlib.figure import Figure
-            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-        except Exception:
+        import importlib.util
+        if importlib.util.find_spec("matplotlib") is None:
             self.v.label(c, "matplotlib not installed; chart unavailable.", BODY, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x"); return
         mysecs = teacher_sections_map().get(self.active_user, [])
-        att = attendance_master().get("attendance_records", {})
-        pairs = []
-        for roll, rec in att.items():
-            if rec.get("section") in mysecs:
-                for code, det in rec.get("subjects", {}).items():
-                    pairs.append((f"{det.get('subject_name', code)} ({roll})", det.get("attendance_percentage", 0.0)))
-        if not pairs:
-            self.v.label(c, "No attendance data found for your sections.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
-        pairs.sort(key=lambda x: x[1], reverse=True)
-        labels = [p[0] for p in pairs]
-        values = [p[1] for p in pairs]
-        plot_host = self._add_scroll(c)
-        fig_h = max(4.0, min(12.0, 0.45 * len(labels)))
-        fig = Figure(figsize=(8.0, fig_h), dpi=100)
-        ax = fig.add_subplot(111)
-        ax.barh(labels, values, color=SIDEBAR_BLUE)
-        ax.set_xlim(0, 100)
-        ax.set_xlabel("Attendance %")
-        ax.set_title(f"Teacher {self.active_user}")
-        fig.tight_layout()
-        canvas = FigureCanvasTkAgg(fig, master=plot_host); canvas.draw(); canvas.get_tk_widget().pack(fill="both", expand=True, pady=8)
+        if not mysecs:
+            self.v.label(c, "No sections assigned.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
+        kinds = {"By subject": "subjects", "By section": "sections", "Students": "students"}
+        bar = tk.Frame(c, bg=BG_PANEL); bar.pack(fill="x", pady=(0, 8))
+        view = tk.StringVar(value="By subject")
+        sec_var, subj_var = tk.StringVar(value=mysecs[0]), tk.StringVar()
+        ttk.Combobox(bar, textvariable=view, values=tuple(kinds), state="readonly", width=12).pack(side="left")
+        self.v.label(bar, "Section", SMALL, PRIMARY_DEEP, BG_PANEL).pack(side="left", padx=(12, 4))
+        sec_box = ttk.Combobox(bar, textvariable=sec_var, values=mysecs, state="disabled", width=8)
+        sec_box.pack(side="left")
+        self.v.label(bar, "Subject", SMALL, PRIMARY_DEEP, BG_PANEL).pack(side="left", padx=(12, 4))
+        subj_box = ttk.Combobox(bar, textvariable=subj_var, state="disabled", width=24)
+        subj_box.pack(side="left")
+        summary = self.v.label(c, "Loading attendance...", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w")
+        summary.pack(fill="x")
+        image = tk.Label(self._add_scroll(c), bg=BG_PANEL, fg=NEUTRAL_GRAYBLUE, font=SMALL)
+        image.pack(pady=8)
+        state = {"token": 0, "subjects": {}}     # subjects: section -> {"Name (CODE)": code}
+
+        def draw(*_e):
+            # charts are aggregated, cached PNGs rendered off the Tk thread;
+            # only the newest request's image is shown
+            kind = kinds[view.get()]
+            drill = kind == "students"
+            sec_box.configure(state="readonly" if drill else "disabled")
+            subj_box.configure(state="readonly" if drill else "disabled")
+            sec, code = sec_var.get(), state["subjects"].get(sec_var.get(), {}).get(subj_var.get())
+            if drill and not code:
+                return
+            state["token"] += 1
+            token = state["token"]
+            summary.configure(text="Rendering chart...")
+            def build():
+                # NumPy and matplotlib load on the worker, not the Tk thread
+                import analytics
+                import charts
+                m = analytics.matrix(PATH_ATTENDANCE, mysecs); rows = m.rows_for_sections(mysecs)
+                p50 = m.percentiles((50,), rows)[50]; median = f"{p50:.1f}%" if p50 == p50 else "-"
+                text = f"Median student attendance {median}  |  below {analytics.THRESHOLD:g}%: {len(m.shortfall(rows=rows))}"
+                return text, charts.chart(PATH_ATTENDANCE, mysecs, kind, sec, code)
+            def show(result):
+                if token != state["token"]:
+                    return
+                text, path = result
+                if path is None:
+                    summary.configure(text="No attendance data found for your sections.")
+                    image.configure(image=""); image.image = None; return
+                summary.configure(text=text)
+                photo = tk.PhotoImage(file=path)
+                image.configure(image=photo); image.image = photo
+            self.tasks.submit(build, show, lambda e: summary.configure(text=f"Could not draw the chart: {e}"))
+
+        def pick_section(*_e):
+            names = list(state["subjects"].get(sec_var.get(), {}))
+            subj_box.configure(values=names)
+            subj_var.set(names[0] if names else "")
+            draw()
+        def options():
+            import charts
+            return charts.drill_down_options(PATH_ATTENDANCE, mysecs)
+        def got_options(found):
+            state["subjects"] = {sec: {f"{name} ({code})": code for code, name in subs} for sec, subs in found}
+            pick_section()
+        view.trace_add("write", draw)
+        sec_box.bind("<<ComboboxSelected>>", pick_section)
+        subj_box.bind("<<ComboboxSelected>>", draw)
+        self.tasks.submit(options, got_options,
+                          lambda e: summary.configure(text=f"Could not load attendance: {e}"))
 
     def teacher_add_topic(self):
         c = self.container("Add Topic Covered")
@@ -1036,14 +1521,20 @@ class App:
             if not sec or not subj or not top:
                 messagebox.showerror("Missing Data", "Please enter section, subject and topic.")
                 return
-            topics_db = load_json(PATH_TOPICS, {})
-            topics_db.setdefault(sec, [])
-            topics_db[sec].append({
+            entry = {
                 "subject": subj,
                 "topic": top,
+                "teacher": self.active_user,
                 "date": datetime.now().strftime("%Y-%m-%d")
-            })
-            save_json(PATH_TOPICS, topics_db)
+            }
+            position = []
+            def add(topics_db):
+                items = topics_db.setdefault(sec, [])
+                items.append(entry)
+                position[:] = [len(items) - 1]
+            before = search.topics_signature(PATH_TOPICS)
+            if not update_json(PATH_TOPICS, {}, add): return
+            search.topic_added(PATH_TOPICS, sec, position[0], entry, before)
             messagebox.showinfo("Saved", f"Topic saved for section {sec}.")
             sec_ent.delete(0, "end"); subj_ent.delete(0, "end"); topic_ent.delete(0, "end")
 
@@ -1055,38 +1546,149 @@ class App:
         data = topics_map()
         if not mysecs:
             self.v.label(c, "No sections assigned.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
-        found = False
-        for sec in mysecs:
-            items = data.get(sec, [])
-            if items:
-                self.v.label(c, f"Section {sec}", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x", pady=(8, 4))
-                for t in items:
-                    self.v.label(c, f"{t.get('topic','')} ({t.get('date','')}) — {t.get('teacher','')}", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x", pady=2)
-                found = True
-        if not found:
-            self.v.label(c, "No topics recorded yet.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x")
+        rows = [(sec, t.get("subject", ""), t.get("topic", ""), t.get("date", ""), t.get("teacher", ""), i)
+                for sec in mysecs for i, t in enumerate(data.get(sec, []))]
+        if not rows:
+            self.v.label(c, "No topics recorded yet.", BODY, PRIMARY_DEEP, BG_PANEL, anchor="w").pack(fill="x"); return
+        self.v.table(c, ("Section", "Subject", "Topic", "Date", "Teacher"), rows,
+                     widths={"Section": 90, "Subject": 140, "Topic": 380, "Date": 110, "Teacher": 120},
+                     sort_keys={"Date": lambda r: (search.iso_date(r[3]) or "", r[0], r[5])}).pack(fill="both", expand=True)
+
+    def teacher_search(self):
+        c = self.container("Search Topics & Assignments")
+        mysecs = teacher_sections_map().get(self.active_user, [])
+        bar = tk.Frame(c, bg=BG_PANEL); bar.pack(fill="x", pady=(0, 8))
+        query_ent = self.v.entry(bar, width=30); query_ent.pack(side="left")
+        kind = tk.StringVar(value="All")
+        ttk.Combobox(bar, textvariable=kind, values=("All", "Topics", "Assignments"), state="readonly", width=12).pack(side="left", padx=6)
+        self.v.label(bar, "From", SMALL, PRIMARY_DEEP, BG_PANEL).pack(side="left")
+        since_ent = self.v.entry(bar, width=11); since_ent.pack(side="left", padx=6)
+        cols = ("Kind", "Section", "Title", "Teacher", "Date", "Score")
+        def open_selected(row):
+            if row[6].startswith("assignment:"):
+                _, sec, roll = row[6].split(":", 2)
+                self.preview_submission(sec, roll)
+        table = self.v.table(c, cols, widths=dict(dict.fromkeys(cols, 100), Title=360), on_open=open_selected,
+                             filter_label="Narrow")
+        table.tree.column("Title", anchor="w")
+        status = self.v.label(c, "Search covers your sections' topics and extracted assignment text.", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w")
+        latest = [0]    # only the newest query's results reach the table
+        def run(_e=None):
+            query = query_ent.get().strip()
+            if not query:
+                return
+            latest[0] += 1; ticket = latest[0]
+            facets = {"kind": {"Topics": "topic", "Assignments": "assignment"}.get(kind.get()),
+                      "since": search.iso_date(since_ent.get().strip())}
+            started = datetime.now()
+            status.configure(text="Searching...")
+            def find():
+                # syncing the index can reindex every topic or read new submissions' text
+                return search.search(query, PATH_TOPICS, PATH_ASSIGNMENTS, sections=mysecs, limit=50, **facets)
+            def show(results):
+                if ticket != latest[0]:
+                    return
+                ms = (datetime.now() - started).total_seconds() * 1000
+                table.set_rows([(r["kind"], r["section"], r["title"], r["teacher"] or "", r["date"] or "", r["score"], r["key"])
+                                for r in results])
+                status.configure(text=f"{len(results)} result(s) in {ms:.0f} ms")
+            def failed(exc):
+                if ticket == latest[0]:
+                    status.configure(text=f"Search failed: {exc}")
+            self.tasks.submit(find, show, failed)
+        self.v.button(bar, "Search", run, SIDEBAR_BLUE, width=8).pack(side="left")
+        query_ent.bind("<Return>", run)
+        table.pack(fill="both", expand=True)
+        status.pack(fill="x", pady=(6, 0))
+        query_ent.focus_set()
 
     def teacher_view_assignments(self):
         c = self.container("Submitted Assignments")
         mysecs = teacher_sections_map().get(self.active_user, [])
-        cols = ("Section", "Student Roll", "File")
-        tree = ttk.Treeview(c, columns=cols, show="headings", height=14)
-        for col in cols:
-            tree.heading(col, text=col); tree.column(col, anchor="center", width=220 if col!="File" else 320)
-        tree.pack(fill="both", expand=True)
-        for sec in mysecs:
-            sec_dir = os.path.join(PATH_ASSIGNMENTS, sec)
-            if not os.path.isdir(sec_dir):
-                continue
-            for f in os.listdir(sec_dir):
-                if f.lower().endswith(".pdf"):
-                    roll = os.path.splitext(f)[0]
-                    tree.insert("", "end", values=(sec, roll, f))
-
-def launch():
+        cols = ("Section", "Student Roll", "Submitted", "Size", "Versions", "Similar to", "File")
+        matches = {}    # (section, roll) -> "87% R12", filled in by the similarity check
+        def rows():
+            # rows come from the section indexes; no per-file stat here
+            return [(r["section"], r["roll"], r["submitted_at"], assignments.size_text(r["size"]), r["versions"],
+                     matches.get((r["section"], r["roll"]), ""), r["file"], r["size"])
+                    for r in assignments.list_submissions(mysecs, PATH_ASSIGNMENTS)]
+        table = self.v.table(c, cols, rows(), widths=dict(dict.fromkeys(cols, 130), File=260),
+                             sort_keys={"Size": lambda r: r[7]}, filter_label="Roll / file contains",
+                             on_open=lambda r: self.preview_submission(r[0], r[1]))
+        table.pack(fill="both", expand=True)
+        self.v.label(c, "Double-click a submission to read it.", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w").pack(fill="x", pady=(6, 0))
+        # extract anything not cached yet while the teacher looks at the list,
+        # then fill in the "Similar to" column from the MinHash signatures
+        jobs = [job for sec in mysecs for job in pdftext.service(PATH_ASSIGNMENTS).queue_section(sec)]
+        def check():
+            import similarity
+            found = {}
+            for sec in mysecs:
+                for roll, (other, sim) in similarity.best_matches(similarity.section_report(sec, PATH_ASSIGNMENTS)).items():
+                    found[(sec, roll)] = f"{sim * 100:.0f}% {other}"
+            return found
+        def show(found):
+            matches.update(found)
+            if found:
+                table.set_rows(rows(), keep_place=True)
+        # runs once the extractions finish; dropped if the teacher has left this screen
+        self.tasks.submit_after(jobs, check, show)
+
+    def preview_submission(self, sec, roll):
+        row = assignments.section_index(sec, PATH_ASSIGNMENTS).get(roll)
+        if not row:
+            return
+        path = os.path.join(PATH_ASSIGNMENTS, sec, row["file"])
+        sha = row["sha256"] or assignments.file_sha256(path)
+        d = self.v.toplevel(self.root, f"{sec} / {row['file']}", "760x560")
+        nav = tk.Frame(d, bg=BG_PANEL); nav.pack(fill="x", padx=12, pady=8)
+        text = tk.Text(d, wrap="word", font=SMALL, bg=BG_MAIN, fg=PRIMARY_DEEP, relief="flat")
+        text.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+        where = self.v.label(nav, "Extracting text...", SMALL, NEUTRAL_GRAYBLUE, BG_PANEL, anchor="w")
+        state = {"first": 1, "pages": 0}
+        def show(step=0):
+            # only the pages on screen are read from the cache
+            if not state["pages"]:
+                return
+            state["first"] = max(1, min(state["first"] + step, state["pages"]))
+            last = min(state["first"] + pdftext.PAGE_BLOCK - 1, state["pages"])
+            text.configure(state="normal"); text.delete("1.0", "end")
+            for n, body in pdftext.read_pages(sha, state["first"], last, PATH_ASSIGNMENTS):
+                text.insert("end", f"--- Page {n} ---\n\n{body.strip() or '[No text content]'}\n\n")
+            text.configure(state="disabled")
+            where.configure(text=f"Pages {state['first']}-{last} of {state['pages']}")
+        self.v.button(nav, "< Prev", lambda: show(-pdftext.PAGE_BLOCK), SIDEBAR_BLUE, width=8).pack(side="left")
+        self.v.button(nav, "Next >", lambda: show(pdftext.PAGE_BLOCK), SIDEBAR_BLUE, width=8).pack(side="left", padx=8)
+        where.pack(side="left", padx=8)
+        job = pdftext.service(PATH_ASSIGNMENTS).queue(sha, path)
+        def poll():
+            if not d.winfo_exists():
+                return
+            if not job.done():
+                self.root.after(50, poll); return
+            try:
+                state["pages"] = job.result()
+            except Exception as e:
+                where.configure(text=f"Unable to read PDF: {e}"); return
+            if not state["pages"]:
+                where.configure(text="This PDF has no pages."); return
+            show()
+        poll()
+
+def launch(on_ready=None):
+    """Open the main window; on_ready(root) runs once it is first mapped on screen"""
     root = tk.Tk()
     app = App(root)
+    if on_ready:
+        shown = []
+        def mapped(event):
+            if event.widget is root and not shown:
+                shown.append(True)
+                on_ready(root)
+        root.bind("<Map>", mapped, add="+")
     root.mainloop()
+    app.tasks.shutdown()
+    pdftext.shutdown()
 
 if __name__ == "__main__":
     launch()
\ No newline at end of file
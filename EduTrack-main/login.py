@@ -3,13 +3,41 @@ import hashlib
 import secrets
 import hmac
 import getpass
+import tempfile
+import threading
+import time
 import pwinput
 import subject
 import menu
+import store
+import repository
 BASE_DIR = os.path.dirname(__file__)
 DATAFILE = os.path.join(BASE_DIR, "userdata.bin")
 
+# Password (and security answer) hashes are "$"-separated, since ":" separates
+# the columns of userdata.bin:
+#   scrypt$<n>$<r>$<p>$<hex>        pbkdf2_sha256$<iterations>$<hex>
+# A bare 64-char hex digest is the old single salted SHA-256 (make_hash). It is
+# still accepted and is replaced with the configured KDF on the next login.
+# Pick the KDF with "password_kdf" ("scrypt"/"pbkdf2") and "password_cost"
+# (scrypt n or PBKDF2 iterations; 0 = default) in config.json.
+SCRYPT_N = 2 ** 14          # 16 MiB with r=8
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+SESSION_TTL = 15 * 60       # seconds a verified password is remembered in-process
+
+_cfg = repository.load_config()
+KDF = _cfg["password_kdf"] if _cfg["password_kdf"] in ("scrypt", "pbkdf2") else "scrypt"
+KDF_COST = int(_cfg.get("password_cost") or 0)
+
+_session_key = secrets.token_bytes(32)
+_verified = {}              # username -> (pwd_hash, keyed digest of password, expiry)
+_verified_lock = threading.Lock()
+
 class User:
+    __slots__ = ("username", "role", "salt", "pwd_hash", "question", "ans_salt", "ans_hash")
+
     def __init__(self, username, role, salt, pwd_hash, question, ans_salt, ans_hash):
         self.username = username
         self.role = role
@@ -18,37 +46,32 @@ class User:
         self.question = question
         self.ans_salt = ans_salt
         self.ans_hash = ans_hash
-        self.next = None
+
+    def fields(self):
+        return (self.username, self.role, self.salt, self.pwd_hash, self.question, self.ans_salt, self.ans_hash)
 
 class UserList:
+    """Users indexed by username; iteration keeps insertion (file) order."""
     def __init__(self):
-        self.head = None
+        self.by_name = {}
+        self.saved = {}   # username -> fields as last read from / written to disk
 
     def add(self, username, role, salt, pwd_hash, question, ans_salt, ans_hash):
+        # first entry wins, same as the old linked-list scan
+        if username in self.by_name:
+            return self.by_name[username]
         u = User(username, role, salt, pwd_hash, question, ans_salt, ans_hash)
-        if not self.head:
-            self.head = u
-        else:
-            t = self.head
-            while t.next:
-                t = t.next
-            t.next = u # type: ignore
+        self.by_name[username] = u
+        return u
 
     def find(self, username):
-        t = self.head
-        while t:
-            if t.username == username:
-                return t
-            t = t.next
-        return None
+        return self.by_name.get(username)
 
     def all(self):
-        out = []
-        t = self.head
-        while t:
-            out.append((t.username, t.role, t.salt, t.pwd_hash, t.question, t.ans_salt, t.ans_hash))
-            t = t.next
-        return out
+        return [u.fields() for u in self.by_name.values()]
+
+    def __len__(self):
+        return len(self.by_name)
 
 def load_users():
     users = UserList()
@@ -76,16 +99,47 @@ def load_users():
                     pass
     except:
         pass
+    users.saved = dict(zip(users.by_name, users.all()))
     return users
 
-def save_users(users):
+def _write_lines(lines):
+    # temp file + fsync + rename: a crash leaves either the old or the new file
+    fd, tmp = tempfile.mkstemp(prefix=".userdata.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(DATAFILE)))
     try:
-        with open(DATAFILE, "wb") as f:
-            for u in users.all():
+        with os.fdopen(fd, "wb") as f:
+            for s in lines:
                 try:
-                    f.write((":".join(u) + "\n").encode("utf-8"))
+                    f.write((s + "\n").encode("utf-8"))
                 except:
                     pass
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, DATAFILE)
+    except:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def save_users(users):
+    """Write this session's changes, keeping users other sessions saved meanwhile"""
+    try:
+        with store.lock(DATAFILE):
+            disk = load_users()
+            for name, u in users.by_name.items():
+                if users.saved.get(name) != u.fields():
+                    disk.by_name[name] = u
+            _write_lines(":".join(u) for u in disk.all())
+            # pick up accounts and password changes made by other sessions
+            for name, du in disk.by_name.items():
+                mine = users.by_name.get(name)
+                if mine is None:
+                    users.by_name[name] = du
+                elif mine is not du:
+                    for attr in User.__slots__:
+                        setattr(mine, attr, getattr(du, attr))
+            users.saved = dict(zip(users.by_name, users.all()))
     except:
         pass
 
@@ -102,6 +156,109 @@ def make_hash(text, salt):
     h.update(text.encode("utf-8"))
     return h.hexdigest()
 
+def _salt_bytes(salt):
+    try:
+        return bytes.fromhex(salt)
+    except ValueError:
+        return salt.encode("utf-8")
+
+def _scrypt(text, salt, n, r, p):
+    return hashlib.scrypt(text.encode("utf-8"), salt=_salt_bytes(salt), n=n, r=r, p=p,
+                          maxmem=128 * r * (n + p + 2) + (1 << 20), dklen=32).hex()
+
+def _pbkdf2(text, salt, iterations):
+    return hashlib.pbkdf2_hmac("sha256", text.encode("utf-8"), _salt_bytes(salt), iterations).hex()
+
+def hash_password(text, salt, kdf=None, cost=None):
+    """Hash text with the configured KDF (or the given one); returns the stored field"""
+    kdf = kdf or KDF
+    cost = cost or KDF_COST
+    if kdf == "pbkdf2":
+        n = cost or PBKDF2_ITERATIONS
+        return f"pbkdf2_sha256${n}${_pbkdf2(text, salt, n)}"
+    n = cost or SCRYPT_N
+    return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${_scrypt(text, salt, n, SCRYPT_R, SCRYPT_P)}"
+
+def needs_rehash(stored):
+    """True unless stored uses the configured KDF and cost"""
+    parts = stored.split("$")
+    if KDF == "pbkdf2":
+        return parts[:2] != ["pbkdf2_sha256", str(KDF_COST or PBKDF2_ITERATIONS)]
+    return parts[:4] != ["scrypt", str(KDF_COST or SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+
+def verify_password(text, salt, stored):
+    """Check text against a stored hash of any supported format"""
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 5:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            candidate = "$".join(parts[:4] + [_scrypt(text, salt, n, r, p)])
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 3:
+            candidate = "$".join(parts[:2] + [_pbkdf2(text, salt, int(parts[1]))])
+        elif len(parts) == 1:
+            candidate = make_hash(text, salt)
+        else:
+            return False
+    except (ValueError, MemoryError):
+        return False
+    return hmac.compare_digest(candidate, stored)
+
+def new_password_hash(password):
+    """(salt, stored hash) of a password with the configured KDF; touches no shared state"""
+    salt = make_salt()
+    return salt, hash_password(password, salt)
+
+def set_password(user, password, hashed=None):
+    """Give user a new password; hashed is new_password_hash(password) if already computed"""
+    user.salt, user.pwd_hash = hashed or new_password_hash(password)
+    forget_session(user.username)
+
+def _session_digest(username, password):
+    return hmac.new(_session_key, f"{username}\0{password}".encode("utf-8"), hashlib.sha256).digest()
+
+def forget_session(username=None):
+    with _verified_lock:
+        if username is None:
+            _verified.clear()
+        else:
+            _verified.pop(username, None)
+
+def _remember(user, password):
+    with _verified_lock:
+        _verified[user.username] = (user.pwd_hash, _session_digest(user.username, password),
+                                    time.monotonic() + SESSION_TTL)
+
+def check_password(users, user, password, upgrade=True):
+    """Verify a login; upgrades legacy/outdated hashes and remembers the result.
+
+    A password verified in the last SESSION_TTL seconds is checked against a
+    keyed in-memory digest instead of re-running the KDF. With upgrade=False
+    (from a worker thread) users and user are left alone: a correct password
+    whose hash is outdated gives the new (salt, hash) instead of True, for
+    upgrade_password() on the thread that owns users.
+    """
+    digest = _session_digest(user.username, password)
+    with _verified_lock:
+        hit = _verified.get(user.username)
+    if hit and hit[0] == user.pwd_hash and hit[2] > time.monotonic() and hmac.compare_digest(hit[1], digest):
+        return True
+    if not verify_password(password, user.salt, user.pwd_hash):
+        return False
+    if needs_rehash(user.pwd_hash):
+        hashed = new_password_hash(password)
+        if not upgrade:
+            return hashed
+        upgrade_password(users, user, password, hashed)
+    else:
+        _remember(user, password)
+    return True
+
+def upgrade_password(users, user, password, hashed):
+    """Store the (salt, hash) that check_password(upgrade=False) returned and save users"""
+    set_password(user, password, hashed)
+    save_users(users)
+    _remember(user, password)
+
 def create_account(users):
     role = input("Are you a teacher, student, or admin? (teacher/student/admin): ").strip().lower()
     if role == "admin":
@@ -141,7 +298,7 @@ def create_account(users):
     sec_q = questions[q_choice-1]
     sec_a = input("Enter answer to your security question: ").strip()
     sec_a_salt = make_salt()
-    sec_a_hash = make_hash(sec_a, sec_a_salt)
+    sec_a_hash = hash_password(sec_a, sec_a_salt)
 
     # ✅ Password length validation
     while True:
@@ -152,7 +309,7 @@ def create_account(users):
             break
 
     salt = make_salt()
-    pwd_hash = make_hash(password, salt)
+    pwd_hash = hash_password(password, salt)
 
     users.add(username, role, salt, pwd_hash, sec_q, sec_a_salt, sec_a_hash)
     save_users(users)
@@ -168,7 +325,7 @@ def login(users):
         print("No such user.")
         return
     password = pwinput.pwinput("Enter password: ", mask='*')
-    if not hmac.compare_digest(make_hash(password, user.salt), user.pwd_hash):
+    if not check_password(users, user, password):
         print("Wrong password.")
         return
     print(f"Login successful as {user.role}!")
@@ -182,14 +339,11 @@ def login(users):
             if choice == "1":
                 print(f"Security question: {user.question}")
                 ans = input("Enter answer: ").strip()
-                if make_hash(ans, user.ans_salt) != user.ans_hash:
+                if not verify_password(ans, user.ans_salt, user.ans_hash):
                     print("Incorrect answer. Cannot change password.")
                     continue
                 newpass = pwinput.pwinput("Enter new password: ", mask='*')
-                newsalt = make_salt()
-                newhash = make_hash(newpass, newsalt)
-                user.salt = newsalt
-                user.pwd_hash = newhash
+                set_password(user, newpass)
                 save_users(users)
                 print("Password changed!")
             elif choice == "2":
@@ -201,10 +355,7 @@ def login(users):
                     print("Cannot change password for another admin.")
                 else:
                     newpass = pwinput.pwinput("Enter new password for user: ", mask='*')
-                    newsalt = make_salt()
-                    newhash = make_hash(newpass, newsalt)
-                    target_user.salt = newsalt
-                    target_user.pwd_hash = newhash
+                    set_password(target_user, newpass)
                     save_users(users)
                     print("Password changed for user.")
             elif choice == "3":
@@ -222,10 +373,7 @@ def login(users):
             choice = input("Enter choice: ").strip()
             if choice == "1":
                 newpass = pwinput.pwinput("Enter new password: ", mask='*')
-                newsalt = make_salt()
-                newhash = make_hash(newpass, newsalt)
-                user.salt = newsalt
-                user.pwd_hash = newhash
+                set_password(user, newpass)
                 save_users(users)
                 print("Password changed!")
             elif choice == "2":
@@ -243,10 +391,7 @@ def login(users):
             choice = input("Enter choice: ").strip()
             if choice == "1":
                 newpass = pwinput.pwinput("Enter new password: ", mask='*')
-                newsalt = make_salt()
-                newhash = make_hash(newpass, newsalt)
-                user.salt = newsalt
-                user.pwd_hash = newhash
+                set_password(user, newpass)
                 save_users(users)
                 print("Password changed!")
             elif choice == "2":
@@ -264,13 +409,10 @@ def forgot_password(users):
         return
     print(f"Security question: {user.question}")
     ans = input("Enter answer: ").strip()
-    if make_hash(ans, user.ans_salt) != user.ans_hash:
+    if not verify_password(ans, user.ans_salt, user.ans_hash):
         return
     newpass = pwinput.pwinput("Enter new password: ", mask='*')
-    newsalt = make_salt()
-    newhash = make_hash(newpass, newsalt)
-    user.salt = newsalt
-    user.pwd_hash = newhash
+    set_password(user, newpass)
     save_users(users)
 def migrate_userdata_interactive():
     roles = ("admin", "teacher", "student")
@@ -304,7 +446,6 @@ def migrate_userdata_interactive():
                     if role in roles:
                         break
             lines.append(":".join([username, role, salt, pwd_hash, question, ans_salt, ans_hash]))
-    with open(DATAFILE, "wb") as f:
-        for s in lines:
-            f.write((s + "\n").encode("utf-8"))
+    with store.lock(DATAFILE):
+        _write_lines(lines)
     print("Migration complete.")
@@ -17,7 +17,10 @@ def updateAttendance(name, sec, subjectcode):
 
 def viewStudentInfo():
     studentname = input("Enter student username: ").strip()
-    roll = subject.getRollNumber(studentname, "student")
+    roll = subject.lookupRollNumber(studentname, "student")
+    if roll is None:
+        print(f"No student registered as '{studentname}'.")
+        return
     secmap = section.loadJson(section.sectionsFile, {})
     sec = secmap.get(roll, "Not assigned")
     print(f"\n--- Info for {studentname} ---")
@@ -27,8 +30,11 @@ def viewStudentInfo():
         exam_date.viewSectionExamDates(sec)
 
 def studentDashboard(studentname):
+    roll = subject.lookupRollNumber(studentname, "student")
+    if roll is None:
+        print(f"No student registered as '{studentname}'.")
+        return
     print(f"\n--- Dashboard for {studentname} ---")
-    roll = subject.getRollNumber(studentname, "student")
     print(f"University Roll Number: {roll}")
     secmap = section.loadJson(section.sectionsFile, {})
     sec = secmap.get(roll, "Not assigned")
@@ -50,7 +56,12 @@ def adminMenu():
         print("9. View section assignments")
         print("10. View student info")
         print("11. View any student's dashboard")
-        print("12. Back")
+        print("12. Bulk import accounts from CSV")
+        print("13. Generate end-of-term attendance reports")
+        print("14. Generate student report cards (PDF)")
+        print("15. Generate exam timetable")
+        print("16. Export exam calendars (ICS)")
+        print("17. Back")
         choice = input("Enter choice: ").strip()
         if choice == "1":
             subject.addSubject()
@@ -76,6 +87,21 @@ def adminMenu():
             name = input("Enter student username: ").strip()
             studentDashboard(name)
         elif choice == "12":
+            import onboarding
+            onboarding.bulk_import_interactive()
+        elif choice == "13":
+            import reports
+            reports.generate_interactive(attendance._resolve_path(attendance.ATTENDANCE_MASTER_FILE))
+        elif choice == "14":
+            import reportcards
+            reportcards.generate_interactive()
+        elif choice == "15":
+            import timetable
+            timetable.schedule_interactive()
+        elif choice == "16":
+            import examschedule
+            examschedule.export_interactive()
+        elif choice == "17":
             break
         else:
             print("Invalid choice.")
@@ -138,7 +164,11 @@ def teacherMenu(teachername):
         print("5. Add topic covered")
         print("6. View topics covered")
         print("7. View submitted assignments")
-        print("8. Exit")
+        print("8. Take roll call for a whole section")
+        print("9. Attendance analytics for my sections")
+        print("10. Check my sections for copied assignments")
+        print("11. Search topics and assignments")
+        print("12. Exit")
         choice = input("Enter choice: ").strip()
 
         if choice == "1":
@@ -155,7 +185,14 @@ def teacherMenu(teachername):
             attendance.update_attendance(teachername, roll, code)
 
         elif choice == "4":
-            attendance.view_attendance(teachername=teachername)
+            print("View: 1. By subject  2. By section  3. Students of one section and subject")
+            view = input("Enter choice (default 1): ").strip()
+            if view == "3":
+                sec = input("Section: ").strip().upper()
+                code = input("Subject code: ").strip().upper()
+                attendance.view_attendance(teachername=teachername, kind="students", section=sec, subject=code)
+            else:
+                attendance.view_attendance(teachername=teachername, kind="sections" if view == "2" else "subjects")
 
         elif choice == "5":
             topics.add_topic(teachername)
@@ -190,6 +227,44 @@ def teacherMenu(teachername):
             assignments.view_assignments(teachername) # type: ignore
 
         elif choice == "8":
+            sec = input("Enter section: ").strip().upper()
+            code = input("Enter subject code: ").strip().upper()
+            absent = input("Enter absent roll numbers (comma separated, blank for none): ")
+            absentees = [r.strip() for r in absent.split(",") if r.strip()]
+            try:
+                result = attendance.mark_section_attendance(teachername, sec, code, absentees=absentees)
+            except ValueError as e:
+                print(e)
+                result = None
+            if result is not None:
+                if not result["present"] and not result["absent"]:
+                    print(f"No students found in section {sec}.")
+                else:
+                    print(f"Marked {len(result['present'])} present and {len(result['absent'])} absent in section {sec}.")
+                if result["not_on_roster"]:
+                    print(f"Not in section {sec}, not marked: {', '.join(result['not_on_roster'])}")
+
+        elif choice == "9":
+            secs = section.loadJson(section.teacherSectionsFile, {}).get(teachername, [])
+            if not secs:
+                print("No sections assigned to this teacher.")
+            else:
+                import analytics
+                analytics.print_section_report(secs, attendance._resolve_path(attendance.ATTENDANCE_MASTER_FILE))
+
+        elif choice == "10":
+            secs = section.loadJson(section.teacherSectionsFile, {}).get(teachername, [])
+            if not secs:
+                print("No sections assigned to this teacher.")
+            else:
+                import similarity
+                similarity.print_report(secs)
+
+        elif choice == "11":
+            import search
+            search.search_interactive(section.loadJson(section.teacherSectionsFile, {}).get(teachername, []))
+
+        elif choice == "12":
             break
 
         else:
@@ -0,0 +1,221 @@
+import os
+import sys
+import csv
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import store
+import repository
+import attendance_log
+import subject
+import login
+
+# Bulk onboarding from a roster CSV.
+#
+#   name,role,section,password[,question,answer]
+#   ayush,student,AI,first-day-pass
+#   utkarsh pant,teacher,AI;AIII,changeme1
+#
+# Rows are streamed and validated one at a time; a bad row is reported with
+# its line number and skipped, never aborting the batch. Passwords are hashed
+# in a process pool (the KDF is deliberately slow), roll numbers are reserved
+# in one block per role, and userdata.bin, rollnumbers.json, sections.json,
+# studentsubjects.json, teachersections.json and the attendance master are
+# each written once at the end, under their usual locks. Accounts go to
+# login.DATAFILE; the JSON stores are read from data_dir (this folder by
+# default, like the GUI).
+#
+# Hashing dominates: at the login cost (scrypt n = 2**14, ~60 ms) one core
+# imports about 20 accounts/s, so 5,000 students take about four minutes.
+# Imported passwords are therefore hashed at import_cost() instead
+# ("import_password_cost" in config.json, scrypt n or PBKDF2 iterations;
+# 0 = an eighth of the login cost): about 150 accounts/s per core, 5,000
+# students in about 35 s on one core and proportionally less on more.
+# login.check_password sees that hash as outdated and rehashes it at the
+# full cost on the account's first login. Security answers are never
+# rehashed, so they always get the full cost.
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+ROLES = ("student", "teacher", "admin")
+COLUMNS = ("name", "role", "section", "password")
+MIN_PASSWORD = 5            # same rule as login.create_account
+HASH_CHUNK = 16             # rows per task sent to a hashing worker
+IMPORT_SCRYPT_N = 2 ** 11           # an eighth of login.SCRYPT_N
+IMPORT_PBKDF2_ITERATIONS = 75_000   # an eighth of login.PBKDF2_ITERATIONS
+
+
+def _path(name, data_dir):
+    return os.path.join(data_dir or DATA_DIR, name)
+
+def read_roster(csv_path):
+    """Yield (line number, row dict with lower-case keys) from a roster CSV"""
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [(h or "").strip().lower() for h in reader.fieldnames or []]
+        missing = [c for c in COLUMNS if c not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"roster is missing column(s): {', '.join(missing)}")
+        for row in reader:
+            yield reader.line_num, {k: (v or "").strip() for k, v in row.items() if k}
+
+def _validate(row, seen, users, known_sections):
+    """Error message for a roster row, or None if it can be imported"""
+    name, role = row["name"], row["role"].lower()
+    if not name:
+        return "name is empty"
+    if ":" in name or "\n" in name:
+        return "name may not contain ':'"
+    if role not in ROLES:
+        return f"unknown role '{row['role']}'"
+    if name in seen:
+        return f"duplicate of line {seen[name]}"
+    if users.find(name):
+        return "username already exists"
+    if len(row["password"]) < MIN_PASSWORD:
+        return f"password must be at least {MIN_PASSWORD} characters"
+    for sec in _sections(row):
+        if sec not in known_sections:
+            return f"unknown section '{sec}'"
+    if role == "student" and len(_sections(row)) > 1:
+        return "a student can only be in one section"
+    return None
+
+def _sections(row):
+    return [s.strip().upper() for s in row["section"].replace(",", ";").split(";") if s.strip()]
+
+def import_cost():
+    """KDF cost for imported passwords; never above the login cost"""
+    login_cost = login.KDF_COST or (login.PBKDF2_ITERATIONS if login.KDF == "pbkdf2" else login.SCRYPT_N)
+    cost = int(repository.load_config().get("import_password_cost") or 0)
+    if not cost:
+        cost = IMPORT_PBKDF2_ITERATIONS if login.KDF == "pbkdf2" else IMPORT_SCRYPT_N
+    return min(cost, login_cost)
+
+def _hash_row(item):
+    # runs in a worker process; the KDF and costs come from the parent
+    password, question, answer, kdf, cost, answer_cost = item
+    salt = login.make_salt()
+    out = [salt, login.hash_password(password, salt, kdf, cost), question, "", ""]
+    if answer:
+        out[3] = login.make_salt()
+        out[4] = login.hash_password(answer, out[3], kdf, answer_cost)
+    return out
+
+def hash_rows(rows, workers=None):
+    """[(salt, pwd_hash, question, ans_salt, ans_hash)] for rows, hashed in parallel"""
+    kdf, cost = login.KDF, import_cost()
+    items = [(r["password"], r.get("question", ""), r.get("answer", ""), kdf, cost, login.KDF_COST) for r in rows]
+    if len(items) <= HASH_CHUNK or workers == 1:
+        return [_hash_row(it) for it in items]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_hash_row, items, chunksize=HASH_CHUNK))
+
+def _attendance_record(name, sec, names, code_of, today):
+    return {
+        "name": name,
+        "section": sec,
+        "subjects": {
+            code_of.get(nm, nm): {
+                "subject_name": nm,
+                "total_working_days": 0,
+                "total_present_days": 0,
+                "attendance_percentage": 0.0,
+                "last_updated": today,
+            }
+            for nm in names
+        },
+    }
+
+def import_roster(csv_path, data_dir=None, workers=None):
+    """Import every valid row of a roster CSV; returns a summary with per-row errors"""
+    started = time.perf_counter()
+    section_subjects = store.view(_path("sectionsubjects.json", data_dir), {})
+    section_subjects = {str(k).strip().upper(): v for k, v in section_subjects.items()}
+    known_sections = set(section_subjects)
+    known_sections.update(str(s).strip().upper() for s in store.view(_path("sectionlist.json", data_dir), []))
+    users = login.load_users()
+
+    rows, errors, seen = [], [], {}
+    for line, row in read_roster(csv_path):
+        row["role"] = row.get("role", "").lower()
+        problem = _validate(row, seen, users, known_sections)
+        if problem:
+            errors.append((line, row.get("name", ""), problem))
+            continue
+        seen[row["name"]] = line
+        rows.append(row)
+    summary = {"imported": 0, "errors": errors, "rolls": {}, "seconds": 0.0}
+    if not rows:
+        summary["seconds"] = time.perf_counter() - started
+        return summary
+
+    hashes = hash_rows(rows, workers)
+
+    # one block of roll numbers per role
+    rolls = {}
+    for role in ROLES:
+        names = [r["name"] for r in rows if r["role"] == role]
+        if names:
+            rolls.update(subject.reserveRollNumbers(names, role, _path(subject.rollnumbersFile, data_dir)))
+
+    for row, h in zip(rows, hashes):
+        users.add(row["name"], row["role"], h[0], h[1], h[2], h[3], h[4])
+    login.save_users(users)
+
+    students = {rolls[r["name"]]: (r["name"], _sections(r)[0]) for r in rows
+                if r["role"] == "student" and _sections(r)}
+    teachers = {r["name"]: _sections(r) for r in rows if r["role"] == "teacher" and _sections(r)}
+    if students:
+        store.update(_path("sections.json", data_dir), {},
+                     lambda cur: cur.update({roll: sec for roll, (_, sec) in students.items()}))
+        store.update(_path("studentsubjects.json", data_dir), {},
+                     lambda cur: cur.update({roll: {"section": sec, "subjects": section_subjects.get(sec, [])}
+                                             for roll, (_, sec) in students.items()}))
+        subjects = store.view(_path(subject.subjectsFile, data_dir), {"subjects": []})
+        code_of = {s.get("name"): s.get("code") for s in subjects.get("subjects", []) if s.get("code")}
+        today = datetime.now().strftime("%Y-%m-%d")
+
+        def add_records(data):
+            records = data.setdefault("attendance_records", {})
+            for roll, (name, sec) in students.items():
+                if roll in records:
+                    records[roll]["section"] = sec
+                else:
+                    records[roll] = _attendance_record(name, sec, section_subjects.get(sec, []), code_of, today)
+        attendance_log.update(_path("attendance_master.json", data_dir), add_records,
+                              sections={sec for _, sec in students.values()})
+    if teachers:
+        def add_sections(cur):
+            for name, secs in teachers.items():
+                have = cur.setdefault(name, [])
+                have.extend(s for s in secs if s not in have)
+        store.update(_path("teachersections.json", data_dir), {}, add_sections)
+
+    summary["imported"] = len(rows)
+    summary["rolls"] = {r["name"]: rolls[r["name"]] for r in rows}
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+def print_summary(summary):
+    print(f"\nImported {summary['imported']} account(s) in {summary['seconds']:.1f}s.")
+    if summary["errors"]:
+        print(f"Skipped {len(summary['errors'])} row(s):")
+        for line, name, problem in summary["errors"]:
+            print(f"  line {line} ({name or '-'}): {problem}")
+
+def bulk_import_interactive():
+    csv_path = input("Path to roster CSV (name,role,section,password): ").strip().strip('"')
+    if not os.path.exists(csv_path):
+        print("File not found.")
+        return
+    try:
+        print_summary(import_roster(csv_path))
+    except ValueError as e:
+        print(f"Cannot import: {e}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print_summary(import_roster(sys.argv[1]))
+    else:
+        bulk_import_interactive()
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+import assignments
+
+# Page text of submitted PDFs, extracted once per unique file.
+#
+#   assignments/text/<sha[:2]>/<sha>.txt    every page's text, back to back
+#   assignments/text/<sha[:2]>/<sha>.json   {"pages": n, "offsets": [...]}
+#
+# Entries are keyed by the blob hash from assignments.py, so resubmitting or
+# sharing a PDF never extracts it twice. The .json is written last and marks
+# the entry complete. offsets[i] is the byte where page i + 1 starts, so a
+# page range is one seek and one read, however long the document.
+#
+# Extraction (PyMuPDF) runs in a process pool owned by an Extractor; the GUI
+# queues every new upload there and shows a page range once its job is done.
+# Workers also leave the MinHash signature used by similarity.py.
+
+TEXT_FOLDER = "text"
+PAGE_BLOCK = 5              # pages shown at a time by the viewers
+
+
+def cache_base(sha, folder):
+    return os.path.join(folder or assignments.ASSIGNMENT_FOLDER, TEXT_FOLDER, sha[:2], sha)
+
+def is_cached(sha, folder=None):
+    return os.path.exists(cache_base(sha, folder) + ".json")
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def extract(pdf_path, sha, folder=None):
+    """Extract every page of a PDF into the cache under sha; returns the page count"""
+    import fitz     # PyMuPDF, only needed to read PDFs
+    base = cache_base(sha, folder)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    chunks, offsets, pos = [], [], 0
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            data = page.get_text().encode("utf-8")  # type: ignore
+            offsets.append(pos)
+            chunks.append(data)
+            pos += len(data)
+    offsets.append(pos)
+    _write_atomic(base + ".txt", b"".join(chunks))
+    _write_atomic(base + ".json", json.dumps({"pages": len(chunks), "offsets": offsets}).encode())
+    return len(chunks)
+
+def _extract_job(args):
+    # runs in a worker process
+    pdf_path, sha, folder = args
+    pages = extract(pdf_path, sha, folder)
+    import similarity   # NumPy; only worker processes and reports need it
+    similarity.signature_for(sha, folder)
+    return pages
+
+def page_count(sha, folder=None):
+    return _offsets(sha, folder)["pages"]
+
+def _offsets(sha, folder):
+    with open(cache_base(sha, folder) + ".json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def read_pages(sha, first=1, last=None, folder=None):
+    """[(page number, text)] for pages first..last (1-based, inclusive) of a cached PDF"""
+    meta = _offsets(sha, folder)
+    offsets = meta["offsets"]
+    last = min(last or meta["pages"], meta["pages"])
+    first = max(first, 1)
+    if first > last:
+        return []
+    with open(cache_base(sha, folder) + ".txt", "rb") as f:
+        f.seek(offsets[first - 1])
+        data = f.read(offsets[last] - offsets[first - 1])
+    start = offsets[first - 1]
+    return [(n, data[offsets[n - 1] - start:offsets[n] - start].decode("utf-8"))
+            for n in range(first, last + 1)]
+
+def cache_file(pdf_path, folder=None):
+    """Hash a PDF on disk and extract it unless cached; returns its sha256"""
+    sha = assignments.file_sha256(pdf_path)
+    if not is_cached(sha, folder):
+        extract(pdf_path, sha, folder)
+    return sha
+
+
+class Extractor:
+    """Process pool that fills the text cache in the background"""
+
+    def __init__(self, folder=None, workers=None):
+        self.folder = folder
+        self.workers = workers
+        self._pool = None
+        self._jobs = {}      # sha -> Future for extractions in flight
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            # spawn, not fork: the GUI process has Tk and worker threads running
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def queue(self, sha, pdf_path=None):
+        """Future for the page count of a blob, extracting it unless it is cached or queued"""
+        with self._lock:
+            job = self._jobs.get(sha)
+            if job is not None:
+                return job
+            if is_cached(sha, self.folder):
+                job = Future()
+                job.set_result(page_count(sha, self.folder))
+                return job
+            pdf_path = pdf_path or assignments.blob_path(sha, self.folder)
+            job = self._executor().submit(_extract_job, (pdf_path, sha, self.folder))
+            self._jobs[sha] = job
+        job.add_done_callback(lambda _f: self._done(sha))
+        return job
+
+    def _done(self, sha):
+        with self._lock:
+            self._jobs.pop(sha, None)
+
+    def queue_section(self, section):
+        """Queue every submission of a section whose text is not cached yet; returns the futures"""
+        rows = assignments.section_index(section, self.folder).values()
+        return [self.queue(r["sha256"]) for r in rows
+                if r.get("sha256") and not is_cached(r["sha256"], self.folder)]
+
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self, wait=True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+
+_services = {}
+
+def service(folder=None):
+    """The shared Extractor for an assignments folder"""
+    key = os.path.abspath(folder or assignments.ASSIGNMENT_FOLDER)
+    if key not in _services:
+        _services[key] = Extractor(folder)
+    return _services[key]
+
+def shutdown():
+    for extractor in _services.values():
+        extractor.shutdown(wait=False)
+    _services.clear()
+
+
+if __name__ == "__main__":
+    # python pdftext.py <section> ... : fill the cache for whole sections
+    ex = service()
+    jobs = [job for sec in sys.argv[1:] for job in ex.queue_section(sec)]
+    for job in jobs:
+        job.result()
+    print(f"Extracted {len(jobs)} PDF(s).")
+    ex.shutdown()
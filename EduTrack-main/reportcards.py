@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import time
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import store
+import analytics
+import attendance_log
+
+# One PDF report card per student, written with PyMuPDF.
+#
+#   reportcards/<SECTION>/<roll>.pdf
+#
+# A card shows the roll, section, the subjects from studentsubjects.json,
+# each subject's attendance from the attendance master and its exam date
+# from exam_date.json. Students are handed to a process pool in batches of
+# BATCH; each worker builds the page template (header band, labels, table
+# rules) and loads its fonts once, then stamps the template onto every card
+# and adds only the student's text.
+#
+# The parent yields card data lazily and keeps at most IN_FLIGHT batches per
+# worker queued, and workers write each card to disk as soon as it is done,
+# so memory stays flat however large the cohort is.
+
+CARD_FOLDER = "reportcards"
+BATCH = 250
+IN_FLIGHT = 2                   # queued batches per worker
+PAGE = (595, 842)               # A4 in points
+MARGIN = 48
+ROW_HEIGHT = 20
+COLUMNS = (("Subject", 0), ("Code", 190), ("Classes", 270), ("Present", 335), ("Attendance", 405), ("Exam date", 480))
+ATTENDANCE_COLUMN = 4
+TABLE_TOP = 250
+ROWS_PER_PAGE = (PAGE[1] - TABLE_TOP - MARGIN) // ROW_HEIGHT - 1
+BAND = (0.184, 0.365, 0.659)    # header colour, RGB 0..1
+SHORT = (0.75, 0.16, 0.16)      # attendance below the threshold
+
+_DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def card_dir(data_dir=None):
+    return os.path.join(data_dir or _DATA_DIR, CARD_FOLDER)
+
+def file_stem(text):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(text)) or "_"
+
+def card_path(out_dir, section, roll):
+    return os.path.join(out_dir, file_stem(section or "UNASSIGNED"), file_stem(roll) + ".pdf")
+
+# -----------------------------------------------------------
+# Card data (parent process)
+# -----------------------------------------------------------
+
+def _exam_dates(exams, subjects):
+    code_of = {s.get("name"): s.get("code") for s in subjects.get("subjects", []) if isinstance(s, dict)}
+    by_key = {}
+    for item in exams.get("exam_schedule", []):
+        for key in (item.get("subject_code"), item.get("subject_name")):
+            if key:
+                by_key[key] = item.get("exam_date", "")
+    return code_of, by_key
+
+def _rows(names, record, code_of, exam_on):
+    """(subject, code, classes, present, percentage or None, exam date) per subject"""
+    subs = (record or {}).get("subjects", {})
+    by_name = {str(det.get("subject_name", key)).strip().lower(): det for key, det in subs.items()}
+    names = names or [det.get("subject_name", key) for key, det in subs.items()]
+    rows = []
+    for name in names:
+        code = code_of.get(name, "")
+        det = subs.get(code) or subs.get(name) or by_name.get(str(name).strip().lower())
+        working = int(det.get("total_working_days", 0)) if det else 0
+        present = int(det.get("total_present_days", 0)) if det else 0
+        pct = round(present * 100.0 / working, 2) if working else None
+        rows.append((name, code, working, present, pct, exam_on.get(code) or exam_on.get(name, "")))
+    return rows
+
+def cards(data_dir=None, sections=None):
+    """Yield one dict per student, in section and roll order"""
+    data_dir = data_dir or _DATA_DIR
+    student_subjects = store.view(os.path.join(data_dir, "studentsubjects.json"), {})
+    section_of = store.view(os.path.join(data_dir, "sections.json"), {})
+    records = attendance_log.view(os.path.join(data_dir, "attendance_master.json"),
+                                  {"attendance_records": {}}).get("attendance_records", {})
+    code_of, exam_on = _exam_dates(store.view(os.path.join(data_dir, "exam_date.json"), {}),
+                                   store.view(os.path.join(data_dir, "subjects.json"), {}))
+    wanted = None if sections is None else {str(s).strip().upper() for s in sections}
+
+    def section(roll):
+        entry = student_subjects.get(roll)
+        sec = section_of.get(roll) or (entry or {}).get("section") or (records.get(roll) or {}).get("section", "")
+        return str(sec).strip().upper()
+
+    rolls = sorted(set(student_subjects) | set(records), key=lambda r: (section(r), r))
+    for roll in rolls:
+        sec = section(roll)
+        if wanted is not None and sec not in wanted:
+            continue
+        entry = student_subjects.get(roll)
+        names = entry.get("subjects") if isinstance(entry, dict) else None
+        yield {"roll": roll, "section": sec, "rows": _rows(names, records.get(roll), code_of, exam_on)}
+
+# -----------------------------------------------------------
+# Rendering (worker processes)
+# -----------------------------------------------------------
+
+_worker = {}    # per process: fonts and the page template, built once
+
+
+def _template():
+    import fitz
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE[0], height=PAGE[1])
+    page.draw_rect(fitz.Rect(0, 0, PAGE[0], 96), color=None, fill=BAND)
+    page.insert_text((MARGIN, 56), "EDUTRACK", fontname="hebo", fontsize=24, color=(1, 1, 1))
+    page.insert_text((MARGIN, 78), "Student report card", fontname="helv", fontsize=12, color=(1, 1, 1))
+    for i, label in enumerate(("Roll number", "Section", "Generated")):
+        page.insert_text((MARGIN, 140 + 24 * i), label, fontname="hebo", fontsize=11)
+    y = TABLE_TOP
+    for title, x in COLUMNS:
+        page.insert_text((MARGIN + x, y), title, fontname="hebo", fontsize=10)
+    page.draw_line((MARGIN, y + 6), (PAGE[0] - MARGIN, y + 6), color=BAND, width=1)
+    page.insert_text((MARGIN, PAGE[1] - MARGIN / 2), f"Attendance below {analytics.THRESHOLD:g}% is shown in red.",
+                     fontname="helv", fontsize=8, color=(0.4, 0.4, 0.4))
+    return doc
+
+def _init_worker():
+    import fitz
+    _worker["fitz"] = fitz
+    _worker["font"] = fitz.Font("helv")
+    _worker["template"] = _template()
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def render_card(card, generated):
+    """PDF bytes of one report card (call in a worker, after _init_worker)"""
+    fitz, font, template = _worker["fitz"], _worker["font"], _worker["template"]
+    doc = fitz.open()
+    rows = card["rows"] or [("No subjects recorded", "", "", "", None, "")]
+    for first in range(0, len(rows), ROWS_PER_PAGE):
+        page = doc.new_page(width=PAGE[0], height=PAGE[1])
+        page.show_pdf_page(page.rect, template, 0)
+        black = fitz.TextWriter(page.rect)
+        red = fitz.TextWriter(page.rect, color=SHORT)
+        for i, value in enumerate((card["roll"], card["section"] or "Not assigned", generated)):
+            black.append((MARGIN + 110, 140 + 24 * i), str(value), font=font, fontsize=11)
+        y = TABLE_TOP + ROW_HEIGHT + 4
+        for name, code, working, present, pct, exam in rows[first:first + ROWS_PER_PAGE]:
+            cells = (name, code, working, present, "-" if pct is None else f"{pct:.1f}%", exam or "-")
+            short = pct is not None and pct < analytics.THRESHOLD
+            for col, ((_, x), value) in enumerate(zip(COLUMNS, cells)):
+                writer = red if short and col == ATTENDANCE_COLUMN else black
+                writer.append((MARGIN + x, y), str(value)[:32], font=font, fontsize=10)
+            y += ROW_HEIGHT
+        black.write_text(page)
+        red.write_text(page)
+    data = doc.tobytes(garbage=1, deflate=True)
+    doc.close()
+    return data
+
+def _batch_job(args):
+    batch, out_dir, generated = args
+    for card in batch:
+        path = card_path(out_dir, card["section"], card["roll"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, render_card(card, generated))
+    return len(batch)
+
+# -----------------------------------------------------------
+# Batch run
+# -----------------------------------------------------------
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def generate(data_dir=None, sections=None, workers=None, out_dir=None, progress=None):
+    """Write the report cards of sections (all students when None); returns the number written
+
+    progress(done) is called in the parent as batches finish.
+    """
+    out_dir = out_dir or card_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    generated = time.strftime("%Y-%m-%d")
+    done = 0
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as pool:
+        pending = set()
+        for batch in _batches(cards(data_dir, sections), BATCH):
+            if len(pending) >= workers * IN_FLIGHT:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for job in finished:
+                    done += job.result()
+                if progress:
+                    progress(done)
+            pending.add(pool.submit(_batch_job, (batch, out_dir, generated)))
+        for job in pending:
+            done += job.result()
+    if progress:
+        progress(done)
+    return done
+
+def _progress_line(done):
+    print(f"\r  {done} report card(s) written", end="", flush=True)
+
+def generate_interactive(data_dir=None):
+    secs = input("Sections (comma separated, blank for all): ").strip()
+    sections = [s.strip().upper() for s in secs.split(",") if s.strip()] or None
+    started = time.perf_counter()
+    n = generate(data_dir, sections, progress=_progress_line)
+    print(f"\nWrote {n} report card(s) in {time.perf_counter() - started:.1f}s to {card_dir(data_dir)}")
+
+
+if __name__ == "__main__":
+    # python reportcards.py [--workers N] [section ...]
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    n = generate(sections=[a.upper() for a in args] or None, workers=workers, progress=_progress_line)
+    print(f"\nWrote {n} report card(s) to {card_dir()}")
@@ -0,0 +1,226 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import analytics
+import store
+
+# End-of-term attendance reports for the whole campus, without a display.
+#
+#   reports/<SECTION>.png    section summary: per-subject box plots and the
+#                            spread of the students' overall %
+#   reports/<SECTION>.pdf    the same summary page, then every student's
+#                            per-subject % (STUDENTS_PER_PAGE per page)
+#   reports/index.json       one entry per section: fingerprint, counts,
+#                            median, shortfall and the file names
+#
+# The attendance matrix is built once in the parent process; each section's
+# slice goes to a worker of a ProcessPoolExecutor, which draws with the Agg
+# and PDF canvases (no pyplot, no GUI backend). A section is skipped when
+# the SHA-1 fingerprint of its slice matches the index and both files still
+# exist, so a second run after a few marks only redraws the sections that
+# changed.
+
+REPORT_FOLDER = "reports"       # next to the attendance master
+INDEX_FILE = "index.json"
+REPORT_VERSION = 1              # bump when the layout changes to redraw everything
+STUDENTS_PER_PAGE = 40
+DPI = 100
+BELOW = "#F5B7B1"               # table cells under the threshold
+
+
+def report_dir(master_path):
+    return os.path.join(os.path.dirname(os.path.abspath(master_path)), REPORT_FOLDER)
+
+def file_stem(section):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(section)) or "_"
+
+def section_slice(m, section):
+    """Everything a worker needs to draw one section, as plain lists and arrays"""
+    rows = m.rows_for_sections([section])
+    taken = np.flatnonzero(m.enrolled[rows].any(axis=0))
+    order = rows[np.argsort([m.rolls[r] for r in rows], kind="stable")] if len(rows) else rows
+    return {
+        "section": section,
+        "rolls": [m.rolls[r] for r in order],
+        "subjects": [m.subject_names[j] for j in taken],
+        "working": m.working[np.ix_(order, taken)],
+        "present": m.present[np.ix_(order, taken)],
+        "enrolled": m.enrolled[np.ix_(order, taken)],
+    }
+
+def fingerprint(part):
+    h = hashlib.sha1(f"{REPORT_VERSION}\0{part['section']}\0{analytics.THRESHOLD}".encode())
+    h.update("\0".join(part["rolls"]).encode() + b"\1" + "\0".join(part["subjects"]).encode())
+    for key in ("working", "present", "enrolled"):
+        h.update(np.ascontiguousarray(part[key]).tobytes())
+    return h.hexdigest()
+
+def _write_atomic(path, write):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _summary_page(part, pct, overall):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(11.69, 8.27), dpi=DPI)         # A4 landscape
+    held = part["enrolled"] & (part["working"] > 0)
+    ax = fig.add_subplot(1, 2, 1)
+    cols = [j for j in range(len(part["subjects"])) if held[:, j].any()]
+    if cols:
+        ax.boxplot([pct[held[:, j], j] for j in cols], vert=False)
+        ax.set_yticks(range(1, len(cols) + 1), [part["subjects"][j] for j in cols], fontsize=8)
+    ax.axvline(analytics.THRESHOLD, color="#C0392B", linewidth=1, linestyle="--")
+    ax.set_xlim(0, 100)
+    ax.set_title("Students' % by subject", fontsize=10)
+    ax = fig.add_subplot(1, 2, 2)
+    ax.hist(overall[~np.isnan(overall)], bins=np.arange(0, 105, 5), color="#2F5DA8")
+    ax.axvline(analytics.THRESHOLD, color="#C0392B", linewidth=1, linestyle="--")
+    ax.set_xlim(0, 100)
+    ax.set_title("Overall attendance %", fontsize=10)
+    fig.suptitle(f"Section {part['section']}: {len(part['rolls'])} students", fontsize=13)
+    # fixed margins: tight_layout would cost an extra draw per page
+    fig.subplots_adjust(left=0.16, right=0.97, bottom=0.08, top=0.88, wspace=0.25)
+    return fig
+
+def _student_page(part, pct, overall, first):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(11.69, 8.27), dpi=DPI)
+    ax = fig.add_subplot(111)
+    ax.axis("off")
+    last = min(first + STUDENTS_PER_PAGE, len(part["rolls"]))
+    cells, colors = [], []
+    for i in range(first, last):
+        row = [part["rolls"][i]]
+        shade = ["white"]
+        for j in range(len(part["subjects"])):
+            held = part["enrolled"][i, j] and part["working"][i, j] > 0
+            row.append(f"{pct[i, j]:.0f}" if held else "-")
+            shade.append(BELOW if held and pct[i, j] < analytics.THRESHOLD else "white")
+        row.append("-" if np.isnan(overall[i]) else f"{overall[i]:.1f}")
+        shade.append(BELOW if overall[i] < analytics.THRESHOLD else "white")
+        cells.append(row)
+        colors.append(shade)
+    table = ax.table(cellText=cells, cellColours=colors, colLabels=["Roll"] + part["subjects"] + ["Overall"],
+                     loc="upper center", cellLoc="center")
+    table.auto_set_font_size(False)
+    table.set_fontsize(7)
+    ax.set_title(f"Section {part['section']}: students {first + 1}-{last} of {len(part['rolls'])}", fontsize=10)
+    return fig
+
+def render_section(part, out_dir):
+    """Draw one section's PNG and PDF (runs in a worker); returns its index entry"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.backends.backend_pdf import PdfPages
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w, p = part["working"], part["present"]
+        pct = np.where(w > 0, p * 100.0 / np.maximum(w, 1), np.nan)
+        tw, tp = w.sum(axis=1), p.sum(axis=1)
+        overall = np.where(tw > 0, tp * 100.0 / np.maximum(tw, 1), np.nan)
+    stem = file_stem(part["section"])
+    summary = _summary_page(part, pct, overall)
+    _write_atomic(os.path.join(out_dir, stem + ".png"), lambda tmp: FigureCanvasAgg(summary).print_png(tmp))
+    def write_pdf(tmp):
+        with PdfPages(tmp) as pdf:
+            pdf.savefig(summary)
+            for first in range(0, len(part["rolls"]), STUDENTS_PER_PAGE):
+                pdf.savefig(_student_page(part, pct, overall, first))
+    _write_atomic(os.path.join(out_dir, stem + ".pdf"), write_pdf)
+    counted = overall[~np.isnan(overall)]
+    return {
+        "students": len(part["rolls"]),
+        "subjects": len(part["subjects"]),
+        "median": round(float(np.median(counted)), 2) if counted.size else None,
+        "below_threshold": int((counted < analytics.THRESHOLD).sum()),
+        "png": stem + ".png",
+        "pdf": stem + ".pdf",
+    }
+
+def _job(args):
+    part, out_dir, fp = args
+    entry = render_section(part, out_dir)
+    entry["fingerprint"] = fp
+    entry["generated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    return part["section"], entry
+
+def generate(master_path=None, sections=None, workers=None, force=False, out_dir=None, progress=None):
+    """Render the reports of sections (all when None); returns (rendered, skipped) section lists
+
+    progress(done, total, section) is called in the parent as sections finish.
+    """
+    master_path = os.path.abspath(master_path or analytics._default_master())
+    m = analytics.matrix(master_path, sections)
+    sections = list(sections) if sections is not None else sorted({str(s) for s in m.section_names if str(s)})
+    out_dir = out_dir or report_dir(master_path)
+    os.makedirs(out_dir, exist_ok=True)
+    index_path = os.path.join(out_dir, INDEX_FILE)
+    index = store.load(index_path, {"sections": {}})
+    jobs, skipped = [], []
+    for sec in sections:
+        part = section_slice(m, sec)
+        if not part["rolls"]:
+            continue
+        fp = fingerprint(part)
+        old = index["sections"].get(sec)
+        if (not force and old and old.get("fingerprint") == fp
+                and os.path.exists(os.path.join(out_dir, old["png"])) and os.path.exists(os.path.join(out_dir, old["pdf"]))):
+            skipped.append(sec)
+            continue
+        jobs.append((part, out_dir, fp))
+    rendered = []
+    if jobs:
+        # spawn: a clean interpreter per worker, the same from the CLI and the GUI process
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for done, job in enumerate(as_completed(pool.submit(_job, args) for args in jobs), 1):
+                sec, entry = job.result()
+                rendered.append(sec)
+                def record(cur):
+                    cur.setdefault("sections", {})[sec] = entry
+                # recorded as each section lands, so an interrupted run keeps its progress
+                store.update(index_path, {"sections": {}}, record)
+                if progress:
+                    progress(done, len(jobs), sec)
+    def stamp(cur):
+        cur["generated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        cur["threshold"] = analytics.THRESHOLD
+    store.update(index_path, {"sections": {}}, stamp)
+    return rendered, skipped
+
+def _progress_line(done, total, section):
+    print(f"\r  Rendered {done}/{total} section(s), last {section}   ", end="", flush=True)
+
+def generate_interactive(master_path=None):
+    secs = input("Sections (comma separated, blank for all): ").strip()
+    force = input("Redraw unchanged sections too? (y/N): ").strip().lower() == "y"
+    sections = [s.strip().upper() for s in secs.split(",") if s.strip()] or None
+    started = time.perf_counter()
+    rendered, skipped = generate(master_path, sections, force=force, progress=_progress_line)
+    if rendered:
+        print()
+    print(f"Rendered {len(rendered)} section(s), {len(skipped)} unchanged, in {time.perf_counter() - started:.1f}s.")
+    print(f"Reports are in {report_dir(master_path or analytics._default_master())}")
+
+
+if __name__ == "__main__":
+    # python reports.py [--force] [--workers N] [section ...]
+    args = sys.argv[1:]
+    force = "--force" in args
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    sections = [a.upper() for a in args if a != "--force"] or None
+    rendered, skipped = generate(sections=sections, workers=workers, force=force, progress=_progress_line)
+    print(f"\nRendered {len(rendered)} section(s), {len(skipped)} unchanged.")
@@ -0,0 +1,699 @@
+import os
+import sys
+import json
+import sqlite3
+import tempfile
+import threading
+
+# Storage backends behind store.py.
+#
+# The app reads and writes whole documents (sections.json, attendance_master.json,
+# ...) through store.load/view/save. A backend decides where a document lives:
+#
+#   JsonBackend    - one JSON file per document (the default)
+#   SqliteBackend  - indexed tables in one SQLite database; documents are
+#                    assembled from / split into rows on read / write
+#
+# Both also answer the indexed queries the hot screens need
+# (attendance_for_sections, attendance_for_roll, roster) so those do not have
+# to load and scan the whole attendance master. SqliteBackend.attendance_table
+# is the flat feed analytics.py builds its arrays from.
+#
+# Select the backend in config.json next to this file:
+#   {"backend": "sqlite", "sqlite_path": "edutrack.db"}
+# or with the EDUTRACK_BACKEND / EDUTRACK_DB environment variables.
+# Import the existing JSON files first with:  python repository.py import
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
+DEFAULT_DB = "edutrack.db"
+
+ATTENDANCE_DOC = "attendance_master.json"
+DOCS = (
+    "sections.json",
+    "sectionlist.json",
+    "sectionsubjects.json",
+    "studentsubjects.json",
+    "subjects.json",
+    "teachersections.json",
+    "topics.json",
+    "exam_date.json",
+    "rollnumbers.json",
+    "subject_allocation.json",
+    ATTENDANCE_DOC,
+)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def load_config():
+    cfg = {"backend": "json", "sqlite_path": DEFAULT_DB, "password_kdf": "scrypt", "password_cost": 0,
+           "import_password_cost": 0}
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            cfg.update(data)
+    except (OSError, ValueError):
+        pass
+    cfg["backend"] = os.environ.get("EDUTRACK_BACKEND", cfg["backend"]).strip().lower()
+    cfg["sqlite_path"] = os.environ.get("EDUTRACK_DB", cfg["sqlite_path"])
+    cfg["password_kdf"] = os.environ.get("EDUTRACK_KDF", cfg["password_kdf"]).strip().lower()
+    if not os.path.isabs(cfg["sqlite_path"]):
+        cfg["sqlite_path"] = os.path.join(BASE_DIR, cfg["sqlite_path"])
+    return cfg
+
+def backend():
+    """The configured backend (created on first use)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                cfg = load_config()
+                if cfg["backend"] == "sqlite":
+                    _backend = SqliteBackend(cfg["sqlite_path"])
+                else:
+                    _backend = JsonBackend()
+    return _backend
+
+def set_backend(b):
+    """Swap the backend (e.g. for imports or benchmarks); returns the old one"""
+    global _backend
+    with _backend_lock:
+        old, _backend = _backend, b
+    return old
+
+def sqlite_backend():
+    """The active backend if it is SQLite, else None"""
+    b = backend()
+    return b if isinstance(b, SqliteBackend) else None
+
+def fsync_dir(folder):
+    """Make a rename/create inside folder durable (no-op where unsupported)"""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _filter_sections(records, sections):
+    wanted = {str(s).strip().upper() for s in sections}
+    return {roll: rec for roll, rec in records.items()
+            if str(rec.get("section", "")).strip().upper() in wanted}
+
+# -----------------------------------------------------------
+# JSON files
+# -----------------------------------------------------------
+
+class JsonBackend:
+    name = "json"
+
+    def signature(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def read(self, path, default):
+        """Parsed file, default if missing; raises ValueError if the file is corrupt"""
+        if not os.path.exists(path):
+            return default
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write(self, path, data):
+        """Replace the file atomically: temp file, fsync, rename, fsync dir"""
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        fsync_dir(folder)
+
+    def attendance_for_sections(self, master_path, sections):
+        import attendance_log
+        return _filter_sections(attendance_log.view(master_path, sections=sections).get("attendance_records", {}), sections)
+
+    def attendance_for_roll(self, master_path, roll):
+        import attendance_log
+        return attendance_log.record(master_path, roll)
+
+    def roster(self, sections_path, section):
+        import store
+        section = str(section).strip().upper()
+        return sorted(r for r, s in store.view(sections_path, {}).items() if str(s).strip().upper() == section)
+
+# -----------------------------------------------------------
+# SQLite
+# -----------------------------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (doc TEXT PRIMARY KEY, version INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS documents (doc TEXT PRIMARY KEY, body TEXT NOT NULL);
+
+CREATE TABLE IF NOT EXISTS students (roll TEXT PRIMARY KEY, section TEXT);
+CREATE INDEX IF NOT EXISTS students_section ON students(section);
+CREATE TABLE IF NOT EXISTS student_subjects (roll TEXT PRIMARY KEY, section TEXT, subjects TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS student_subjects_section ON student_subjects(section);
+
+CREATE TABLE IF NOT EXISTS sections (name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS section_subjects (section TEXT NOT NULL, subject TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS section_subjects_section ON section_subjects(section);
+CREATE TABLE IF NOT EXISTS teacher_sections (teacher TEXT NOT NULL, section TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS teacher_sections_teacher ON teacher_sections(teacher);
+
+CREATE TABLE IF NOT EXISTS subjects (code TEXT, name TEXT);
+CREATE INDEX IF NOT EXISTS subjects_code ON subjects(code);
+
+CREATE TABLE IF NOT EXISTS rollnumbers (role TEXT NOT NULL, name TEXT NOT NULL, roll TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS rollnumbers_name ON rollnumbers(role, name);
+CREATE INDEX IF NOT EXISTS rollnumbers_roll ON rollnumbers(roll);
+CREATE TABLE IF NOT EXISTS roll_counters (role TEXT PRIMARY KEY, n INTEGER NOT NULL);
+
+CREATE TABLE IF NOT EXISTS topics (section TEXT NOT NULL, date TEXT, teacher TEXT, entry TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS topics_section ON topics(section);
+
+CREATE TABLE IF NOT EXISTS exams (code TEXT, date TEXT, entry TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS exams_code ON exams(code);
+
+CREATE TABLE IF NOT EXISTS attendance_students (roll TEXT PRIMARY KEY, name TEXT, section TEXT);
+CREATE INDEX IF NOT EXISTS attendance_students_section ON attendance_students(section);
+CREATE TABLE IF NOT EXISTS attendance (
+    roll TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    subject_name TEXT,
+    working INTEGER NOT NULL DEFAULT 0,
+    present INTEGER NOT NULL DEFAULT 0,
+    percentage REAL NOT NULL DEFAULT 0.0,
+    last_updated TEXT,
+    PRIMARY KEY (roll, subject)
+);
+CREATE TABLE IF NOT EXISTS attendance_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    roll TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    present INTEGER NOT NULL,
+    teacher TEXT
+);
+CREATE INDEX IF NOT EXISTS attendance_events_roll ON attendance_events(roll, subject);
+CREATE INDEX IF NOT EXISTS attendance_events_date ON attendance_events(date);
+"""
+
+class _Unsupported(Exception):
+    """Document does not have the expected shape; keep it verbatim instead"""
+
+
+class SqliteBackend:
+    name = "sqlite"
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self._json = JsonBackend()
+        self._tables = {
+            "sections.json": (self._read_sections, self._write_sections),
+            "sectionlist.json": (self._read_sectionlist, self._write_sectionlist),
+            "sectionsubjects.json": (self._read_section_subjects, self._write_section_subjects),
+            "studentsubjects.json": (self._read_student_subjects, self._write_student_subjects),
+            "subjects.json": (self._read_subjects, self._write_subjects),
+            "teachersections.json": (self._read_teacher_sections, self._write_teacher_sections),
+            "topics.json": (self._read_topics, self._write_topics),
+            "exam_date.json": (self._read_exams, self._write_exams),
+            "rollnumbers.json": (self._read_rollnumbers, self._write_rollnumbers),
+            ATTENDANCE_DOC: (self._read_attendance, self._write_attendance),
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @staticmethod
+    def doc_name(path):
+        name = os.path.basename(path)
+        return name if name in DOCS else None
+
+    # --- document interface used by store.py ---
+
+    def signature(self, path):
+        doc = self.doc_name(path)
+        if doc is None:
+            return self._json.signature(path)
+        with self.lock:
+            row = self.conn.execute("SELECT version FROM versions WHERE doc = ?", (doc,)).fetchone()
+        return (self.db_path, doc, row[0] if row else 0)
+
+    def read(self, path, default):
+        doc = self.doc_name(path)
+        if doc is None:
+            return self._json.read(path, default)
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM versions WHERE doc = ?", (doc,)).fetchone() is None:
+                return default
+            row = self.conn.execute("SELECT body FROM documents WHERE doc = ?", (doc,)).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            reader = self._tables.get(doc)
+            return reader[0]() if reader else default
+
+    def write(self, path, data):
+        doc = self.doc_name(path)
+        if doc is None:
+            return self._json.write(path, data)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM documents WHERE doc = ?", (doc,))
+            handler = self._tables.get(doc)
+            try:
+                if handler is None:
+                    raise _Unsupported(doc)
+                self.conn.execute("SAVEPOINT doc_write")
+                handler[1](data)
+                self.conn.execute("RELEASE doc_write")
+            except _Unsupported:
+                if handler is not None:
+                    self.conn.execute("ROLLBACK TO doc_write")
+                    self.conn.execute("RELEASE doc_write")
+                self.conn.execute("INSERT INTO documents (doc, body) VALUES (?, ?)", (doc, json.dumps(data)))
+            self._bump(doc)
+
+    def _bump(self, doc):
+        self.conn.execute(
+            "INSERT INTO versions (doc, version) VALUES (?, 1) "
+            "ON CONFLICT(doc) DO UPDATE SET version = version + 1", (doc,))
+
+    # --- indexed queries ---
+    # A document kept verbatim in documents (see write) is the current one and
+    # its table rows are stale, so every query answers from it when it exists.
+
+    def _blob(self, doc):
+        row = self.conn.execute("SELECT body FROM documents WHERE doc = ?", (doc,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def _blob_records(self):
+        blob = self._blob(ATTENDANCE_DOC)
+        if blob is None:
+            return None
+        records = blob.get("attendance_records") if isinstance(blob, dict) else None
+        return records if isinstance(records, dict) else {}
+
+    def attendance_for_sections(self, master_path, sections):
+        names = sorted({str(s).strip() for s in sections} | {str(s).strip().upper() for s in sections})
+        if not names:
+            return {}
+        marks = ",".join("?" * len(names))
+        with self.lock:
+            records = self._blob_records()
+            if records is not None:
+                return _filter_sections(records, sections)
+            rows = self.conn.execute(
+                "SELECT s.roll, s.name, s.section, a.subject, a.subject_name, a.working, a.present, a.percentage, a.last_updated "
+                "FROM attendance_students s LEFT JOIN attendance a ON a.roll = s.roll "
+                f"WHERE s.section IN ({marks}) ORDER BY s.rowid, a.rowid", names).fetchall()
+        return self._records(rows)
+
+    def attendance_for_roll(self, master_path, roll):
+        with self.lock:
+            records = self._blob_records()
+            if records is not None:
+                return records.get(roll)
+            rows = self.conn.execute(
+                "SELECT s.roll, s.name, s.section, a.subject, a.subject_name, a.working, a.present, a.percentage, a.last_updated "
+                "FROM attendance_students s LEFT JOIN attendance a ON a.roll = s.roll "
+                "WHERE s.roll = ? ORDER BY a.rowid", (roll,)).fetchall()
+        return self._records(rows).get(roll)
+
+    def attendance_table(self):
+        """Flat attendance for analytics: ([(roll, section)],
+        [(roll, subject, working, present)], {subject: subject_name})"""
+        with self.lock:
+            records = self._blob_records()
+            if records is not None:
+                students = [(roll, rec.get("section", "")) for roll, rec in records.items()]
+                cells = [(roll, key, int(det.get("total_working_days", 0)), int(det.get("total_present_days", 0)))
+                         for roll, rec in records.items() for key, det in (rec.get("subjects") or {}).items()]
+                names = {key: det.get("subject_name", key) for rec in records.values()
+                         for key, det in (rec.get("subjects") or {}).items()}
+                return students, cells, names
+            students = self.conn.execute("SELECT roll, section FROM attendance_students ORDER BY rowid").fetchall()
+            cells = self.conn.execute("SELECT roll, subject, working, present FROM attendance ORDER BY rowid").fetchall()
+            names = dict(self.conn.execute("SELECT subject, MAX(subject_name) FROM attendance GROUP BY subject"))
+        return students, cells, names
+
+    def attendance_metadata(self):
+        with self.lock:
+            blob = self._blob(ATTENDANCE_DOC)
+            if blob is not None:
+                return blob.get("metadata", {}) if isinstance(blob, dict) else {}
+            meta = self._rows("SELECT body FROM documents WHERE doc = ?", (ATTENDANCE_DOC + "#metadata",))
+        return json.loads(meta[0][0]) if meta else {}
+
+    def attendance_count(self):
+        with self.lock:
+            records = self._blob_records()
+            if records is not None:
+                return len(records)
+            return self.conn.execute("SELECT COUNT(*) FROM attendance_students").fetchone()[0]
+
+    def write_attendance_changes(self, before, after, metadata):
+        """Upsert the records of after that differ from before and delete the ones it dropped.
+
+        before and after are {roll: record}; rolls in neither are left alone.
+        Returns False, writing nothing, when the attendance document is kept
+        verbatim or after does not fit the tables: save the whole document then.
+        """
+        gone = [(roll,) for roll in before if roll not in after]
+        students, cells, dropped = [], [], []
+        try:
+            for roll, rec in after.items():
+                old = before.get(roll)
+                if old == rec:
+                    continue
+                student, rows = self._attendance_rows(roll, rec)
+                students.append(student)
+                old_subjects = (old.get("subjects") or {}) if isinstance(old, dict) else {}
+                new_subjects = rec.get("subjects") or {}
+                dropped += [(roll, key) for key in old_subjects if key not in new_subjects]
+                cells += [row for row in rows if old_subjects.get(row[1]) != new_subjects[row[1]]]
+        except _Unsupported:
+            return False
+        with self.lock, self.conn:
+            if self._blob(ATTENDANCE_DOC) is not None:
+                return False
+            self.conn.executemany("DELETE FROM attendance_students WHERE roll = ?", gone)
+            self.conn.executemany("DELETE FROM attendance WHERE roll = ?", gone)
+            self.conn.executemany("DELETE FROM attendance WHERE roll = ? AND subject = ?", dropped)
+            self.conn.executemany(
+                "INSERT INTO attendance_students (roll, name, section) VALUES (?, ?, ?) "
+                "ON CONFLICT(roll) DO UPDATE SET name = excluded.name, section = excluded.section", students)
+            self.conn.executemany(
+                "INSERT INTO attendance (roll, subject, subject_name, working, present, percentage, last_updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(roll, subject) DO UPDATE SET subject_name = excluded.subject_name, "
+                "working = excluded.working, present = excluded.present, "
+                "percentage = excluded.percentage, last_updated = excluded.last_updated", cells)
+            self.conn.execute("INSERT OR REPLACE INTO documents (doc, body) VALUES (?, ?)",
+                              (ATTENDANCE_DOC + "#metadata", json.dumps(metadata)))
+            self._bump(ATTENDANCE_DOC)
+        return True
+
+    def roster(self, sections_path, section):
+        section = str(section).strip()
+        with self.lock:
+            blob = self._blob("sections.json")
+            if isinstance(blob, dict):
+                return sorted(r for r, s in blob.items() if str(s).strip().upper() == section.upper())
+            if blob is not None:
+                return []
+            rows = self.conn.execute("SELECT roll FROM students WHERE section IN (?, ?) ORDER BY roll",
+                                     (section, section.upper())).fetchall()
+        return [r[0] for r in rows]
+
+    def append_events(self, events):
+        """Record attendance marks and bump the counters in one transaction"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO attendance_events (date, roll, subject, present, teacher) VALUES (?, ?, ?, ?, ?)",
+                [(e["date"], e["roll"], e["subject"], 1 if e.get("present") else 0, e.get("teacher")) for e in events])
+            blob = self._blob(ATTENDANCE_DOC)
+            if blob is not None:
+                import attendance_log
+                for e in events:
+                    attendance_log.apply_event(blob, e)
+                self.conn.execute("UPDATE documents SET body = ? WHERE doc = ?", (json.dumps(blob), ATTENDANCE_DOC))
+                self._bump(ATTENDANCE_DOC)
+                return
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO attendance_students (roll, name, section) VALUES (?, ?, ?)",
+                [(e["roll"], e["roll"], e.get("section", "")) for e in events])
+            self.conn.executemany(
+                "INSERT INTO attendance (roll, subject, subject_name, working, present, percentage, last_updated) "
+                "VALUES (?1, ?2, ?3, 1, ?4, ROUND(100.0 * ?4, 2), ?5) "
+                "ON CONFLICT(roll, subject) DO UPDATE SET "
+                "working = working + 1, present = present + ?4, "
+                "percentage = ROUND(100.0 * (present + ?4) / (working + 1), 2), last_updated = ?5",
+                [(e["roll"], e["subject"], e.get("subject_name") or e["subject"], 1 if e.get("present") else 0, e["date"])
+                 for e in events])
+            self._bump(ATTENDANCE_DOC)
+
+    def history(self, roll=None, subject=None, date_from=None, date_to=None):
+        sql = "SELECT date, roll, subject, present, teacher FROM attendance_events WHERE 1 = 1"
+        args = []
+        for clause, value in (("roll = ?", roll), ("subject = ?", subject),
+                              ("date >= ?", date_from), ("date <= ?", date_to)):
+            if value is not None and value != "":
+                sql += " AND " + clause
+                args.append(value)
+        with self.lock:
+            rows = self.conn.execute(sql + " ORDER BY id", args).fetchall()
+        return [{"date": d, "roll": r, "subject": s, "present": bool(p), "teacher": t} for d, r, s, p, t in rows]
+
+    @staticmethod
+    def _records(rows):
+        out = {}
+        for roll, name, section, subject, subject_name, working, present, pct, updated in rows:
+            rec = out.get(roll)
+            if rec is None:
+                rec = out[roll] = {"name": name, "section": section, "subjects": {}}
+            if subject is not None:
+                rec["subjects"][subject] = {
+                    "subject_name": subject_name,
+                    "total_working_days": working,
+                    "total_present_days": present,
+                    "attendance_percentage": pct,
+                    "last_updated": updated or "",
+                }
+        return out
+
+    # --- per-document table mappings ---
+
+    def _rows(self, sql, args=()):
+        return self.conn.execute(sql, args).fetchall()
+
+    def _read_sections(self):
+        return {roll: sec for roll, sec in self._rows("SELECT roll, section FROM students ORDER BY rowid")}
+
+    def _write_sections(self, data):
+        if not isinstance(data, dict) or not all(isinstance(v, str) for v in data.values()):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM students")
+        self.conn.executemany("INSERT INTO students (roll, section) VALUES (?, ?)", list(data.items()))
+
+    def _read_sectionlist(self):
+        return [r[0] for r in self._rows("SELECT name FROM sections ORDER BY rowid")]
+
+    def _write_sectionlist(self, data):
+        if not isinstance(data, list) or not all(isinstance(v, str) for v in data):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM sections")
+        self.conn.executemany("INSERT INTO sections (name) VALUES (?)", [(v,) for v in data])
+
+    def _read_section_subjects(self):
+        out = {}
+        for sec, subj in self._rows("SELECT section, subject FROM section_subjects ORDER BY rowid"):
+            out.setdefault(sec, []).append(subj)
+        return out
+
+    def _write_section_subjects(self, data):
+        if not isinstance(data, dict) or not all(isinstance(v, list) and v for v in data.values()):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM section_subjects")
+        self.conn.executemany("INSERT INTO section_subjects (section, subject) VALUES (?, ?)",
+                              [(sec, str(subj)) for sec, subs in data.items() for subj in subs])
+
+    def _read_student_subjects(self):
+        return {roll: {"section": sec, "subjects": json.loads(subs)}
+                for roll, sec, subs in self._rows("SELECT roll, section, subjects FROM student_subjects ORDER BY rowid")}
+
+    def _write_student_subjects(self, data):
+        if not isinstance(data, dict):
+            raise _Unsupported
+        rows = []
+        for roll, entry in data.items():
+            if not isinstance(entry, dict) or set(entry) != {"section", "subjects"}:
+                raise _Unsupported
+            rows.append((roll, entry["section"], json.dumps(entry["subjects"])))
+        self.conn.execute("DELETE FROM student_subjects")
+        self.conn.executemany("INSERT INTO student_subjects (roll, section, subjects) VALUES (?, ?, ?)", rows)
+
+    def _read_subjects(self):
+        return {"subjects": [{"name": n, "code": c} for c, n in self._rows("SELECT code, name FROM subjects ORDER BY rowid")]}
+
+    def _write_subjects(self, data):
+        subs = data.get("subjects") if isinstance(data, dict) and set(data) == {"subjects"} else None
+        if not isinstance(subs, list) or not all(isinstance(s, dict) and set(s) == {"name", "code"} for s in subs):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM subjects")
+        self.conn.executemany("INSERT INTO subjects (code, name) VALUES (?, ?)", [(s["code"], s["name"]) for s in subs])
+
+    def _read_teacher_sections(self):
+        out = {}
+        for teacher, sec in self._rows("SELECT teacher, section FROM teacher_sections ORDER BY rowid"):
+            out.setdefault(teacher, []).append(sec)
+        return out
+
+    def _write_teacher_sections(self, data):
+        if not isinstance(data, dict) or not all(isinstance(v, list) and v for v in data.values()):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM teacher_sections")
+        self.conn.executemany("INSERT INTO teacher_sections (teacher, section) VALUES (?, ?)",
+                              [(t, str(sec)) for t, secs in data.items() for sec in secs])
+
+    def _read_topics(self):
+        out = {}
+        for sec, entry in self._rows("SELECT section, entry FROM topics ORDER BY rowid"):
+            out.setdefault(sec, []).append(json.loads(entry))
+        return out
+
+    def _write_topics(self, data):
+        if not isinstance(data, dict) or not all(isinstance(v, list) and v for v in data.values()):
+            raise _Unsupported
+        rows = []
+        for sec, items in data.items():
+            for it in items:
+                if not isinstance(it, dict):
+                    raise _Unsupported
+                rows.append((sec, it.get("date"), it.get("teacher"), json.dumps(it)))
+        self.conn.execute("DELETE FROM topics")
+        self.conn.executemany("INSERT INTO topics (section, date, teacher, entry) VALUES (?, ?, ?, ?)", rows)
+
+    def _read_exams(self):
+        return {"exam_schedule": [json.loads(e) for (e,) in self._rows("SELECT entry FROM exams ORDER BY rowid")]}
+
+    def _write_exams(self, data):
+        items = data.get("exam_schedule") if isinstance(data, dict) and set(data) == {"exam_schedule"} else None
+        if not isinstance(items, list) or not all(isinstance(it, dict) for it in items):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM exams")
+        self.conn.executemany("INSERT INTO exams (code, date, entry) VALUES (?, ?, ?)",
+                              [(it.get("subject_code") or it.get("code"), it.get("exam_date"), json.dumps(it)) for it in items])
+
+    def _read_rollnumbers(self):
+        out = {"map": {}, "counters": {}}
+        for role, name, roll in self._rows("SELECT role, name, roll FROM rollnumbers ORDER BY rowid"):
+            out["map"].setdefault(role, {})[name] = roll
+        for role, n in self._rows("SELECT role, n FROM roll_counters ORDER BY rowid"):
+            out["map"].setdefault(role, {})
+            out["counters"][role] = n
+        return out
+
+    def _write_rollnumbers(self, data):
+        if not isinstance(data, dict) or set(data) != {"map", "counters"}:
+            raise _Unsupported
+        if not isinstance(data["map"], dict) or not all(isinstance(v, dict) for v in data["map"].values()):
+            raise _Unsupported
+        if set(data["map"]) - set(data["counters"]):
+            raise _Unsupported
+        self.conn.execute("DELETE FROM rollnumbers")
+        self.conn.execute("DELETE FROM roll_counters")
+        self.conn.executemany("INSERT INTO rollnumbers (role, name, roll) VALUES (?, ?, ?)",
+                              [(role, name, roll) for role, m in data["map"].items() for name, roll in m.items()])
+        self.conn.executemany("INSERT INTO roll_counters (role, n) VALUES (?, ?)", list(data["counters"].items()))
+
+    def _read_attendance(self):
+        rows = self._rows(
+            "SELECT s.roll, s.name, s.section, a.subject, a.subject_name, a.working, a.present, a.percentage, a.last_updated "
+            "FROM attendance_students s LEFT JOIN attendance a ON a.roll = s.roll ORDER BY s.rowid, a.rowid")
+        meta = self._rows("SELECT body FROM documents WHERE doc = ?", (ATTENDANCE_DOC + "#metadata",))
+        return {"attendance_records": self._records(rows), "metadata": json.loads(meta[0][0]) if meta else {}}
+
+    @staticmethod
+    def _attendance_rows(roll, rec):
+        """(attendance_students row, [attendance rows]) of one record"""
+        if not isinstance(rec, dict) or set(rec) - {"name", "section", "subjects"}:
+            raise _Unsupported
+        rows = []
+        for key, det in (rec.get("subjects") or {}).items():
+            if not isinstance(det, dict):
+                raise _Unsupported
+            rows.append((roll, key, det.get("subject_name", key), int(det.get("total_working_days", 0)),
+                         int(det.get("total_present_days", 0)), float(det.get("attendance_percentage", 0.0)),
+                         det.get("last_updated", "")))
+        return (roll, rec.get("name", roll), rec.get("section", "")), rows
+
+    def _write_attendance(self, data):
+        if not isinstance(data, dict) or set(data) - {"attendance_records", "metadata"}:
+            raise _Unsupported
+        students, subjects = [], []
+        for roll, rec in data.get("attendance_records", {}).items():
+            student, rows = self._attendance_rows(roll, rec)
+            students.append(student)
+            subjects += rows
+        self.conn.execute("DELETE FROM attendance_students")
+        self.conn.execute("DELETE FROM attendance")
+        self.conn.executemany("INSERT INTO attendance_students (roll, name, section) VALUES (?, ?, ?)", students)
+        self.conn.executemany(
+            "INSERT INTO attendance (roll, subject, subject_name, working, present, percentage, last_updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", subjects)
+        self.conn.execute("INSERT OR REPLACE INTO documents (doc, body) VALUES (?, ?)",
+                          (ATTENDANCE_DOC + "#metadata", json.dumps(data.get("metadata", {}))))
+
+# -----------------------------------------------------------
+# Importer
+# -----------------------------------------------------------
+
+def import_json(data_dir=BASE_DIR, db_path=None):
+    """Copy every JSON store (and the attendance journal) into SQLite"""
+    import attendance_log
+
+    db_path = db_path or load_config()["sqlite_path"]
+    json_backend = JsonBackend()
+    db = SqliteBackend(db_path)
+    counts = {}
+    try:
+        for doc in DOCS:
+            path = os.path.join(data_dir, doc)
+            if not os.path.exists(path):
+                continue
+            if doc == ATTENDANCE_DOC:
+                # JSON side: snapshot + journal replayed
+                old = set_backend(json_backend)
+                try:
+                    data = attendance_log.load(path, {"attendance_records": {}, "metadata": {}})
+                    events = attendance_log.history(path)
+                finally:
+                    set_backend(old)
+                with db.lock, db.conn:
+                    db.conn.execute("DELETE FROM attendance_events")
+                    db.conn.executemany(
+                        "INSERT INTO attendance_events (date, roll, subject, present, teacher) VALUES (?, ?, ?, ?, ?)",
+                        [(e.get("date", ""), e["roll"], e["subject"], 1 if e.get("present") else 0, e.get("teacher"))
+                         for e in events])
+                counts["attendance_events"] = len(events)
+            else:
+                data = json_backend.read(path, None)
+                if data is None:
+                    continue
+            db.write(doc, data)
+            counts[doc] = len(data.get("attendance_records", {})) if doc == ATTENDANCE_DOC else len(data)
+    finally:
+        db.close()
+    return counts
+
+
+if __name__ == "__main__":
+    cfg = load_config()
+    print(f"Configured backend: {cfg['backend']} (SQLite database: {cfg['sqlite_path']})")
+    print("1. Import JSON files into the SQLite database")
+    ch = sys.argv[1] if len(sys.argv) > 1 else input("Enter choice: ").strip()
+    if ch in ("1", "import"):
+        for doc, n in import_json().items():
+            print(f"  {doc}: {n}")
+        print("Import complete. Set \"backend\": \"sqlite\" in config.json to use it.")
@@ -1,48 +1,50 @@
 import os
 import sys
-import subprocess
+import time
+from importlib.util import find_spec
+
+_started = time.perf_counter()
 
 this_dir = os.path.dirname(os.path.abspath(__file__))
 os.chdir(this_dir)
+if this_dir not in sys.path:
+    sys.path.insert(0, this_dir)
+
+# The GUI and the CLI both run in this interpreter: no subprocess to probe
+# for tkinter and no re-exec to fall back, so a kiosk pays one cold start.
+
+def gui_available():
+    """Cheap check that a Tk window can open: tkinter installed and a display to draw on"""
+    if find_spec("tkinter") is None:
+        return False, "tkinter is not installed"
+    if sys.platform.startswith(("win", "darwin")):
+        return True, ""
+    if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+        return False, "no display ($DISPLAY is not set)"
+    return True, ""
+
+def run_cli():
+    import main as cli
+    cli.main()
+    return 0
+
+def report_ready(root):
+    print(f"EduTrack window ready in {(time.perf_counter() - _started) * 1000:.0f} ms")
 
 def main():
-   
-    python_executable = sys.executable or "python3"
-    gui_path = os.path.join(this_dir, "gui.py")
-   
-    try:
-        rc = subprocess.call([python_executable, "-c", "import tkinter"],
-                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    except OSError as e:
-        print("Failed to check for tkinter availability:", e)
-        return 1
-
-    if rc != 0:
-        # tkinter not importable — run CLI instead
-        cli_path = os.path.join(this_dir, "main.py")
-        print("Tkinter not available — launching CLI instead.")
-        try:
-            return subprocess.call([python_executable, cli_path])
-        except OSError as e:
-            print("Failed to launch CLI process:", e)
-            return 1
+    ok, reason = gui_available()
+    if not ok:
+        print(f"GUI unavailable ({reason}) — launching CLI instead.")
+        return run_cli()
 
     try:
-        gui_rc = subprocess.call([python_executable, gui_path])
-    except OSError as e:
-        print("Failed to launch GUI process:", e)
-        return 1
-
-    if gui_rc == 0:
+        import gui
+        gui.launch(on_ready=report_ready)
         return 0
-
-    print("GUI exited unexpectedly (code {}). Launching CLI instead.".format(gui_rc))
-    cli_path = os.path.join(this_dir, "main.py")
-    try:
-        return subprocess.call([python_executable, cli_path])
-    except OSError as e:
-        print("Failed to launch CLI process:", e)
-        return 1
+    except Exception as e:
+        # e.g. TclError: the display refused the connection
+        print(f"GUI failed to start ({e}). Launching CLI instead.")
+    return run_cli()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,327 @@
+import os
+import re
+import sys
+import math
+import heapq
+import sqlite3
+import threading
+from collections import Counter
+import repository
+import assignments
+import pdftext
+
+# Full-text search over topics and submitted assignment text.
+#
+# An inverted index in SQLite (search.sqlite, next to topics.json): one row
+# per document with its facets (kind, section, teacher, date), one postings
+# row per (term, document) with the term frequency, and a document frequency
+# per term. Queries are ranked with BM25 and only read the postings of their
+# own terms, so they stay fast however many years of topics pile up.
+#
+# The index follows its sources incrementally. add_topic() indexes the new
+# entry directly; otherwise topics.json is re-read only when its signature
+# differs from the one recorded at the last sync. Assignments are indexed
+# from the pdftext cache, one document per student per section (their
+# latest version); a submission whose text is not extracted yet is picked
+# up by the first search after it is.
+
+SEARCH_FILE = "search.sqlite"
+K1, B = 1.2, 0.75
+MIN_TERM = 2
+STOPWORDS = frozenset("the and for with from into that this are was were has have its of to in on at by an or as is be".split())
+_WORD = re.compile(r"\w+")
+_ISO = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DMY = re.compile(r"(\d{2})/(\d{2})/(\d{4})")     # what topics.add_topic writes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id      INTEGER PRIMARY KEY,
+    key     TEXT NOT NULL UNIQUE,   -- topic:<section>:<n> or assignment:<section>:<roll>
+    kind    TEXT NOT NULL,          -- topic | assignment
+    section TEXT,
+    teacher TEXT,
+    date    TEXT,                   -- YYYY-MM-DD
+    title   TEXT,
+    tag     TEXT,                   -- what was indexed: topic text or blob sha
+    length  INTEGER NOT NULL,
+    terms   TEXT NOT NULL           -- distinct terms, space separated, for removal
+);
+CREATE INDEX IF NOT EXISTS docs_section ON docs(kind, section);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df   INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc  INTEGER NOT NULL,
+    tf   INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    name  TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def tokenize(text):
+    return [w for w in _WORD.findall(text.lower()) if len(w) >= MIN_TERM and w not in STOPWORDS]
+
+def _topic_text(entry):
+    return " ".join(str(entry.get(k, "")) for k in ("topic", "subject", "teacher"))
+
+def _topic_doc(key, section, entry):
+    text = _topic_text(entry)
+    return (key, "topic", text, section, entry.get("teacher"), iso_date(entry.get("date", "")),
+            entry.get("topic", ""), text)
+
+def iso_date(text):
+    """YYYY-MM-DD from either date format used in topics.json, else None"""
+    text = (text or "")[:10]
+    if _ISO.fullmatch(text):
+        return text
+    m = _DMY.fullmatch(text)
+    return f"{m[3]}-{m[2]}-{m[1]}" if m else None
+
+
+class SearchIndex:
+    """BM25 inverted index stored in one SQLite file"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.conn.executescript(SCHEMA)
+        self._seen = {}     # topics path -> signature, section -> (index rows, pending) at the last sync
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name, value):
+        self.conn.execute("INSERT INTO meta (name, value) VALUES (?, ?) "
+                          "ON CONFLICT(name) DO UPDATE SET value = excluded.value", (name, value))
+
+    def _stats(self):
+        """(documents, total length), kept as running totals in meta"""
+        values = dict(self.conn.execute("SELECT name, value FROM meta WHERE name IN ('docs', 'length')"))
+        return int(values.get("docs", 0)), int(values.get("length", 0))
+
+    def _count(self, docs, length):
+        self.conn.executemany("INSERT INTO meta (name, value) VALUES (?, ?) "
+                              "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                              (("docs", docs), ("length", length)))
+
+    # --- writing ---
+
+    def _remove(self, key):
+        row = self.conn.execute("SELECT id, length, terms FROM docs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        doc, length, terms = row
+        terms = terms.split()
+        self.conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", ((t,) for t in terms))
+        self.conn.executemany("DELETE FROM postings WHERE term = ? AND doc = ?", ((t, doc) for t in terms))
+        self.conn.execute("DELETE FROM docs WHERE id = ?", (doc,))
+        self._count(-1, -length)
+
+    def _add(self, docs):
+        """Index (key, kind, text, section, teacher, date, title, tag) tuples whose keys are not indexed yet"""
+        postings, df, added, total = [], Counter(), 0, 0
+        for key, kind, text, section, teacher, date, title, tag in docs:
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            # SQLite assigns the id inside this write transaction, so two
+            # processes indexing at once can never pick the same one
+            doc = self.conn.execute("INSERT INTO docs (key, kind, section, teacher, date, title, tag, length, terms) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (key, kind, section, teacher, date, title, tag, length, " ".join(counts))).lastrowid
+            postings.extend((t, doc, n) for t, n in counts.items())
+            df.update(counts.keys())
+            added += 1
+            total += length
+        if not added:
+            return
+        postings.sort()     # insert in primary-key order
+        self.conn.executemany("INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)", postings)
+        self.conn.executemany("INSERT INTO terms (term, df) VALUES (?, ?) "
+                              "ON CONFLICT(term) DO UPDATE SET df = df + excluded.df", sorted(df.items()))
+        self._count(added, total)
+
+    def remove(self, key):
+        with self.lock, self.conn:
+            self._remove(key)
+
+    def put_topic(self, section, position, entry):
+        with self.lock, self.conn:
+            self._put_topic(section, position, entry)
+
+    def _put_topic(self, section, position, entry):
+        key = f"topic:{section}:{position}"
+        self._remove(key)
+        self._add([_topic_doc(key, section, entry)])
+
+    # --- keeping up with the sources ---
+
+    def sync_topics(self, topics_path):
+        """Index topics added, changed or removed since the last sync"""
+        sig = topics_signature(topics_path)
+        if self._seen.get(topics_path) == sig:
+            return
+        with self.lock, self.conn:
+            if self.meta("topics_signature") != sig:
+                fresh = repository.backend().read(os.path.abspath(topics_path), {})
+                indexed = dict(self.conn.execute("SELECT key, tag FROM docs WHERE kind = 'topic'"))
+                wanted, changed = set(), []
+                for section, items in fresh.items():
+                    for position, entry in enumerate(items if isinstance(items, list) else []):
+                        key = f"topic:{section}:{position}"
+                        wanted.add(key)
+                        if indexed.get(key) != _topic_text(entry):
+                            changed.append(_topic_doc(key, section, entry))
+                for key in (set(indexed) - wanted) | {d[0] for d in changed if d[0] in indexed}:
+                    self._remove(key)
+                self._add(changed)
+                if topics_signature(topics_path) != sig:
+                    return      # written while we read it; sync again next time
+                self.set_meta("topics_signature", sig)
+        self._seen[topics_path] = sig
+
+    def sync_assignments(self, sections, folder=None):
+        """Index the latest submission of every student whose text is cached"""
+        for section in sections:
+            rows = assignments.section_index(section, folder)
+            seen = self._seen.get(("assignments", section))
+            if seen is not None and seen[0] is rows and not seen[1]:
+                continue
+            with self.lock, self.conn:
+                indexed = dict(self.conn.execute(
+                    "SELECT key, tag FROM docs WHERE kind = 'assignment' AND section = ?", (section,)))
+                pending, changed = 0, []
+                for roll, row in rows.items():
+                    key, sha = f"assignment:{section}:{roll}", row.get("sha256")
+                    if not sha or indexed.get(key) == sha:
+                        continue
+                    if not pdftext.is_cached(sha, folder):
+                        pending += 1
+                        continue
+                    text = "\n".join(t for _, t in pdftext.read_pages(sha, folder=folder))
+                    changed.append((key, "assignment", text, section, None, row["submitted_at"][:10],
+                                    f"{roll} - {row['file']}", sha))
+                gone = set(indexed) - {f"assignment:{section}:{r}" for r in rows}
+                for key in gone | {d[0] for d in changed if d[0] in indexed}:
+                    self._remove(key)
+                self._add(changed)
+            self._seen[("assignments", section)] = (rows, pending)
+
+    # --- querying ---
+
+    def search(self, query, kind=None, sections=None, teacher=None, since=None, until=None, limit=20):
+        """Top documents for a query by BM25: [{key, kind, section, teacher, date, title, score}]
+
+        sections, teacher, since and until ("YYYY-MM-DD") restrict the facets.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        where, args = [], []
+        if kind:
+            where.append("d.kind = ?"); args.append(kind)
+        if sections is not None:
+            sections = list(sections)
+            where.append(f"d.section IN ({','.join('?' * len(sections))})"); args.extend(sections)
+        if teacher:
+            where.append("LOWER(d.teacher) = ?"); args.append(teacher.lower())
+        if since:
+            where.append("d.date >= ?"); args.append(since)
+        if until:
+            where.append("d.date <= ?"); args.append(until)
+        facet = "".join(f" AND {w}" for w in where)
+        scores = Counter()
+        with self.lock:
+            total, length = self._stats()
+            avg = (length / total if total else 0) or 1
+            for term in terms:
+                row = self.conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+                if not row or row[0] <= 0:
+                    continue
+                idf = math.log(1 + (total - row[0] + 0.5) / (row[0] + 0.5))
+                for doc, tf, dl in self.conn.execute(
+                        "SELECT p.doc, p.tf, d.length FROM postings p JOIN docs d ON d.id = p.doc "
+                        "WHERE p.term = ?" + facet, (term, *args)):
+                    scores[doc] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avg))
+            best = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+            out = []
+            for doc, score in best:
+                key, kind_, section, teacher_, date, title = self.conn.execute(
+                    "SELECT key, kind, section, teacher, date, title FROM docs WHERE id = ?", (doc,)).fetchone()
+                out.append({"key": key, "kind": kind_, "section": section, "teacher": teacher_,
+                            "date": date, "title": title, "score": round(score, 3)})
+        return out
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def index_for(topics_path):
+    """The shared SearchIndex kept next to a topics.json"""
+    db_path = os.path.join(os.path.dirname(os.path.abspath(topics_path)), SEARCH_FILE)
+    with _indexes_lock:
+        if db_path not in _indexes:
+            _indexes[db_path] = SearchIndex(db_path)
+        return _indexes[db_path]
+
+def topics_signature(topics_path):
+    return repr(repository.backend().signature(os.path.abspath(topics_path)))
+
+def topic_added(topics_path, section, position, entry, before):
+    """Index one new topic; before is topics_signature() from just ahead of the write"""
+    index = index_for(topics_path)
+    with index.lock, index.conn:
+        index._put_topic(section, position, entry)
+        if index.meta("topics_signature") == before:
+            # nothing else changed since the last sync, so the index is current
+            index.set_meta("topics_signature", topics_signature(topics_path))
+
+def search(query, topics_path, folder=None, sections=None, **facets):
+    """Bring the index up to date for these sections, then run a query"""
+    index = index_for(topics_path)
+    index.sync_topics(topics_path)
+    if facets.get("kind") != "topic":
+        folder = folder or assignments.ASSIGNMENT_FOLDER
+        index.sync_assignments(sections if sections is not None else _assignment_sections(folder), folder)
+    return index.search(query, sections=sections, **facets)
+
+def _assignment_sections(folder):
+    if not os.path.isdir(folder):
+        return []
+    skip = {assignments.BLOB_FOLDER, assignments.INDEX_FOLDER, pdftext.TEXT_FOLDER}
+    return [e.name for e in os.scandir(folder) if e.is_dir() and e.name not in skip]
+
+def print_results(results):
+    if not results:
+        print("No matches.")
+        return
+    for n, r in enumerate(results, 1):
+        who = f", {r['teacher']}" if r["teacher"] else ""
+        print(f"{n:>2}. [{r['kind']} {r['section']}] {r['title']} ({r['date'] or '-'}{who})  score {r['score']}")
+
+def search_interactive(sections=None):
+    query = input("Search for: ").strip()
+    if not query:
+        return
+    kind = input("Only topics or assignments? (t/a, Enter for both): ").strip().lower()
+    since = input("From date YYYY-MM-DD (Enter for any): ").strip() or None
+    kind = {"t": "topic", "a": "assignment"}.get(kind[:1])
+    print_results(search(query, "topics.json", sections=sections, kind=kind, since=since))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print_results(search(" ".join(sys.argv[1:]), "topics.json"))
+    else:
+        search_interactive()
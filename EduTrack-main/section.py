@@ -1,6 +1,6 @@
 import os
-import json
 from datetime import datetime
+import store
 from datetime import date
 
 sectionListFile = "sectionlist.json"
@@ -14,21 +14,19 @@ def loadJson(filename, default):
     # so JSON files placed next to the EduTrack-main folder are used.
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     filepath = os.path.join(base_dir, filename)
-    if not os.path.exists(filepath):
-        return default
-    try:
-        with open(filepath, "r") as f:
-            return json.load(f)
-    except Exception:
-        return default
+    return store.load(filepath, default)
 
 def saveJson(filename, data):
     # Save JSON relative to project root (one level above this module)
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     filepath = os.path.join(base_dir, filename)
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2)
+    store.save(filepath, data)
+
+def updateJson(filename, default, fn):
+    # Locked read-modify-write relative to project root (see store.update)
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    return store.update(os.path.join(base_dir, filename), default, fn)
 
 def getSubjectsForSection(section):
     """Get the subjects assigned to a specific section from sectionsubjects.json"""
@@ -62,19 +60,19 @@ def createSection():
     if s in lst:
         print("Section already exists.")
         return
-    lst.append(s)
-    saveJson(sectionListFile, sorted(lst))
+    updateJson(sectionListFile, [],
+               lambda cur: sorted({str(x).strip().upper() for x in cur if str(x).strip()} | {s}))
     
     # Initialize section subjects mapping for the new section if it matches patterns
-    section_subjects = loadJson(sectionSubjectsFile, {})
-    if s in ["AI", "BI", "CI", "DI"]:
-        section_subjects[s] = ["Basic Maths", "English-I", "C Lang", "Electronics", "Computer Networking"]
-    elif s in ["AIII", "BIII", "CIII", "DIII"]:
-        section_subjects[s] = ["DSA", "English-III", "Maths-III", "Artificial Intelligence", "Operating System"]
-    elif s in ["AV", "BV", "CV", "DV"]:
-        section_subjects[s] = ["English-V", "Machine Learning", "Algorithm", "OOP", "Database"]
+    def addSubjects(section_subjects):
+        if s in ["AI", "BI", "CI", "DI"]:
+            section_subjects[s] = ["Basic Maths", "English-I", "C Lang", "Electronics", "Computer Networking"]
+        elif s in ["AIII", "BIII", "CIII", "DIII"]:
+            section_subjects[s] = ["DSA", "English-III", "Maths-III", "Artificial Intelligence", "Operating System"]
+        elif s in ["AV", "BV", "CV", "DV"]:
+            section_subjects[s] = ["English-V", "Machine Learning", "Algorithm", "OOP", "Database"]
     
-    saveJson(sectionSubjectsFile, section_subjects)
+    updateJson(sectionSubjectsFile, {}, addSubjects)
     print(f"Section {s} created.")
 
 def listSections(returnList=False):
@@ -89,33 +87,27 @@ def listSections(returnList=False):
     return lst if returnList else None
 
 
-import json, os
+import os
 from datetime import date
+import attendance_log
+import subject
 
 def assignSectionFromList():
     try:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
         def load_json(fname, default):
-            path = os.path.join(base_dir, fname)
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            return default
+            return store.load(os.path.join(base_dir, fname), default)
 
-        def save_json(fname, data):
-            path = os.path.join(base_dir, fname)
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+        def update_json(fname, default, fn):
+            return store.update(os.path.join(base_dir, fname), default, fn)
 
         # Load required JSON files
-        rollnumbers = load_json("rollnumbers.json", {})
+        registry = subject.rollIndex(os.path.join(base_dir, "rollnumbers.json"))
         sections = load_json("sections.json", {})
         sectionsubjects = load_json("sectionsubjects.json", {})
-        studentsubjects = load_json("studentsubjects.json", {})
-        attendance_master = load_json("attendance_master.json", {"attendance_records": {}, "metadata": {}})
 
-        student_map = rollnumbers.get("map", {}).get("student", {})
+        student_map = registry["byName"].get("student", {})
         if not student_map:
             print("No students found in rollnumbers.json")
             return
@@ -126,11 +118,12 @@ def assignSectionFromList():
             print(f"{rv} - {nm} (Section: {current_section})")
 
         roll = input("\nEnter student roll number to assign section: ").strip()
-        if roll not in student_map.values():
+        owner = registry["byRoll"].get(roll)
+        if not owner or owner[0] != "student":
             print("Invalid roll number.")
             return
 
-        student_name = next((n for n, r in student_map.items() if r == roll), roll)
+        student_name = owner[1]
         section_choice = input(f"Enter section name to assign for {student_name} ({roll}): ").strip()
 
         if not section_choice:
@@ -138,8 +131,7 @@ def assignSectionFromList():
             return
 
         # --- Update sections.json ---
-        sections[roll] = section_choice
-        save_json("sections.json", sections)
+        update_json("sections.json", {}, lambda cur: cur.update({roll: section_choice}))
         print(f"Assigned section '{section_choice}' to student with roll number {roll} successfully!")
 
         # --- Get subjects for this section ---
@@ -149,42 +141,44 @@ def assignSectionFromList():
             return
 
         # --- Update studentsubjects.json ---
-        studentsubjects[roll] = {
+        update_json("studentsubjects.json", {}, lambda cur: cur.update({roll: {
             "section": section_choice,
             "subjects": subjects
-        }
-        save_json("studentsubjects.json", studentsubjects)
+        }}))
         print(f"Updated studentsubjects.json for {roll}")
 
         # --- Update attendance_master.json ---
-        attendance_records = attendance_master.get("attendance_records", {})
-        if roll not in attendance_records:
-            subjects_dict = {
-                sub: {
-                    "subject_name": sub,
-                    "total_working_days": 0,
-                    "total_present_days": 0,
-                    "attendance_percentage": 0.0,
-                    "last_updated": str(date.today())
+        created = []
+
+        def updateAttendance(attendance_master):
+            created.clear()
+            attendance_records = attendance_master.setdefault("attendance_records", {})
+            if roll not in attendance_records:
+                subjects_dict = {
+                    sub: {
+                        "subject_name": sub,
+                        "total_working_days": 0,
+                        "total_present_days": 0,
+                        "attendance_percentage": 0.0,
+                        "last_updated": str(date.today())
+                    }
+                    for sub in subjects
                 }
-                for sub in subjects
-            }
-            attendance_records[roll] = {
-                "name": student_name,
-                "section": section_choice,
-                "subjects": subjects_dict
-            }
+                attendance_records[roll] = {
+                    "name": student_name,
+                    "section": section_choice,
+                    "subjects": subjects_dict
+                }
+                created.append(roll)
+            else:
+                attendance_records[roll]["section"] = section_choice
+
+        attendance_log.update(os.path.join(base_dir, "attendance_master.json"), updateAttendance)
+        if created:
             print(f"Attendance record created for roll {roll}")
         else:
-            attendance_records[roll]["section"] = section_choice
             print(f"Updated existing attendance record for roll {roll}")
 
-        attendance_master["attendance_records"] = attendance_records
-        attendance_master.setdefault("metadata", {})
-        attendance_master["metadata"]["last_updated"] = str(date.today())
-        attendance_master["metadata"]["total_students"] = len(attendance_records)
-        save_json("attendance_master.json", attendance_master)
-
     except Exception as e:
         print("Error while assigning section:", e)
 
@@ -211,10 +205,8 @@ def assignSectionToTeacher():
     if not chosen:
         print("No valid sections selected.")
         return
-    tmap = loadJson(teacherSectionsFile, {})
-    tmap[teacher] = sorted(set(chosen))
-    saveJson(teacherSectionsFile, tmap)
-    print(f"Assigned sections {', '.join(tmap[teacher])} to {teacher}.")
+    updateJson(teacherSectionsFile, {}, lambda tmap: tmap.update({teacher: sorted(set(chosen))}))
+    print(f"Assigned sections {', '.join(sorted(set(chosen)))} to {teacher}.")
 
 def viewMySections(teachername):
     tmap = loadJson(teacherSectionsFile, {})
@@ -267,8 +259,8 @@ def viewStudentSubjects(roll):
         return
     
     print(f"\nSubjects assigned to {roll} (Section {section}):")
-    for i, subject in enumerate(subjects, 1):
-        print(f" {i}. {subject}")
+    for i, subj in enumerate(subjects, 1):
+        print(f" {i}. {subj}")
 
 def initialize_all_attendance_records():
     """Initialize attendance records for all students who have sections assigned"""
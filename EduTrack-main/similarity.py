@@ -0,0 +1,162 @@
+import os
+import re
+import sys
+import zlib
+from collections import defaultdict
+import numpy as np
+import assignments
+import pdftext
+
+# Near-duplicate submissions via MinHash and LSH.
+#
+# A submission's cached page text is lower-cased, split into words and cut
+# into overlapping SHINGLE-word shingles. NUM_PERM hash functions
+# (multiply-shift over 64-bit shingle hashes) each keep their minimum, giving
+# a fixed-size signature whose agreement rate estimates the Jaccard
+# similarity of two shingle sets. Signatures sit next to the text cache as
+# <sha>.minhash.npy, so each unique PDF is signed once.
+#
+# To avoid comparing every pair, the signature is cut into BANDS bands of
+# ROWS values; only submissions sharing a whole band in some band are
+# compared. With 32 x 4, pairs above about 0.5 similarity almost always
+# share a band and unrelated pairs almost never do.
+
+SHINGLE = 5
+NUM_PERM = 128
+BANDS, ROWS = 32, 4
+SIMILAR_AT = 0.5                    # estimated Jaccard reported as similar
+EMPTY = np.uint32(0xFFFFFFFF)       # every slot of a signature with no shingles
+_WORD = re.compile(r"\w+")
+_CHUNK = 4096                       # shingles hashed against all permutations at once
+
+_rng = np.random.default_rng(20240917)
+_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_MIX = np.array([0x9E3779B97F4A7C15 ** k % 2**64 for k in range(SHINGLE)], dtype=np.uint64)
+
+_signatures = {}    # (sha, folder) -> signature; content-addressed, so never stale
+
+
+def shingle_hashes(text):
+    """Distinct 64-bit hashes of the SHINGLE-word shingles of a text"""
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE:
+        return np.empty(0, dtype=np.uint64)
+    ids = {w: zlib.crc32(w.encode()) for w in set(words)}
+    tokens = np.fromiter(map(ids.__getitem__, words), dtype=np.uint64, count=len(words))
+    n = len(words) - SHINGLE + 1
+    with np.errstate(over="ignore"):
+        mixed = sum(tokens[k:k + n] * _MIX[k] for k in range(SHINGLE))
+    return np.unique(mixed)
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint32) of a text"""
+    sig = np.full(NUM_PERM, EMPTY, dtype=np.uint32)
+    shingles = shingle_hashes(text)
+    with np.errstate(over="ignore"):
+        for i in range(0, len(shingles), _CHUNK):
+            block = shingles[i:i + _CHUNK, None] * _A + _B
+            np.minimum(sig, (block >> np.uint64(32)).min(axis=0).astype(np.uint32), out=sig)
+    return sig
+
+def _sig_path(sha, folder):
+    return pdftext.cache_base(sha, folder) + ".minhash.npy"
+
+def signature_for(sha, folder=None):
+    """Signature of a submission's cached text, computed on first use; None until its text is cached"""
+    key = (sha, folder)
+    if key in _signatures:
+        return _signatures[key]
+    path = _sig_path(sha, folder)
+    if os.path.exists(path):
+        sig = np.load(path)
+    elif pdftext.is_cached(sha, folder):
+        sig = signature("\n".join(t for _, t in pdftext.read_pages(sha, folder=folder)))
+        tmp = f"{path}.{os.getpid()}.npy"
+        np.save(tmp, sig)
+        os.replace(tmp, path)
+    else:
+        return None
+    _signatures[key] = sig
+    return sig
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+def candidate_pairs(sigs):
+    """Pairs of keys whose signatures agree on at least one whole band"""
+    keys = list(sigs)
+    if len(keys) < 2:
+        return set()
+    banded = np.stack([sigs[k] for k in keys]).reshape(len(keys), BANDS, ROWS)
+    pairs = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for i, row in enumerate(banded[:, band, :]):
+            buckets[row.tobytes()].append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return {(keys[i], keys[j]) for i, j in pairs}
+
+def similar_pairs(sigs, threshold=SIMILAR_AT):
+    """[(key, key, similarity)] above threshold, most similar first"""
+    out = []
+    for a, b in candidate_pairs(sigs):
+        sim = similarity(sigs[a], sigs[b])
+        if sim >= threshold:
+            out.append((a, b, sim))
+    out.sort(key=lambda p: -p[2])
+    return out
+
+def section_report(section, folder=None, threshold=SIMILAR_AT):
+    """[(roll, roll, similarity)] for a section's latest submissions whose text is cached"""
+    rolls_of = defaultdict(list)
+    for roll, row in assignments.section_index(section, folder).items():
+        if row.get("sha256"):
+            rolls_of[row["sha256"]].append(roll)
+    sigs = {}
+    for sha in rolls_of:
+        sig = signature_for(sha, folder)
+        if sig is not None and sig[0] != EMPTY:
+            sigs[sha] = sig
+    pairs = []
+    for sha, rolls in rolls_of.items():
+        if sha in sigs:         # byte-identical uploads
+            pairs.extend((a, b, 1.0) for i, a in enumerate(rolls) for b in rolls[i + 1:])
+    for a, b, sim in similar_pairs(sigs, threshold):
+        pairs.extend((x, y, sim) for x in rolls_of[a] for y in rolls_of[b])
+    report = [(min(a, b), max(a, b), sim) for a, b, sim in pairs]
+    report.sort(key=lambda p: (-p[2], p[0], p[1]))
+    return report
+
+def best_matches(report):
+    """roll -> (most similar other roll, similarity)"""
+    best = {}
+    for a, b, sim in report:
+        for me, other in ((a, b), (b, a)):
+            if me not in best or sim > best[me][1]:
+                best[me] = (other, sim)
+    return best
+
+def print_report(sections, folder=None):
+    """Extract any missing text, then print the similar pairs of each section"""
+    extractor = pdftext.service(folder)
+    for job in [job for sec in sections for job in extractor.queue_section(sec)]:
+        try:
+            job.result()
+        except Exception as e:
+            print(f"Could not read a PDF: {e}")
+    for sec in sections:
+        report = section_report(sec, folder)
+        print(f"\nSection {sec}: {len(report)} similar pair(s)")
+        for a, b, sim in report:
+            print(f"   {a:<12} {b:<12} {sim * 100:5.1f}%")
+    extractor.shutdown()
+
+
+if __name__ == "__main__":
+    # python similarity.py <section> ...
+    print_report([s.strip().upper() for s in sys.argv[1:]] or [input("Section: ").strip().upper()])
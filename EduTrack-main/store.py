@@ -0,0 +1,208 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+import repository
+
+try:
+    import fcntl
+except ImportError:     # Windows: only threads of this process are serialized
+    fcntl = None
+
+# Process-wide cache of parsed data files.
+#
+# load()/view() return the parsed JSON for a path and only go back to disk
+# when the file's (mtime, size) signature changes. The signature itself is
+# re-checked at most every STAT_INTERVAL seconds, so repeated screen
+# navigation is served from memory. save() writes through: the file is
+# written and the cache is updated in place, so this process sees its own
+# writes immediately.
+#
+# view() hands out the shared cached object and must be treated as read-only;
+# load() returns a private copy that callers may mutate before save().
+#
+# Where a document actually lives (JSON file or SQLite tables) is decided by
+# the backend in repository.py.
+#
+# Writes are atomic (temp file + fsync + rename in the JSON backend) and
+# serialized between processes by an advisory lock on <file>.lock. Code that
+# reads a document, changes it and writes it back should use update(), which
+# does the read under the lock and checks that nobody slipped a write in
+# between (compare-and-swap); a plain load() + save() can lose a concurrent
+# CLI/GUI session's changes.
+
+STAT_INTERVAL = 1.0
+UPDATE_RETRIES = 5
+
+_lock = threading.RLock()
+_docs = {}      # key -> (paths, signature, value)
+_checked = {}   # key -> monotonic time of the last signature check
+_corrupt = set()   # paths that failed to parse; never overwritten blindly
+_file_locks = {}   # lock file -> [RLock, depth, open handle]
+_building = {}     # memo key -> RLock held while that entry is rebuilt
+_stats = {"hits": 0, "misses": 0, "writes": 0, "conflicts": 0}
+
+
+class Conflict(Exception):
+    """A read-modify-write kept losing the race against other writers"""
+
+
+def _signature(path):
+    return repository.backend().signature(path)
+
+def clone(obj):
+    """Copy of a parsed JSON value (dicts and lists are copied, leaves shared)"""
+    if isinstance(obj, dict):
+        return {k: clone(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [clone(v) for v in obj]
+    return obj
+
+def memo(key, paths, build):
+    """Cache build() until the signature of any file in paths changes.
+
+    Returns the shared cached value; do not mutate it. build() and the
+    signature checks run outside the process-wide lock, so one rebuild only
+    holds up callers of the same key.
+    """
+    paths = tuple(os.path.abspath(p) for p in paths)
+    with _lock:
+        entry = _docs.get(key)
+        if entry is not None and time.monotonic() - _checked.get(key, 0.0) < STAT_INTERVAL:
+            _stats["hits"] += 1
+            return entry[2]
+        building = _building.setdefault(key, threading.RLock())
+    with building:
+        sig = tuple(_signature(p) for p in paths)
+        with _lock:
+            entry = _docs.get(key)
+            if entry is not None and entry[1] == sig:
+                _checked[key] = time.monotonic()
+                _stats["hits"] += 1
+                return entry[2]
+            _stats["misses"] += 1
+        value = build()
+        with _lock:
+            # keyed by the signature read before the build, so a write that
+            # raced it shows up as a change; and never over a newer save()
+            if _docs.get(key) is entry:
+                _docs[key] = (paths, sig, value)
+                _checked[key] = time.monotonic()
+        return value
+
+def _expire_dependents(path):
+    # force anything derived from path to re-check its signature on next use
+    for key, entry in _docs.items():
+        if path in entry[0]:
+            _checked.pop(key, None)
+
+def _parse(path, default):
+    try:
+        data = repository.backend().read(path, default)
+    except ValueError:
+        # unreadable file: show the default, but remember not to save over it
+        _corrupt.add(path)
+        return default
+    _corrupt.discard(path)
+    return data
+
+def view(path, default):
+    """Shared, read-only parsed contents of a JSON file (default if missing)"""
+    path = os.path.abspath(path)
+    return memo(path, (path,), lambda: _parse(path, default))
+
+def load(path, default):
+    """Private copy of the parsed contents of a JSON file (default if missing)"""
+    return clone(view(path, default))
+
+@contextmanager
+def lock(path):
+    """Exclusive advisory lock on path (held on path + ".lock"), re-entrant"""
+    lock_path = os.path.abspath(path) + ".lock"
+    with _lock:
+        entry = _file_locks.setdefault(lock_path, [threading.RLock(), 0, None])
+    with entry[0]:
+        if entry[1] == 0 and fcntl is not None:
+            fh = open(lock_path, "a")
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            entry[2] = fh
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and entry[2] is not None:
+                fcntl.flock(entry[2].fileno(), fcntl.LOCK_UN)
+                entry[2].close()
+                entry[2] = None
+
+def _write(path, data):
+    # caller holds lock(path)
+    if path in _corrupt:
+        raise ValueError(f"{os.path.basename(path)} is corrupt; refusing to overwrite it")
+    repository.backend().write(path, data)
+    sig = _signature(path)
+    with _lock:
+        _expire_dependents(path)
+        _docs[path] = ((path,), (sig,), clone(data))
+        _checked[path] = time.monotonic()
+        _stats["writes"] += 1
+
+def save(path, data):
+    """Write data as JSON and update the cache (write-through)"""
+    path = os.path.abspath(path)
+    with lock(path):
+        _write(path, data)
+
+def update(path, default, fn):
+    """Locked read-modify-write of one document; returns the saved data.
+
+    fn(data) changes a fresh private copy in place (or returns a replacement).
+    The copy is written only if the document is unchanged since it was read;
+    otherwise the read and fn are retried, up to UPDATE_RETRIES times.
+    """
+    path = os.path.abspath(path)
+    for _ in range(UPDATE_RETRIES):
+        with lock(path):
+            sig = _signature(path)
+            data = repository.backend().read(path, clone(default))
+            _corrupt.discard(path)
+            result = fn(data)
+            if result is not None:
+                data = result
+            if _signature(path) != sig:
+                # written by someone not holding the lock; start again
+                _stats["conflicts"] += 1
+                continue
+            _write(path, data)
+            return data
+    raise Conflict(f"{os.path.basename(path)} kept changing; update abandoned")
+
+def touch(path):
+    """Tell the cache that path was changed by this process"""
+    with _lock:
+        _expire_dependents(os.path.abspath(path))
+
+def invalidate(path=None):
+    """Forget cached entries (all of them when path is None)"""
+    with _lock:
+        if path is None:
+            _docs.clear()
+            _checked.clear()
+            return
+        path = os.path.abspath(path)
+        for key in [k for k, entry in _docs.items() if path in entry[0]]:
+            _docs.pop(key, None)
+            _checked.pop(key, None)
+
+def stats():
+    """Hit/miss/write counters and the number of cached entries"""
+    with _lock:
+        out = dict(_stats)
+        out["entries"] = len(_docs)
+        return out
+
+def reset_stats():
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
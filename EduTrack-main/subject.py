@@ -1,36 +1,36 @@
 import os
-import json
+import store
 
 subjectsFile = "subjects.json"
 rollnumbersFile = "rollnumbers.json"
 
 def loadJson(filename, default):
-    if not os.path.exists(filename):
-        return default
-    try:
-        with open(filename, "r") as f:
-            return json.load(f)
-    except:
-        return default
+    return store.load(filename, default)
 
 def saveJson(filename, data):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+    store.save(filename, data)
+
+def updateJson(filename, default, fn):
+    return store.update(filename, default, fn)
 
 def addSubject():
-    data = loadJson(subjectsFile, {"subjects": []})
-    subjects = data.get("subjects", []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
-    
     name = input("Enter subject name: ").strip()
     code = input("Enter subject code [eg- TMA101]: ").strip().upper()
-    
-    if any(s.get("code") == code for s in subjects):
+    added = []
+
+    def add(data):
+        added.clear()
+        subjects = data.get("subjects", []) if isinstance(data, dict) else (data if isinstance(data, list) else [])
+        if any(s.get("code") == code for s in subjects):
+            return data
+        subjects.append({"name": name, "code": code})
+        added.append(code)
+        return {"subjects": subjects}
+
+    updateJson(subjectsFile, {"subjects": []}, add)
+    if not added:
         print("Subject code already exists.")
         return
-    
-    subjects.append({"name": name, "code": code})
-    toSave = {"subjects": subjects}
-    saveJson(subjectsFile, toSave)
     print("Subject added.")
 
 def listSubjects():
@@ -46,39 +46,78 @@ def listSubjects():
         print(f" {i}. {s.get('name','')} ({s.get('code','')})")
     return subjects
 
+# Roll-number registry.
+#
+# rollnumbers.json maps name -> roll per role and keeps one counter per role.
+# Lookups go through an index built once per version of the file, with both
+# directions (name -> roll and roll -> (role, name)) as dicts. Allocation
+# reserves a block of counter values for all new names in one locked update,
+# so concurrent registrations get disjoint numbers and a bulk import writes
+# the file once instead of once per student.
+
+ROLL_PREFIX = {"student": "2025", "teacher": "T", "admin": "A"}
+
+def emptyRegistry():
+    return {
+        "map": {"student": {}, "teacher": {}, "admin": {}},
+        "counters": {"student": 0, "teacher": 0, "admin": 0},
+    }
+
+def formatRollNumber(role, n):
+    return f"{ROLL_PREFIX.get(role, ROLL_PREFIX['student'])}{str(n).zfill(4)}"
+
+def rollIndex(path=None):
+    """{"byName": {role: {name: roll}}, "byRoll": {roll: (role, name)}}, cached per file version"""
+    path = os.path.abspath(path or rollnumbersFile)
+
+    def build():
+        db = store.view(path, {})
+        roles = db.get("map", {}) if isinstance(db, dict) else {}
+        byName = {role: dict(names) for role, names in roles.items() if isinstance(names, dict)}
+        byRoll = {}
+        for role, names in byName.items():
+            for name, roll in names.items():
+                byRoll[roll] = (role, name)
+        return {"byName": byName, "byRoll": byRoll}
+    return store.memo(("rollindex", path), (path,), build)
+
+def lookupRollNumber(name, role="student", path=None):
+    """Roll number of name, or None; never allocates"""
+    return rollIndex(path)["byName"].get(role, {}).get(name)
+
+def lookupName(roll, path=None):
+    """(role, name) registered for roll, or None"""
+    return rollIndex(path)["byRoll"].get(str(roll).strip())
+
+def reserveRollNumbers(names, role="student", path=None):
+    """Roll numbers for names, allocating one counter block for the new ones.
+
+    Returns {name: roll}. Names that already have a roll keep it.
+    """
+    names = list(dict.fromkeys(names))
+    path = path or rollnumbersFile
+    result = {}
+
+    def allocate(db):
+        if not isinstance(db, dict) or "map" not in db or "counters" not in db:
+            db = emptyRegistry()
+        result.clear()
+        known = db["map"].setdefault(role, {})
+        fresh = [n for n in names if n not in known]
+        # reserve [start, start + len(fresh)) in one counter bump
+        start = db["counters"].get(role, 0) + 1
+        db["counters"][role] = start + len(fresh) - 1
+        for i, name in enumerate(fresh):
+            known[name] = formatRollNumber(role, start + i)
+        for name in names:
+            result[name] = known[name]
+        return db
+
+    # counter bump and map entries happen under the file lock (store.update),
+    # so two sessions registering at once never hand out the same number
+    updateJson(path, {}, allocate)
+    return dict(result)
+
 def getRollNumber(name, role="student"):
-    db = loadJson(rollnumbersFile, {})
-    
-    # Initialize proper structure if not present
-    if not isinstance(db, dict) or "map" not in db or "counters" not in db:
-        db = {
-            "map": {
-                "student": {},
-                "teacher": {}, 
-                "admin": {}
-            },
-            "counters": {
-                "student": 0,
-                "teacher": 0,
-                "admin": 0
-            }
-        }
-    
-    # Check if user already exists
-    if name in db["map"].get(role, {}):
-        return db["map"][role][name]
-    
-    # Generate new roll number
-    db["counters"][role] = db["counters"].get(role, 0) + 1
-    n = db["counters"][role]
-    
-    if role == "teacher":
-        roll = f"T{str(n).zfill(4)}"
-    elif role == "admin":
-        roll = f"A{str(n).zfill(4)}"
-    else:
-        roll = f"2025{str(n).zfill(4)}"
-    
-    db["map"][role][name] = roll
-    saveJson(rollnumbersFile, db)
-    return roll
\ No newline at end of file
+    """Roll number of name, allocating one if this is a new registration"""
+    return lookupRollNumber(name, role) or reserveRollNumbers([name], role)[name]
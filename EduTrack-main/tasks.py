@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Background loads for the GUI.
+#
+# Screen handlers hand slow work (file reads, JSON parsing, analytics, chart
+# figures) to a TaskRunner. It runs on a small thread pool and the result
+# comes back on the Tk thread: workers only put finished jobs on a queue,
+# and the Tk thread drains it from root.after while anything is in flight.
+# Tk itself is never touched off its own thread.
+#
+# Each job belongs to the screen that was showing when it was submitted.
+# navigate() starts a new screen: queued jobs of the old one are cancelled
+# and results that still arrive are dropped, so a slow load can never draw
+# into a screen the user has already left.
+#
+# A heartbeat scheduled every HEARTBEAT_MS measures how late it runs; the
+# lateness is time the event loop was blocked, charged to the current
+# screen. With EDUTRACK_STALLS=1 the per-screen totals are printed on exit.
+
+WORKERS = 4
+POLL_MS = 25                # how often finished jobs are collected
+WAIT_POLL_MS = 200          # how often submit_after() checks the futures it waits for
+HEARTBEAT_MS = 50
+STALL_MS = 100              # a late heartbeat beyond this counts as a stall
+
+
+class ScreenStats:
+    def __init__(self):
+        self.visits = 0
+        self.stalls = 0
+        self.stalled_ms = 0.0
+        self.worst_ms = 0.0
+
+    def add(self, late_ms):
+        if late_ms >= STALL_MS:
+            self.stalls += 1
+            self.stalled_ms += late_ms
+        self.worst_ms = max(self.worst_ms, late_ms)
+
+
+class TaskRunner:
+    """Thread pool whose results are delivered on the Tk thread"""
+
+    def __init__(self, root, workers=WORKERS):
+        self.root = root
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="edutrack-load")
+        self._done = queue.Queue()
+        self._jobs = set()          # futures of the current screen
+        self._polling = False
+        self.screen = ""
+        self.generation = 0
+        self.stats = {}             # screen -> ScreenStats
+        self._lock = threading.Lock()
+        self._beat_at = None
+
+    # --- navigation ---
+
+    def navigate(self, screen):
+        """A new screen is showing: cancel and forget the previous screen's jobs"""
+        with self._lock:
+            self.generation += 1
+            for job in self._jobs:
+                job.cancel()
+            self._jobs.clear()
+        self.screen = screen
+        self.stats.setdefault(screen, ScreenStats()).visits += 1
+
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    # --- jobs ---
+
+    def submit(self, fn, on_done, on_error=None):
+        """Run fn() on the pool; on_done(result) or on_error(exc) later runs on the Tk thread
+
+        Neither callback runs if the user navigates away first.
+        """
+        generation = self.generation
+        job = self._pool.submit(fn)
+        with self._lock:
+            self._jobs.add(job)
+        job.add_done_callback(lambda f: self._done.put((generation, f, on_done, on_error)))
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+        return job
+
+    def submit_after(self, futures, fn, on_done, on_error=None):
+        """submit() once every future in futures (e.g. of another pool) is done
+
+        The wait is polled from the Tk thread, so no worker is held while it
+        lasts; it stops if the user navigates away first.
+        """
+        generation = self.generation
+        def check():
+            if generation != self.generation:
+                return
+            if all(f.done() for f in futures):
+                self.submit(fn, on_done, on_error)
+            else:
+                self.root.after(WAIT_POLL_MS, check)
+        check()
+
+    def _poll(self):
+        while True:
+            try:
+                generation, job, on_done, on_error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._jobs.discard(job)
+            if generation != self.generation or job.cancelled():
+                continue
+            exc = job.exception()
+            if exc is None:
+                on_done(job.result())
+            elif on_error:
+                on_error(exc)
+            else:
+                print(f"Background load failed: {exc}", file=sys.stderr)
+        if self.pending() or not self._done.empty():
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    # --- event-loop stalls ---
+
+    def start_heartbeat(self):
+        self._beat_at = time.perf_counter()
+        self.root.after(HEARTBEAT_MS, self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        late_ms = (now - self._beat_at) * 1000 - HEARTBEAT_MS
+        self.stats.setdefault(self.screen, ScreenStats()).add(max(0.0, late_ms))
+        self._beat_at = now
+        self.root.after(HEARTBEAT_MS, self._beat)
+
+    def report(self):
+        """Lines describing how long each screen blocked the event loop"""
+        lines = [f"{'screen':<40} {'visits':>6} {'stalls':>6} {'stalled':>10} {'worst':>9}"]
+        for screen, s in sorted(self.stats.items(), key=lambda kv: -kv[1].stalled_ms):
+            lines.append(f"{screen[:40]:<40} {s.visits:>6} {s.stalls:>6} {s.stalled_ms:>8.0f}ms {s.worst_ms:>7.0f}ms")
+        return lines
+
+    def shutdown(self):
+        self.navigate("")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if os.environ.get("EDUTRACK_STALLS"):
+            print("\n".join(self.report()), file=sys.stderr)
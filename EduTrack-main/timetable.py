@@ -0,0 +1,266 @@
+import time
+import random
+from datetime import datetime, timedelta
+import store
+import exam_date
+
+# Exam timetable generator.
+#
+# Two subjects conflict when some section in sectionsubjects.json takes
+# both. A timetable gives every subject an exam day so that no section sits
+# more than max_per_day exams on one day; with max_per_day = 1 that is a
+# colouring of the conflict graph, one colour per exam day.
+#
+# solve() starts from a DSATUR-style greedy assignment (most constrained
+# subject first, earliest day that still has room in all its sections), then
+# tries to empty the last day with a tabu search: its subjects move to
+# earlier days and, while any section is over its daily limit, the best
+# non-tabu move of a subject in an over-full (section, day) cell is applied.
+# Every success removes a day; it stops at the lower bound (the busiest
+# section's subjects / max_per_day), when a day cannot be emptied within
+# STALE_ITERATIONS moves of the last improvement, or at the time limit.
+#
+# Day numbers map onto calendar dates from the start date, skipping blackout
+# dates and weekly days off (Sunday by default).
+
+DATE_FORMAT = "%d/%m/%Y"        # as in exam_date.json
+DAYS_OFF = (6,)                 # weekday numbers never used (Monday is 0)
+TIME_LIMIT = 5.0                # seconds of local search per solve
+TABU_ITERATIONS = 20_000        # per attempt to remove one day
+STALE_ITERATIONS = 5_000        # give up an attempt after this many moves without progress
+
+
+class Problem:
+    """Subjects, the sections taking each, and the subjects of each section"""
+
+    def __init__(self, allocation, code_of=None):
+        code_of = code_of or {}
+        items = sorted((str(sec).strip().upper(), names) for sec, names in allocation.items())
+        self.sections = [sec for sec, _ in items]
+        self.names, self.codes, index = [], [], {}
+        self.members = []           # section -> [subject]
+        for _, names in items:
+            subs = []
+            for name in names or []:
+                name = str(name).strip()
+                if name not in index:
+                    index[name] = len(self.names)
+                    self.names.append(name)
+                    self.codes.append((code_of.get(name) or exam_date.getSubjectCode(name)).upper())
+                if index[name] not in subs:
+                    subs.append(index[name])
+            self.members.append(subs)
+        self.sections_of = [[] for _ in self.names]     # subject -> [section]
+        for s, subs in enumerate(self.members):
+            for v in subs:
+                self.sections_of[v].append(s)
+        neighbours = [set() for _ in self.names]
+        for subs in self.members:
+            for v in subs:
+                neighbours[v].update(subs)
+        for v, n in enumerate(neighbours):
+            n.discard(v)
+        self.neighbours = [sorted(n) for n in neighbours]
+
+    def lower_bound(self, max_per_day=1):
+        busiest = max((len(m) for m in self.members), default=0)
+        return -(-busiest // max_per_day)
+
+
+def _greedy(p, cap):
+    """DSATUR-style assignment: subject -> day"""
+    n = len(p.names)
+    day = [-1] * n
+    load = [dict() for _ in p.sections]     # section -> {day: exams}
+    blocked = [set() for _ in range(n)]     # days on which a section of the subject is full
+    left = set(range(n))
+    while left:
+        v = max(left, key=lambda u: (len(blocked[u]), len(p.neighbours[u]), -u))
+        d = 0
+        while d in blocked[v]:
+            d += 1
+        day[v] = d
+        left.discard(v)
+        for s in p.sections_of[v]:
+            load[s][d] = load[s].get(d, 0) + 1
+            if load[s][d] >= cap:
+                for u in p.members[s]:
+                    if u in left:
+                        blocked[u].add(d)
+    return day
+
+def _violations(p, day, days, cap):
+    """Exams per (section, day) and the cells above cap"""
+    load = [[0] * days for _ in p.sections]
+    for v, d in enumerate(day):
+        for s in p.sections_of[v]:
+            load[s][d] += 1
+    over = {(s, d) for s in range(len(p.sections)) for d in range(days) if load[s][d] > cap}
+    return load, over
+
+def _excess(load, over, cap):
+    return sum(load[s][d] - cap for s, d in over)
+
+def _move_delta(p, load, v, a, b, cap):
+    delta = 0
+    for s in p.sections_of[v]:
+        if load[s][a] > cap:
+            delta -= 1
+        if load[s][b] >= cap:
+            delta += 1
+    return delta
+
+def _apply(p, load, over, day, v, b, cap):
+    a = day[v]
+    for s in p.sections_of[v]:
+        load[s][a] -= 1
+        if load[s][a] <= cap:
+            over.discard((s, a))
+        load[s][b] += 1
+        if load[s][b] > cap:
+            over.add((s, b))
+    day[v] = b
+
+def _fit(p, day, days, cap, rng, deadline):
+    """Try to place every subject on days 0..days-1; returns the new assignment or None"""
+    day = list(day)
+    moved = [v for v, d in enumerate(day) if d >= days]
+    for v in moved:
+        day[v] = 0
+    load, over = _violations(p, day, days, cap)
+    for v in moved:     # start the evicted subjects on their least crowded day
+        best = min(range(days), key=lambda d: (_move_delta(p, load, v, day[v], d, cap), rng.random()))
+        _apply(p, load, over, day, v, best, cap)
+    excess = _excess(load, over, cap)
+    tabu = {}
+    best_excess, improved = excess, 0
+    for it in range(TABU_ITERATIONS):
+        if not excess:
+            return day
+        if excess < best_excess:
+            best_excess, improved = excess, it
+        elif it - improved > STALE_ITERATIONS:
+            return None
+        if it % 256 == 0 and time.perf_counter() > deadline:
+            return None
+        clashing = {v for s, d in over for v in p.members[s] if day[v] == d}
+        best, best_delta = None, None
+        for v in clashing:
+            a = day[v]
+            for b in range(days):
+                if b == a:
+                    continue
+                delta = _move_delta(p, load, v, a, b, cap)
+                if tabu.get((v, b), -1) >= it and excess + delta > 0:
+                    continue        # tabu, and not good enough to override it
+                if best_delta is None or delta < best_delta or (delta == best_delta and rng.random() < 0.5):
+                    best, best_delta = (v, b), delta
+        if best is None:
+            continue
+        v, b = best
+        tabu[(v, day[v])] = it + int(0.6 * len(clashing)) + rng.randint(1, 10)
+        _apply(p, load, over, day, v, b, cap)
+        excess += best_delta
+    return None
+
+def solve(p, max_per_day=1, seed=0, time_limit=TIME_LIMIT):
+    """subject -> day number (0-based) using as few days as the search finds"""
+    if not p.names:
+        return []
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_limit
+    day = _greedy(p, max_per_day)
+    days = max(day) + 1
+    bound = p.lower_bound(max_per_day)
+    while days > bound and time.perf_counter() < deadline:
+        fitted = _fit(p, day, days - 1, max_per_day, rng, deadline)
+        if fitted is None:
+            break
+        day, days = fitted, days - 1
+    return day
+
+def check(p, day, max_per_day=1):
+    """[(section, day, [subject])] where a section has more than max_per_day exams on a day"""
+    bad = []
+    for s, subs in enumerate(p.members):
+        by_day = {}
+        for v in subs:
+            by_day.setdefault(day[v], []).append(v)
+        bad.extend((p.sections[s], d, vs) for d, vs in sorted(by_day.items()) if len(vs) > max_per_day)
+    return bad
+
+def parse_date(text):
+    return datetime.strptime(text.strip(), DATE_FORMAT).date()
+
+def exam_days(start, count, blackout=(), days_off=DAYS_OFF):
+    """The first count usable dates from start"""
+    blackout = set(blackout)
+    out, d = [], start
+    while len(out) < count:
+        if d.weekday() not in days_off and d not in blackout:
+            out.append(d)
+        d += timedelta(days=1)
+    return out
+
+def _code_of(subjects_path):
+    raw = store.view(subjects_path, [])
+    items = raw.get("subjects", []) if isinstance(raw, dict) else raw
+    return {s.get("name"): s.get("code") for s in items if isinstance(s, dict) and s.get("name")}
+
+def make_timetable(alloc_path, subjects_path, start, blackout=(), max_per_day=1, days_off=DAYS_OFF,
+                   time_limit=TIME_LIMIT):
+    """[(date, code, name, sections)] for every allocated subject, by date then code"""
+    p = Problem(store.view(alloc_path, {}), _code_of(subjects_path))
+    day = solve(p, max_per_day, time_limit=time_limit)
+    if not day:
+        return []
+    dates = exam_days(start, max(day) + 1, blackout, days_off)
+    rows = [(dates[d], p.codes[v], p.names[v], len(p.sections_of[v])) for v, d in enumerate(day)]
+    rows.sort(key=lambda r: (r[0], r[1]))
+    return rows
+
+def write_timetable(rows, exam_path):
+    """Put the dates of a timetable into exam_date.json, keeping other subjects' entries"""
+    changes = {code: {"subjectName": name, "examDate": date.strftime(DATE_FORMAT)} for date, code, name, _ in rows}
+    def apply(raw):
+        exams = exam_date.examMapFromPayload(raw)
+        exams.update(changes)
+        return exam_date.examPayload(exams)
+    store.update(exam_path, {"exam_schedule": []}, apply)
+
+def clashes(alloc_path, subjects_path, exam_path, max_per_day=1):
+    """[(section, date text, [subject names])] where exam_date.json breaks the daily limit"""
+    p = Problem(store.view(alloc_path, {}), _code_of(subjects_path))
+    exams = exam_date.examMapFromPayload(store.view(exam_path, {}))
+    dates = [exams.get(code, {}).get("examDate", "") for code in p.codes]
+    keys = {text: i for i, text in enumerate(sorted({d for d in dates if d}))}
+    # subjects without a date get a day of their own so they never clash
+    day = [keys[d] if d else len(keys) + v for v, d in enumerate(dates)]
+    return [(sec, dates[vs[0]], [p.names[v] for v in vs]) for sec, _, vs in check(p, day, max_per_day)]
+
+def schedule_interactive(alloc_path=exam_date.ALLOCATIONFILE, subjects_path=exam_date.SUBJECTSFILE,
+                         exam_path=exam_date.EXAMFILE):
+    try:
+        start = parse_date(input("First exam day [DD/MM/YYYY]: "))
+        blackout = [parse_date(t) for t in input("Blackout dates (comma separated, optional): ").split(",") if t.strip()]
+    except ValueError:
+        print("Invalid date format.")
+        return
+    per_day = input("Maximum exams per section per day (default 1): ").strip()
+    max_per_day = int(per_day) if per_day.isdigit() and int(per_day) > 0 else 1
+    started = time.perf_counter()
+    rows = make_timetable(alloc_path, subjects_path, start, blackout, max_per_day)
+    if not rows:
+        print("No section subject allocations found.")
+        return
+    print(f"\n{len(rows)} exams on {len({r[0] for r in rows})} day(s), found in {time.perf_counter() - started:.1f}s:")
+    for date, code, name, sections in rows:
+        print(f" {date.strftime(DATE_FORMAT)}  {code:<10} {name} ({sections} section(s))")
+    if input("Save to exam_date.json? (y/N): ").strip().lower() == "y":
+        write_timetable(rows, exam_path)
+        print("Exam dates saved.")
+
+
+if __name__ == "__main__":
+    # python timetable.py : interactive, using the files in the current directory
+    schedule_interactive()
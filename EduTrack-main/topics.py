@@ -1,6 +1,6 @@
-import json
 import os
 from datetime import datetime
+import store
 
 TOPICS_FILE = "topics.json"
 TEACHER_SECTIONS_FILE = "teachersections.json"
@@ -12,17 +12,13 @@ SECTIONS_FILE = "sections.json"
 # -----------------------------------------------------------
 
 def load_json(filename):
-    if not os.path.exists(filename):
-        return {}
-    with open(filename, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+    return store.load(filename, {})
 
 def save_json(filename, data):
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+    store.save(filename, data)
+
+def update_json(filename, fn):
+    return store.update(filename, {}, fn)
 
 # -----------------------------------------------------------
 # Load teacher sections (from teachersections.json)
@@ -73,18 +69,15 @@ def add_topic(teacher_name):
 
     date = datetime.now().strftime("%d/%m/%Y")
 
-    topics_data = load_json(TOPICS_FILE)
-
-    if section not in topics_data:
-        topics_data[section] = []
-
-    topics_data[section].append({
+    entry = {
         "teacher": teacher_name,
         "topic": topic,
         "date": date
-    })
-
-    save_json(TOPICS_FILE, topics_data)
+    }
+    import search   # SQLite index; only needed when a topic is written
+    before = search.topics_signature(TOPICS_FILE)
+    saved = update_json(TOPICS_FILE, lambda topics_data: topics_data.setdefault(section, []).append(entry))
+    search.topic_added(TOPICS_FILE, section, len(saved[section]) - 1, entry, before)
     print(f"Topic '{topic}' added successfully for section {section} on {date}.")
 
 # -----------------------------------------------------------
@@ -101,8 +94,7 @@ def view_topics_for_student(student_id):
         return
 
     # --- Step 2: Load student's section from sections.json ---
-    with open("sections.json", "r") as f:
-        sections_data = json.load(f)
+    sections_data = store.view(SECTIONS_FILE, {})
 
     student_section = sections_data.get(student_id)
     if not student_section:
@@ -110,8 +102,7 @@ def view_topics_for_student(student_id):
         return
 
     # --- Step 3: Load topics for that section from topics.json ---
-    with open("topics.json", "r") as f:
-        topics_data = json.load(f)
+    topics_data = store.view(TOPICS_FILE, {})
 
     section_topics = topics_data.get(student_section)
     if not section_topics: